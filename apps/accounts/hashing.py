@@ -0,0 +1,53 @@
+"""
+Password hashing helpers for bulk account creation.
+
+Django's default PBKDF2 hasher is deliberately slow, so hashing thousands of
+passwords serially dominates bulk onboarding. These helpers spread the work
+across a process pool. Every password gets its own salt, except when seeding
+development data, where identical passwords may share one hash.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+# Below this many passwords to hash the pool start-up cost outweighs the gain
+MIN_PARALLEL_PASSWORDS = 4
+
+
+def _init_worker():
+    """Make sure Django is configured in spawned worker processes."""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None, share_hashes=False):
+    """
+    Hash a list of raw passwords, returning encoded hashes in the same order.
+    
+    Each password is hashed with its own salt, so accounts sharing a password
+    can't be told apart by their hashes. With `share_hashes`, identical
+    passwords are hashed once and the encoded value is reused; only use that
+    for throwaway development data. `None` produces an unusable password, as
+    with User.set_password(None).
+    """
+    if share_hashes:
+        to_hash = list(dict.fromkeys(p for p in passwords if p is not None))
+    else:
+        to_hash = [p for p in passwords if p is not None]
+    workers = workers or os.cpu_count() or 1
+    
+    if workers > 1 and len(to_hash) >= MIN_PARALLEL_PASSWORDS:
+        chunksize = max(1, len(to_hash) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            hashed = list(pool.map(make_password, to_hash, chunksize=chunksize))
+    else:
+        hashed = [make_password(password) for password in to_hash]
+    
+    if share_hashes:
+        encoded = dict(zip(to_hash, hashed))
+        return [encoded[p] if p is not None else make_password(None) for p in passwords]
+    hashed = iter(hashed)
+    return [next(hashed) if p is not None else make_password(None) for p in passwords]
@@ -0,0 +1,47 @@
+"""
+Benchmark bulk account creation throughput.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.accounts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Report accounts created per second for serial and bulk account creation (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=100, help='Number of accounts per run')
+        parser.add_argument('--workers', type=int, default=None, help='Hashing processes (default: CPU count)')
+        parser.add_argument('--distinct-passwords', action='store_true',
+                            help='Give every account its own password instead of a shared seed password')
+        parser.add_argument('--skip-serial', action='store_true', help='Only time the bulk path')
+
+    def handle(self, *args, **options):
+        count = options['accounts']
+        
+        def accounts(tag):
+            return [
+                {
+                    'email': f'bench.{tag}.{i}@bench.invalid',
+                    'password': f'bench-password-{i}' if options['distinct_passwords'] else 'password123',
+                }
+                for i in range(count)
+            ]
+        
+        if not options['skip_serial']:
+            rate = self._timed(lambda: [User.objects.create_user(**a) for a in accounts('serial')], count)
+            self.stdout.write(f'create_user (serial):      {rate:10.1f} accounts/s')
+        
+        rate = self._timed(lambda: User.objects.bulk_create_users(accounts('bulk'), workers=options['workers']), count)
+        self.stdout.write(self.style.SUCCESS(f'bulk_create_users (pool):  {rate:10.1f} accounts/s'))
+
+    def _timed(self, create, count):
+        """Run `create` inside a rolled-back transaction and return accounts per second."""
+        with transaction.atomic():
+            started = time.perf_counter()
+            create()
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return count / elapsed if elapsed else float('inf')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_managers_alter_user_username'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notification_email',
+            field=models.CharField(choices=[('instant', 'As they happen'), ('digest', 'Daily digest')], default='instant', max_length=10),
+        ),
+    ]
@@ -1,10 +1,14 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from .hashing import hash_passwords
 
 
 class UserManager(BaseUserManager):
     """Custom user manager for email-based authentication."""
     
+    # Max prefixes OR-ed into one lookup query (keeps SQL under backend limits)
+    PREFIX_QUERY_CHUNK = 200
+    
     def create_user(self, email, password=None, username=None, **extra_fields):
         """Create and return a regular user."""
         if not email:
@@ -14,19 +18,81 @@ class UserManager(BaseUserManager):
         
         # Generate username from email if not provided
         if not username:
-            username = email.split('@')[0]
-            # Ensure unique username
-            base_username = username
-            counter = 1
-            while self.model.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
+            username = self.allocate_username(email.split('@')[0])
         
         user = self.model(email=email, username=username, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
         return user
     
+    def allocate_username(self, base_username):
+        """Return a free username, appending the lowest free numeric suffix if needed."""
+        return self.allocate_usernames([base_username])[0]
+    
+    def allocate_usernames(self, base_usernames):
+        """
+        Return a free username for each base in `base_usernames`, in order.
+        
+        Existing usernames sharing each prefix are fetched in a single query
+        (one per PREFIX_QUERY_CHUNK bases for large imports) and suffixes
+        (base, base1, base2, ...) are picked in memory, so repeated bases
+        within the same batch also get distinct names.
+        """
+        bases = sorted(set(base_usernames))
+        if not bases:
+            return []
+        
+        taken = set()
+        for i in range(0, len(bases), self.PREFIX_QUERY_CHUNK):
+            prefix_filter = models.Q()
+            for base in bases[i:i + self.PREFIX_QUERY_CHUNK]:
+                prefix_filter |= models.Q(username__startswith=base)
+            taken.update(self.model.objects.filter(prefix_filter).values_list('username', flat=True))
+        
+        allocated = []
+        next_suffix = {}
+        for base in base_usernames:
+            username = base
+            counter = next_suffix.get(base, 1)
+            while username in taken:
+                username = f"{base}{counter}"
+                counter += 1
+            next_suffix[base] = counter
+            taken.add(username)
+            allocated.append(username)
+        return allocated
+    
+    def bulk_create_users(self, accounts, workers=None, batch_size=500, share_password_hashes=False):
+        """
+        Create many users at once.
+        
+        `accounts` is a list of dicts with `email`, `password` and any other
+        User fields. Usernames are allocated in one query, passwords are hashed
+        across a process pool, and rows are inserted with bulk_create.
+        `share_password_hashes` reuses one hash (and salt) for identical
+        passwords; it is only meant for seeding development data.
+        """
+        emails = [self.normalize_email(account['email']) for account in accounts]
+        if not all(emails):
+            raise ValueError('The Email field must be set')
+        
+        missing = [i for i, account in enumerate(accounts) if not account.get('username')]
+        generated = self.allocate_usernames([emails[i].split('@')[0] for i in missing])
+        usernames = [account.get('username') for account in accounts]
+        for i, username in zip(missing, generated):
+            usernames[i] = username
+        
+        hashes = hash_passwords(
+            [account.get('password') for account in accounts], workers=workers, share_hashes=share_password_hashes,
+        )
+        
+        users = []
+        for account, email, username, encoded in zip(accounts, emails, usernames, hashes):
+            extra_fields = {k: v for k, v in account.items() if k not in ('email', 'password', 'username')}
+            users.append(self.model(email=email, username=username, password=encoded, **extra_fields))
+        
+        return self.bulk_create(users, batch_size=batch_size)
+    
     def create_superuser(self, email, password=None, username=None, **extra_fields):
         """Create and return a superuser."""
         extra_fields.setdefault('is_staff', True)
@@ -50,6 +116,10 @@ class User(AbstractUser):
         HR = 'hr', 'HR'
         ADMIN = 'admin', 'Admin'
     
+    class NotificationEmail(models.TextChoices):
+        INSTANT = 'instant', 'As they happen'
+        DIGEST = 'digest', 'Daily digest'
+    
     email = models.EmailField(unique=True)
     role = models.CharField(
         max_length=20,
@@ -57,6 +127,11 @@ class User(AbstractUser):
         default=Role.EMPLOYEE
     )
     two_factor_enabled = models.BooleanField(default=False)
+    notification_email = models.CharField(
+        max_length=10,
+        choices=NotificationEmail.choices,
+        default=NotificationEmail.INSTANT
+    )
     
     objects = UserManager()
     
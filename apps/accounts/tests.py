@@ -1,3 +1,100 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.core.cache import tiered
+
+from . import views
+from .hashing import hash_passwords
+from .models import User
+
+
+class UsernameAllocationTests(TestCase):
+    """Tests for unique username generation in UserManager."""
+    
+    def test_create_user_derives_username_from_email(self):
+        user = User.objects.create_user(email='john.smith@ethos.com', password='x')
+        self.assertEqual(user.username, 'john.smith')
+    
+    def test_picks_next_free_suffix(self):
+        User.objects.create_user(email='john.smith@ethos.com', password='x')
+        User.objects.create_user(email='john.smith@other.com', password='x')
+        user = User.objects.create_user(email='john.smith@third.com', password='x')
+        self.assertEqual(user.username, 'john.smith2')
+    
+    def test_single_query_per_allocation(self):
+        for domain in ['a.com', 'b.com', 'c.com']:
+            User.objects.create_user(email=f'jane@{domain}', password='x')
+        with self.assertNumQueries(1):
+            self.assertEqual(User.objects.allocate_username('jane'), 'jane3')
+    
+    def test_batch_allocation_avoids_collisions_within_batch(self):
+        User.objects.create_user(email='jane@ethos.com', password='x')
+        usernames = User.objects.allocate_usernames(['jane', 'jane', 'bob', 'jane'])
+        self.assertEqual(usernames, ['jane1', 'jane2', 'bob', 'jane3'])
+
+
+class BulkAccountCreationTests(TestCase):
+    """Tests for bulk account creation and password hashing."""
+    
+    def test_bulk_create_users(self):
+        User.objects.create_user(email='jane@ethos.com', password='x')
+        users = User.objects.bulk_create_users([
+            {'email': 'jane@Other.com', 'password': 'password123', 'role': 'hr'},
+            {'email': 'bob@ethos.com', 'password': 'password123'},
+        ], workers=1)
+        
+        self.assertEqual([u.username for u in users], ['jane1', 'bob'])
+        self.assertEqual(users[0].email, 'jane@other.com')
+        self.assertEqual(users[0].role, 'hr')
+        user = User.objects.get(email='bob@ethos.com')
+        self.assertTrue(user.check_password('password123'))
+    
+    def test_identical_passwords_get_their_own_salt(self):
+        hashes = hash_passwords(['same', 'same', 'other', None], workers=1)
+        self.assertNotEqual(hashes[0], hashes[1])
+        self.assertTrue(check_password('same', hashes[1]))
+        self.assertTrue(check_password('other', hashes[2]))
+        self.assertTrue(hashes[3].startswith('!'))
+    
+    def test_shared_hashes_for_seed_data(self):
+        hashes = hash_passwords(['same', 'same', 'other', None], workers=1, share_hashes=True)
+        self.assertEqual(hashes[0], hashes[1])
+        self.assertNotEqual(hashes[0], hashes[2])
+        self.assertTrue(hashes[3].startswith('!'))
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class TwoFactorQRCodeTests(TestCase):
+    """Tests for the 2FA setup QR code endpoint."""
+    
+    def setUp(self):
+        tiered.clear()
+        self.user = User.objects.create_user(email='jane.doe@ethos.com', password='x')
+        self.client.force_login(self.user)
+    
+    def test_qr_code_is_an_svg_with_etag(self):
+        page = self.client.get(reverse('setup_2fa'))
+        self.assertContains(page, reverse('2fa_qr') + '?v=')
+        self.assertNotContains(page, 'data:image/png')
+        
+        with mock.patch.object(views.qrcode, 'make', wraps=views.qrcode.make) as make:
+            response = self.client.get(reverse('2fa_qr'))
+            self.assertEqual(response['Content-Type'], 'image/svg+xml')
+            self.assertIn('private', response['Cache-Control'])
+            self.assertTrue(response.content.startswith(b'<svg'))
+            
+            revalidated = self.client.get(reverse('2fa_qr'), HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(make.call_count, 1)
+            
+            # The SVG embeds the TOTP secret, so it isn't kept server-side: a
+            # request without If-None-Match renders it again
+            again = self.client.get(reverse('2fa_qr'))
+            self.assertEqual(again.content, response.content)
+            self.assertEqual(make.call_count, 2)
+    
+    def test_no_qr_code_without_pending_device(self):
+        self.assertEqual(self.client.get(reverse('2fa_qr')).status_code, 404)
@@ -1,16 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django_otp.plugins.otp_totp.models import TOTPDevice
 import qrcode
 import qrcode.image.svg
-from io import BytesIO
 import base64
+import hashlib
 from django.contrib.auth import logout
 
 from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.http import parse_etags, urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from apps.employees.services import send_email_notification, get_base_url
 from .models import User
@@ -81,15 +81,14 @@ def setup_2fa(request):
         else:
             messages.error(request, 'Invalid verification code. Please try again.')
     
-    # Generate QR code
-    otpauth_url = device.config_url
-    qr_code = generate_qr_code(otpauth_url)
+    # The QR code is served separately by qr_code_2fa; the version busts browser caches when the key changes
+    qr_version = qr_code_key(device.config_url)[:16]
     
     # Get the secret key for manual entry
     secret_key = base64.b32encode(device.bin_key).decode('utf-8')
     
     context = {
-        'qr_code': qr_code,
+        'qr_version': qr_version,
         'secret_key': secret_key,
         'device': device,
     }
@@ -158,25 +157,47 @@ def verify_2fa(request):
     return render(request, 'accounts/2fa_verify.html')
 
 
-def generate_qr_code(data):
-    """Generate a QR code as base64 string."""
-    qr = qrcode.QRCode(
-        version=1,
+QR_CODE_CACHE_SECONDS = 600
+
+
+def qr_code_key(data):
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def generate_qr_svg(data):
+    """
+    Render a QR code as SVG.
+
+    Not cached server-side: `data` holds the TOTP secret, which shouldn't be
+    copied into the shared cache. The endpoint's ETag saves re-downloads.
+    """
+    img = qrcode.make(
+        data,
+        image_factory=qrcode.image.svg.SvgPathImage,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
         box_size=10,
         border=4,
     )
-    qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
+    return img.to_string()
+
+
+@login_required
+def qr_code_2fa(request):
+    """SVG QR code for the user's pending (unconfirmed) authenticator device."""
+    device = TOTPDevice.objects.filter(user=request.user, confirmed=False).first()
+    if device is None:
+        raise Http404
     
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+    config_url = device.config_url
+    etag = f'"{qr_code_key(config_url)[:32]}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(generate_qr_svg(config_url), content_type='image/svg+xml')
+    response['ETag'] = etag
+    # The code embeds the TOTP secret, so only the user's own browser may keep it
+    response['Cache-Control'] = f'private, max-age={QR_CODE_CACHE_SECONDS}'
+    return response
 
 def custom_password_reset(request):
     """Custom password reset that uses SendGrid HTTP API."""
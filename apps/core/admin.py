@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import IdSequence
 
-# Register your models here.
+
+@admin.register(IdSequence)
+class IdSequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_value', 'updated_at')
+    search_fields = ('name',)
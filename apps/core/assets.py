@@ -0,0 +1,756 @@
+"""
+Front-end assets.
+
+Pages are styled with Tailwind utility classes. Instead of compiling them in
+the browser with the Tailwind Play CDN, build_stylesheet() scans the
+templates and app code for class names and emits only the rules those
+classes need, after Tailwind's preflight reset; ``python manage.py
+build_css`` writes the result to static/css/app.css and must be re-run when
+new classes are used. It implements the subset of Tailwind v3 that this
+project uses (spacing, sizing, flex/grid, typography, colours, borders,
+shadows and rings, with hover:/focus: and sm:/md:/lg: variants). Words that
+aren't utilities are skipped, but variant-prefixed classes and palette
+colours (e.g. ``bg-pink-100``) it can't compile are reported by
+``build_css``, and make ``build_css --check`` fail.
+
+Third-party scripts are pinned in VENDOR_ASSETS by URL and SHA-384
+(subresource integrity) digest, and downloaded into static/vendor/ by
+``python manage.py fetch_assets``, which refuses any file whose digest
+doesn't match the pinned one. The vendor_script template tag serves the
+vendored copy, falling back to the pinned URL (with its integrity digest)
+when the file hasn't been fetched. In production all of it
+is served by WhiteNoise from CompressedManifestStaticFilesStorage, so file
+names carry a content hash and are sent with far-future cache headers.
+"""
+
+import base64
+import hashlib
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+# Static path -> (pinned source URL, SHA-384 integrity of the file as published).
+# A None digest means the file hasn't been verified yet: fetch_assets skips it and prints
+# the digest it downloaded, to be checked against the upstream release and pinned. Pages
+# load an asset that isn't in static/vendor/ from its URL (see the vendor_script tag).
+VENDOR_ASSETS = {
+    'vendor/htmx-1.9.10.min.js': (
+        'https://unpkg.com/htmx.org@1.9.10/dist/htmx.min.js',
+        'sha384-D1Kt99CQMDuVetoL1lrYwg5t+9QdHe7NLX/SoJYkXDFfX37iInKRy5xLSi8nO7UC',
+    ),
+    'vendor/chart-4.4.1.umd.js': (
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+        None,
+    ),
+}
+
+STYLESHEET = 'css/app.css'
+
+# Files scanned for class names, relative to BASE_DIR; tests aren't rendered
+CSS_SOURCES = ['templates/**/*.html', 'apps/**/*.py']
+CSS_EXCLUDE = ['tests.py', 'test_*.py']
+
+SCREENS = {'sm': '640px', 'md': '768px', 'lg': '1024px', 'xl': '1280px', '2xl': '1536px'}
+
+PSEUDO_CLASSES = {
+    'hover': ':hover',
+    'focus': ':focus',
+    'active': ':active',
+    'disabled': ':disabled',
+    'first': ':first-child',
+    'last': ':last-child',
+}
+
+COLORS = {
+    'gray': {
+        '50': '#f9fafb', '100': '#f3f4f6', '200': '#e5e7eb', '300': '#d1d5db', '400': '#9ca3af',
+        '500': '#6b7280', '600': '#4b5563', '700': '#374151', '800': '#1f2937', '900': '#111827',
+    },
+    'red': {
+        '50': '#fef2f2', '100': '#fee2e2', '200': '#fecaca', '300': '#fca5a5', '400': '#f87171',
+        '500': '#ef4444', '600': '#dc2626', '700': '#b91c1c', '800': '#991b1b', '900': '#7f1d1d',
+    },
+    'orange': {
+        '50': '#fff7ed', '100': '#ffedd5', '200': '#fed7aa', '300': '#fdba74', '400': '#fb923c',
+        '500': '#f97316', '600': '#ea580c', '700': '#c2410c', '800': '#9a3412', '900': '#7c2d12',
+    },
+    'yellow': {
+        '50': '#fefce8', '100': '#fef9c3', '200': '#fef08a', '300': '#fde047', '400': '#facc15',
+        '500': '#eab308', '600': '#ca8a04', '700': '#a16207', '800': '#854d0e', '900': '#713f12',
+    },
+    'green': {
+        '50': '#f0fdf4', '100': '#dcfce7', '200': '#bbf7d0', '300': '#86efac', '400': '#4ade80',
+        '500': '#22c55e', '600': '#16a34a', '700': '#15803d', '800': '#166534', '900': '#14532d',
+    },
+    'blue': {
+        '50': '#eff6ff', '100': '#dbeafe', '200': '#bfdbfe', '300': '#93c5fd', '400': '#60a5fa',
+        '500': '#3b82f6', '600': '#2563eb', '700': '#1d4ed8', '800': '#1e40af', '900': '#1e3a8a',
+    },
+    'purple': {
+        '50': '#faf5ff', '100': '#f3e8ff', '200': '#e9d5ff', '300': '#d8b4fe', '400': '#c084fc',
+        '500': '#a855f7', '600': '#9333ea', '700': '#7e22ce', '800': '#6b21a8', '900': '#581c87',
+    },
+}
+NAMED_COLORS = {'white': '#ffffff', 'black': '#000000', 'transparent': 'transparent', 'current': 'currentColor'}
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'),
+}
+FONT_WEIGHTS = {'light': '300', 'normal': '400', 'medium': '500', 'semibold': '600', 'bold': '700'}
+TRACKING = {'tight': '-0.025em', 'normal': '0em', 'wide': '0.025em', 'wider': '0.05em', 'widest': '0.1em'}
+LEADING = {'none': '1', 'tight': '1.25', 'snug': '1.375', 'normal': '1.5', 'relaxed': '1.625', 'loose': '2'}
+RADII = {
+    'none': '0px', 'sm': '0.125rem', '': '0.25rem', 'md': '0.375rem', 'lg': '0.5rem',
+    'xl': '0.75rem', '2xl': '1rem', 'full': '9999px',
+}
+MAX_WIDTHS = {
+    'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem', '2xl': '42rem',
+    '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', '6xl': '72rem', '7xl': '80rem',
+    'full': '100%', 'none': 'none', 'screen': '100vw',
+}
+SHADOWS = {
+    'sm': '0 1px 2px 0 rgb(0 0 0 / 0.05)',
+    '': '0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)',
+    'md': '0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)',
+    'lg': '0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)',
+    'xl': '0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)',
+    'none': '0 0 #0000',
+}
+DISPLAYS = {
+    'block': 'block', 'inline-block': 'inline-block', 'inline': 'inline', 'flex': 'flex',
+    'inline-flex': 'inline-flex', 'table': 'table', 'grid': 'grid', 'contents': 'contents', 'hidden': 'none',
+}
+FLEX_ALIGN = {'start': 'flex-start', 'end': 'flex-end', 'center': 'center', 'baseline': 'baseline', 'stretch': 'stretch'}
+JUSTIFY = {
+    'start': 'flex-start', 'end': 'flex-end', 'center': 'center', 'between': 'space-between',
+    'around': 'space-around', 'evenly': 'space-evenly',
+}
+SANS = (
+    'ui-sans-serif, system-ui, sans-serif, "Apple Color Emoji", "Segoe UI Emoji", '
+    '"Segoe UI Symbol", "Noto Color Emoji"'
+)
+MONO = 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", "Courier New", monospace'
+TRANSITION = 'transition-timing-function:cubic-bezier(0.4, 0, 0.2, 1);transition-duration:150ms'
+
+PREFLIGHT = f"""*,::before,::after{{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb;
+--tw-ring-offset-width:0px;--tw-ring-offset-color:#fff;--tw-ring-color:rgb(59 130 246 / 0.5);
+--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000}}
+::before,::after{{--tw-content:''}}
+html,:host{{line-height:1.5;-webkit-text-size-adjust:100%;-moz-tab-size:4;tab-size:4;font-family:{SANS};
+font-feature-settings:normal;font-variation-settings:normal;-webkit-tap-highlight-color:transparent}}
+body{{margin:0;line-height:inherit}}
+hr{{height:0;color:inherit;border-top-width:1px}}
+abbr:where([title]){{text-decoration:underline dotted}}
+h1,h2,h3,h4,h5,h6{{font-size:inherit;font-weight:inherit}}
+a{{color:inherit;text-decoration:inherit}}
+b,strong{{font-weight:bolder}}
+code,kbd,samp,pre{{font-family:{MONO};font-size:1em}}
+small{{font-size:80%}}
+sub,sup{{font-size:75%;line-height:0;position:relative;vertical-align:baseline}}
+sub{{bottom:-0.25em}}
+sup{{top:-0.5em}}
+table{{text-indent:0;border-color:inherit;border-collapse:collapse}}
+button,input,optgroup,select,textarea{{font-family:inherit;font-feature-settings:inherit;font-variation-settings:inherit;
+font-size:100%;font-weight:inherit;line-height:inherit;letter-spacing:inherit;color:inherit;margin:0;padding:0}}
+button,select{{text-transform:none}}
+button,input:where([type='button']),input:where([type='reset']),input:where([type='submit']){{
+-webkit-appearance:button;background-color:transparent;background-image:none}}
+:-moz-focusring{{outline:auto}}
+:-moz-ui-invalid{{box-shadow:none}}
+progress{{vertical-align:baseline}}
+::-webkit-inner-spin-button,::-webkit-outer-spin-button{{height:auto}}
+[type='search']{{-webkit-appearance:textfield;outline-offset:-2px}}
+::-webkit-search-decoration{{-webkit-appearance:none}}
+::-webkit-file-upload-button{{-webkit-appearance:button;font:inherit}}
+summary{{display:list-item}}
+blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{{margin:0}}
+fieldset{{margin:0;padding:0}}
+legend{{padding:0}}
+ol,ul,menu{{list-style:none;margin:0;padding:0}}
+dialog{{padding:0}}
+textarea{{resize:vertical}}
+input::placeholder,textarea::placeholder{{opacity:1;color:#9ca3af}}
+button,[role="button"]{{cursor:pointer}}
+:disabled{{cursor:default}}
+img,svg,video,canvas,audio,iframe,embed,object{{display:block;vertical-align:middle}}
+img,video{{max-width:100%;height:auto}}
+[hidden]{{display:none}}
+"""
+
+def integrity(content):
+    """Subresource integrity string (sha384-<base64 digest>) for `content`."""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+
+# Candidate class names: optional variant prefixes, an optional minus sign, then the
+# utility with an optional .5 step, /fraction or [arbitrary value]
+CANDIDATE_RE = re.compile(
+    r'(?<![\w\-:\[])((?:[a-z0-9]+:)*-?[a-z][a-z0-9\-]*(?:\.5)?(?:/[0-9]+)?(?:\[[^\]\s"\'<>]+\])?)'
+)
+
+# Colour utilities, which are always meant as classes even when the palette lacks the colour
+COLOR_UTILITY_RE = re.compile(r'-?(?:bg|text|border|divide|ring|from|to|placeholder)-[a-z]+-(?:50|[1-9]00)')
+
+SIBLINGS = ' > :not([hidden]) ~ :not([hidden])'
+
+
+# Values
+
+def _rgb(hex_color):
+    return ' '.join(str(int(hex_color[i:i + 2], 16)) for i in (1, 3, 5))
+
+
+def _color(name):
+    if name in NAMED_COLORS:
+        return NAMED_COLORS[name]
+    family, _, shade = name.rpartition('-')
+    return COLORS.get(family, {}).get(shade)
+
+
+def _color_rule(prop, name, opacity_var):
+    """Declarations setting `prop` to a palette colour, with an opacity variable like Tailwind."""
+    color = _color(name)
+    if color is None:
+        return None
+    if not color.startswith('#'):
+        return f'{prop}:{color}'
+    return f'{opacity_var}:1;{prop}:rgb({_rgb(color)} / var({opacity_var}))'
+
+
+def _arbitrary(value):
+    if value.startswith('[') and value.endswith(']'):
+        return value[1:-1].replace('_', ' ')
+    return None
+
+
+def _spacing(value, negative=False):
+    """Tailwind's spacing scale: 1 = 0.25rem, plus px and [arbitrary] values."""
+    if value == 'px':
+        size = '1px'
+    elif re.fullmatch(r'\d+(\.5)?', value):
+        size = f'{float(value) / 4:g}rem' if float(value) else '0px'
+    else:
+        return _arbitrary(value)
+    return f'-{size}' if negative and size != '0px' else size
+
+
+def _size(value, extra=None):
+    """Width/height values: spacing scale, fractions, keywords and arbitrary values."""
+    if extra and value in extra:
+        return extra[value]
+    fraction = re.fullmatch(r'(\d+)/(\d+)', value)
+    if fraction:
+        return f'{int(fraction[1]) / int(fraction[2]) * 100:g}%'
+    return _spacing(value)
+
+
+# Rules, in Tailwind's plugin order; later rules override earlier ones in the stylesheet
+
+def _container(m):
+    return 'width:100%'
+
+
+def _position(m):
+    return f'position:{m[1]}'
+
+
+def _inset(m):
+    size = _size(m[3], {'full': '100%', 'auto': 'auto'})
+    if size is None:
+        return None
+    if m[1] and size not in ('auto', '0px'):
+        size = f'-{size}'
+    props = {
+        'inset': ['inset'], 'inset-x': ['left', 'right'], 'inset-y': ['top', 'bottom'],
+        'top': ['top'], 'right': ['right'], 'bottom': ['bottom'], 'left': ['left'],
+    }[m[2]]
+    return ';'.join(f'{prop}:{size}' for prop in props)
+
+
+def _z_index(m):
+    return f'z-index:{m[1]}'
+
+
+def _col_span(m):
+    return 'grid-column:1 / -1' if m[1] == 'full' else f'grid-column:span {m[1]} / span {m[1]}'
+
+
+def _margin(m):
+    size = 'auto' if m[3] == 'auto' else _spacing(m[3], negative=bool(m[1]))
+    if size is None:
+        return None
+    props = {
+        'm': ['margin'], 'mx': ['margin-left', 'margin-right'], 'my': ['margin-top', 'margin-bottom'],
+        'mt': ['margin-top'], 'mr': ['margin-right'], 'mb': ['margin-bottom'], 'ml': ['margin-left'],
+    }[m[2]]
+    return ';'.join(f'{prop}:{size}' for prop in props)
+
+
+def _display(m):
+    return f'display:{DISPLAYS[m[0]]}'
+
+
+def _aspect(m):
+    return {'square': 'aspect-ratio:1 / 1', 'video': 'aspect-ratio:16 / 9', 'auto': 'aspect-ratio:auto'}[m[1]]
+
+
+def _height(m):
+    size = _size(m[1], {'full': '100%', 'screen': '100vh', 'auto': 'auto'})
+    return size and f'height:{size}'
+
+
+def _max_height(m):
+    size = _size(m[1], {'full': '100%', 'screen': '100vh', 'none': 'none'})
+    return size and f'max-height:{size}'
+
+
+def _min_height(m):
+    size = {'0': '0px', 'full': '100%', 'screen': '100vh'}.get(m[1]) or _arbitrary(m[1])
+    return size and f'min-height:{size}'
+
+
+def _width(m):
+    size = _size(m[1], {'full': '100%', 'screen': '100vw', 'auto': 'auto'})
+    return size and f'width:{size}'
+
+
+def _min_width(m):
+    size = {'0': '0px', 'full': '100%'}.get(m[1]) or _arbitrary(m[1])
+    return size and f'min-width:{size}'
+
+
+def _max_width(m):
+    size = MAX_WIDTHS.get(m[1]) or _arbitrary(m[1])
+    return size and f'max-width:{size}'
+
+
+def _flex(m):
+    return {'1': 'flex:1 1 0%', 'auto': 'flex:1 1 auto', 'none': 'flex:none'}[m[1]]
+
+
+def _shrink(m):
+    return f'flex-shrink:{m[2] or 1}'
+
+
+def _grow(m):
+    return f'flex-grow:{m[2] or 1}'
+
+
+def _cursor(m):
+    return f'cursor:{m[1]}'
+
+
+def _grid_cols(m):
+    return f'grid-template-columns:repeat({m[1]}, minmax(0, 1fr))'
+
+
+def _flex_direction(m):
+    return {'row': 'flex-direction:row', 'col': 'flex-direction:column'}[m[1]]
+
+
+def _flex_wrap(m):
+    return 'flex-wrap:wrap'
+
+
+def _align_items(m):
+    return f'align-items:{FLEX_ALIGN[m[1]]}'
+
+
+def _justify(m):
+    return f'justify-content:{JUSTIFY[m[1]]}'
+
+
+def _gap(m):
+    size = _spacing(m[2])
+    if size is None:
+        return None
+    prop = {None: 'gap', 'x': 'column-gap', 'y': 'row-gap'}[m[1]]
+    return f'{prop}:{size}'
+
+
+def _space(m):
+    size = _spacing(m[2])
+    if size is None:
+        return None
+    declarations = f'margin-left:{size};margin-right:0' if m[1] == 'x' else f'margin-top:{size};margin-bottom:0'
+    return declarations, SIBLINGS
+
+
+def _divide_width(m):
+    width = f'{m[2] or 1}px'
+    if m[1] == 'x':
+        return f'border-left-width:{width};border-right-width:0', SIBLINGS
+    return f'border-top-width:{width};border-bottom-width:0', SIBLINGS
+
+
+def _divide_color(m):
+    rule = _color_rule('border-color', m[1], '--tw-divide-opacity')
+    return rule and (rule, SIBLINGS)
+
+
+def _align_self(m):
+    return f'align-self:{FLEX_ALIGN[m[1]]}'
+
+
+def _overflow(m):
+    prop = f'overflow-{m[1]}' if m[1] else 'overflow'
+    return f'{prop}:{m[2]}'
+
+
+def _truncate(m):
+    return 'overflow:hidden;text-overflow:ellipsis;white-space:nowrap'
+
+
+def _whitespace(m):
+    return f'white-space:{m[1]}'
+
+
+def _word_break(m):
+    return 'word-break:break-all' if m[1] == 'all' else 'overflow-wrap:break-word'
+
+
+def _rounded(m):
+    radius = RADII.get(m[2] or '')
+    if radius is None:
+        return None
+    corners = {
+        None: ['border-radius'],
+        't': ['border-top-left-radius', 'border-top-right-radius'],
+        'r': ['border-top-right-radius', 'border-bottom-right-radius'],
+        'b': ['border-bottom-right-radius', 'border-bottom-left-radius'],
+        'l': ['border-top-left-radius', 'border-bottom-left-radius'],
+    }[m[1]]
+    return ';'.join(f'{corner}:{radius}' for corner in corners)
+
+
+def _border_width(m):
+    width = f'{m[2] or 1}px'
+    props = {
+        None: ['border-width'], 'x': ['border-left-width', 'border-right-width'],
+        'y': ['border-top-width', 'border-bottom-width'], 't': ['border-top-width'],
+        'r': ['border-right-width'], 'b': ['border-bottom-width'], 'l': ['border-left-width'],
+    }[m[1]]
+    return ';'.join(f'{prop}:{width}' for prop in props)
+
+
+def _border_style(m):
+    return f'border-style:{m[1]}'
+
+
+def _border_color(m):
+    return _color_rule('border-color', m[1], '--tw-border-opacity')
+
+
+def _background_color(m):
+    return _color_rule('background-color', m[1], '--tw-bg-opacity')
+
+
+def _opacity_value(m, var):
+    return f'{var}:{int(m[1]) / 100:g}'
+
+
+def _bg_opacity(m):
+    return _opacity_value(m, '--tw-bg-opacity')
+
+
+def _gradient(m):
+    direction = {
+        't': 'top', 'tr': 'top right', 'r': 'right', 'br': 'bottom right',
+        'b': 'bottom', 'bl': 'bottom left', 'l': 'left', 'tl': 'top left',
+    }[m[1]]
+    return f'background-image:linear-gradient(to {direction}, var(--tw-gradient-stops))'
+
+
+def _gradient_from(m):
+    color = _color(m[1])
+    if color is None or not color.startswith('#'):
+        return None
+    return (
+        f'--tw-gradient-from:{color};--tw-gradient-to:rgb({_rgb(color)} / 0);'
+        '--tw-gradient-stops:var(--tw-gradient-from), var(--tw-gradient-to)'
+    )
+
+
+def _gradient_to(m):
+    color = _color(m[1])
+    return color and f'--tw-gradient-to:{color}'
+
+
+def _padding(m):
+    size = _spacing(m[2])
+    if size is None:
+        return None
+    props = {
+        'p': ['padding'], 'px': ['padding-left', 'padding-right'], 'py': ['padding-top', 'padding-bottom'],
+        'pt': ['padding-top'], 'pr': ['padding-right'], 'pb': ['padding-bottom'], 'pl': ['padding-left'],
+    }[m[1]]
+    return ';'.join(f'{prop}:{size}' for prop in props)
+
+
+def _text_align(m):
+    return f'text-align:{m[1]}'
+
+
+def _vertical_align(m):
+    return f'vertical-align:{m[1]}'
+
+
+def _font_family(m):
+    return f'font-family:{SANS if m[1] == "sans" else MONO}'
+
+
+def _font_size(m):
+    size, line_height = FONT_SIZES[m[1]]
+    return f'font-size:{size};line-height:{line_height}'
+
+
+def _font_weight(m):
+    return f'font-weight:{FONT_WEIGHTS[m[1]]}'
+
+
+def _text_transform(m):
+    return f'text-transform:{"none" if m[0] == "normal-case" else m[0]}'
+
+
+def _font_style(m):
+    return 'font-style:italic'
+
+
+def _leading(m):
+    value = LEADING.get(m[1]) or _spacing(m[1])
+    return value and f'line-height:{value}'
+
+
+def _tracking(m):
+    return f'letter-spacing:{TRACKING[m[1]]}'
+
+
+def _text_color(m):
+    return _color_rule('color', m[1], '--tw-text-opacity')
+
+
+def _decoration(m):
+    return f'text-decoration-line:{"none" if m[0] == "no-underline" else m[0]}'
+
+
+def _placeholder_color(m):
+    rule = _color_rule('color', m[1], '--tw-placeholder-opacity')
+    return rule and (rule, '::placeholder')
+
+
+def _opacity(m):
+    return f'opacity:{int(m[1]) / 100:g}'
+
+
+def _mix_blend(m):
+    return f'mix-blend-mode:{m[1]}'
+
+
+def _shadow(m):
+    shadow = SHADOWS.get(m[1] or '')
+    if shadow is None:
+        return None
+    return (
+        f'--tw-shadow:{shadow};'
+        'box-shadow:var(--tw-ring-offset-shadow, 0 0 #0000), var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)'
+    )
+
+
+def _outline_none(m):
+    return 'outline:2px solid transparent;outline-offset:2px'
+
+
+def _ring_width(m):
+    width = f'{m[1] or 3}px'
+    return (
+        '--tw-ring-offset-shadow:0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color);'
+        f'--tw-ring-shadow:0 0 0 calc({width} + var(--tw-ring-offset-width)) var(--tw-ring-color);'
+        'box-shadow:var(--tw-ring-offset-shadow), var(--tw-ring-shadow), var(--tw-shadow, 0 0 #0000)'
+    )
+
+
+def _ring_color(m):
+    return _color_rule('--tw-ring-color', m[1], '--tw-ring-opacity')
+
+
+def _transition(m):
+    props = {
+        None: 'color, background-color, border-color, text-decoration-color, fill, stroke, opacity, '
+              'box-shadow, transform, filter, backdrop-filter',
+        'colors': 'color, background-color, border-color, text-decoration-color, fill, stroke',
+        'opacity': 'opacity',
+        'shadow': 'box-shadow',
+        'transform': 'transform',
+    }[m[1]]
+    return f'transition-property:{props};{TRANSITION}'
+
+
+def _duration(m):
+    return f'transition-duration:{m[1]}ms'
+
+
+RULES = [(re.compile(pattern), handler) for pattern, handler in [
+    (r'container', _container),
+    (r'(static|fixed|absolute|relative|sticky)', _position),
+    (r'(-?)(inset|inset-x|inset-y|top|right|bottom|left)-(.+)', _inset),
+    (r'z-(\d+|auto)', _z_index),
+    (r'col-span-(\d+|full)', _col_span),
+    (r'(-?)(m|mx|my|mt|mr|mb|ml)-(.+)', _margin),
+    (r'block|inline-block|inline|flex|inline-flex|table|grid|contents|hidden', _display),
+    (r'aspect-(square|video|auto)', _aspect),
+    (r'h-(.+)', _height),
+    (r'max-h-(.+)', _max_height),
+    (r'min-h-(.+)', _min_height),
+    (r'w-(.+)', _width),
+    (r'min-w-(.+)', _min_width),
+    (r'max-w-(.+)', _max_width),
+    (r'flex-(1|auto|none)', _flex),
+    (r'(flex-shrink|shrink)(?:-(0))?', _shrink),
+    (r'(flex-grow|grow)(?:-(0))?', _grow),
+    (r'cursor-(default|pointer|not-allowed|wait|move|text)', _cursor),
+    (r'grid-cols-(\d+)', _grid_cols),
+    (r'flex-(row|col)', _flex_direction),
+    (r'flex-wrap', _flex_wrap),
+    (r'items-(start|end|center|baseline|stretch)', _align_items),
+    (r'justify-(start|end|center|between|around|evenly)', _justify),
+    (r'gap-(?:(x|y)-)?(.+)', _gap),
+    (r'space-(x|y)-(.+)', _space),
+    (r'divide-(x|y)(?:-(\d+))?', _divide_width),
+    (r'divide-(.+)', _divide_color),
+    (r'self-(start|end|center|baseline|stretch)', _align_self),
+    (r'overflow(?:-(x|y))?-(auto|hidden|visible|scroll)', _overflow),
+    (r'truncate', _truncate),
+    (r'whitespace-(normal|nowrap|pre|pre-line|pre-wrap)', _whitespace),
+    (r'break-(all|words)', _word_break),
+    (r'rounded(?:-(t|r|b|l))?(?:-(none|sm|md|lg|xl|2xl|full))?', _rounded),
+    (r'border(?:-(x|y|t|r|b|l))?(?:-(\d+))?', _border_width),
+    (r'border-(solid|dashed|dotted|none)', _border_style),
+    (r'border-(.+)', _border_color),
+    (r'bg-(.+)', _background_color),
+    (r'bg-opacity-(\d+)', _bg_opacity),
+    (r'bg-gradient-to-(t|tr|r|br|b|bl|l|tl)', _gradient),
+    (r'from-(.+)', _gradient_from),
+    (r'to-(.+)', _gradient_to),
+    (r'(p|px|py|pt|pr|pb|pl)-(.+)', _padding),
+    (r'text-(left|center|right|justify)', _text_align),
+    (r'align-(top|middle|bottom|baseline)', _vertical_align),
+    (r'font-(sans|mono)', _font_family),
+    (r'text-(xs|sm|base|lg|xl|2xl|3xl|4xl|5xl)', _font_size),
+    (r'font-(light|normal|medium|semibold|bold)', _font_weight),
+    (r'uppercase|lowercase|capitalize|normal-case', _text_transform),
+    (r'italic', _font_style),
+    (r'leading-(.+)', _leading),
+    (r'tracking-(tight|normal|wide|wider|widest)', _tracking),
+    (r'text-(.+)', _text_color),
+    (r'underline|line-through|no-underline', _decoration),
+    (r'placeholder-(.+)', _placeholder_color),
+    (r'opacity-(\d+)', _opacity),
+    (r'mix-blend-(multiply|screen|overlay|normal)', _mix_blend),
+    (r'shadow(?:-(sm|md|lg|xl|none))?', _shadow),
+    (r'outline-none', _outline_none),
+    (r'ring(?:-(\d+))?', _ring_width),
+    (r'ring-(.+)', _ring_color),
+    (r'transition(?:-(colors|opacity|shadow|transform))?', _transition),
+    (r'duration-(\d+)', _duration),
+]]
+
+
+def escape_class(name):
+    return re.sub(r'([^a-zA-Z0-9_-])', r'\\\1', name)
+
+
+def compile_class(name):
+    """
+    Return (screen, order, css) for one class name, or None if it isn't a
+    utility this builder knows. `screen` is None or a SCREENS key.
+    """
+    *variants, utility = name.split(':')
+    screen = None
+    pseudo = ''
+    for variant in variants:
+        if variant in SCREENS and screen is None and not pseudo:
+            screen = variant
+        elif variant in PSEUDO_CLASSES:
+            pseudo += PSEUDO_CLASSES[variant]
+        else:
+            return None
+
+    for order, (pattern, handler) in enumerate(RULES):
+        match = pattern.fullmatch(utility)
+        if not match:
+            continue
+        result = handler(match)
+        if result is None:
+            continue
+        declarations, suffix = result if isinstance(result, tuple) else (result, '')
+        css = f'.{escape_class(name)}{pseudo}{suffix}{{{declarations}}}\n'
+        if handler is _container:
+            if screen or pseudo:
+                return None
+            # Like Tailwind, the breakpoint widths follow .container so max-w-* utilities override them
+            css += ''.join(
+                f'@media (min-width:{width}){{.container{{max-width:{width}}}}}\n' for width in SCREENS.values()
+            )
+        return screen, (_pseudo_rank(variants), order, name), css
+    return None
+
+
+def _pseudo_rank(variants):
+    ranks = [list(PSEUDO_CLASSES).index(variant) + 1 for variant in variants if variant in PSEUDO_CLASSES]
+    return max(ranks, default=0)
+
+
+def _looks_like_utility(name):
+    *variants, utility = name.split(':')
+    if variants:
+        return all(variant in SCREENS or variant in PSEUDO_CLASSES for variant in variants)
+    return COLOR_UTILITY_RE.fullmatch(utility) is not None
+
+
+def find_classes(text):
+    return set(CANDIDATE_RE.findall(text))
+
+
+def source_files(base_dir=None):
+    base_dir = Path(base_dir or settings.BASE_DIR)
+    this_file = Path(__file__).resolve()
+    for pattern in CSS_SOURCES:
+        for path in sorted(base_dir.glob(pattern)):
+            if path.resolve() != this_file and not any(path.match(name) for name in CSS_EXCLUDE):
+                yield path
+
+
+def build_stylesheet(texts):
+    """
+    Compile the utilities used in `texts` into a stylesheet.
+
+    Returns (css, unknown) where `unknown` is the set of utility-looking
+    classes (variant-prefixed, like ``hover:bg-pink-50``, or palette colours,
+    like ``bg-pink-50``) that couldn't be compiled.
+    """
+    candidates = set()
+    for text in texts:
+        candidates |= find_classes(text)
+
+    base = []
+    screens = {screen: [] for screen in SCREENS}
+    unknown = set()
+    for name in candidates:
+        compiled = compile_class(name)
+        if compiled is None:
+            if _looks_like_utility(name):
+                unknown.add(name)
+            continue
+        screen, key, css = compiled
+        (screens[screen] if screen else base).append((key, css))
+
+    parts = [PREFLIGHT]
+    parts.extend(css for _, css in sorted(base))
+    for screen, rules in screens.items():
+        if rules:
+            body = ''.join(css for _, css in sorted(rules))
+            parts.append(f'@media (min-width:{SCREENS[screen]}){{\n{body}}}\n')
+    return ''.join(parts), unknown
@@ -0,0 +1,277 @@
+"""
+Per-view latency benchmarks.
+
+Seeds a throw-away test database at several dataset sizes with
+generate_dataset, logs in as an HR user, a manager and an employee, and times
+every URL in the HR and employee portals with the Django test client.
+Results (p50/p95 latency, template render time and query counts) are
+returned as plain dicts so they can be dumped to JSON and compared between
+runs; pass fragment_cache=False to measure rendering without the cached
+navbar fragments.
+"""
+
+import logging
+import statistics
+import time
+from contextlib import contextmanager
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import NoReverseMatch, URLPattern, reverse
+
+from apps.core import profiling
+from apps.employees.models import (
+    AttendanceCorrection, Department, Employee, LeaveRequest, Notification, Payslip,
+)
+from apps.hr import charts
+from apps.hr.models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_URLCONFS = ['apps.hr.urls', 'apps.employees.urls']
+
+ROLES = ['hr', 'manager', 'employee']
+
+
+def _object_kwargs(model, **filters):
+    def resolve(user):
+        obj = model.objects.filter(**filters).order_by('pk').first()
+        return {'pk': obj.pk} if obj else None
+    return resolve
+
+
+def _own_notification(user):
+    obj = Notification.objects.filter(recipient__user=user).order_by('pk').first()
+    return {'pk': obj.pk} if obj else None
+
+
+def _own_payslip(user):
+    obj = Payslip.objects.filter(employee__user=user).order_by('pk').first()
+    return {'pk': obj.pk} if obj else None
+
+
+def _own_report_job(**filters):
+    def resolve(user):
+        obj = ReportJob.objects.filter(requested_by=user, **filters).order_by('pk').first()
+        return {'pk': obj.pk} if obj else None
+    return resolve
+
+
+def _first_chart(user):
+    chart = next(iter(charts.CHARTS), None)
+    return {'chart': chart} if chart else None
+
+
+def _latest_profile(user):
+    profiles = profiling.list_profiles(limit=1)
+    return {'profile_id': profiles[0]['id']} if profiles else None
+
+
+# How to fill in the URL kwargs of parameterised routes
+URL_KWARGS = {
+    'hr:employee_update': _object_kwargs(Employee),
+    'hr:employee_delete': _object_kwargs(Employee),
+    'hr:employee_detail': _object_kwargs(Employee),
+    'hr:leave_review': _object_kwargs(LeaveRequest),
+    'hr:approve_leave': _object_kwargs(LeaveRequest),
+    'hr:reject_leave': _object_kwargs(LeaveRequest),
+    'hr:department_update': _object_kwargs(Department),
+    'hr:department_delete': _object_kwargs(Department),
+    'hr:approve_correction': _object_kwargs(AttendanceCorrection),
+    'hr:reject_correction': _object_kwargs(AttendanceCorrection),
+    'employees:mark_notification_read': _own_notification,
+    'employees:payslip_detail': _own_payslip,
+    'employees:payslip_download': _own_payslip,
+    'hr:report_chart': _first_chart,
+    'hr:report_job': _own_report_job(),
+    'hr:report_job_csv': _own_report_job(status=ReportJob.Status.DONE),
+    'hr:profile_detail': _latest_profile,
+}
+
+
+def benchmark_urls():
+    """Yield the namespaced name of every named route in the benchmarked urlconfs."""
+    from importlib import import_module
+
+    for urlconf in BENCHMARK_URLCONFS:
+        module = import_module(urlconf)
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield f'{module.app_name}:{pattern.name}'
+
+
+def benchmark_path(url_name, user):
+    """
+    Reverse `url_name` for `user`, filling in kwargs from URL_KWARGS.
+
+    Returns None when the route can't be benchmarked: there is no object to
+    point it at, or it takes kwargs that URL_KWARGS doesn't know how to fill.
+    """
+    resolve_kwargs = URL_KWARGS.get(url_name)
+    kwargs = resolve_kwargs(user) if resolve_kwargs else None
+    if resolve_kwargs and kwargs is None:
+        return None
+    try:
+        return reverse(url_name, kwargs=kwargs)
+    except NoReverseMatch:
+        logger.warning('Skipping %s: no URL_KWARGS resolver for its parameters', url_name)
+        return None
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def benchmark_users():
+    """Pick one active user per role from the generated dataset."""
+    users = {}
+    for role in ROLES:
+        employee = Employee.objects.select_related('user').filter(
+            user__role=role, status=Employee.Status.ACTIVE
+        ).order_by('pk').first()
+        if employee:
+            users[role] = employee.user
+    return users
+
+
+@contextmanager
+def render_timer():
+    """
+    Time template rendering while active.
+
+    Yields a list that gets the milliseconds spent in each top-level
+    Template.render call; included templates count towards their parent.
+    """
+    timings = []
+    original = Template.render
+    depth = 0
+
+    def render(self, context):
+        nonlocal depth
+        if depth:
+            return original(self, context)
+        depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            depth -= 1
+            timings.append((time.perf_counter() - started) * 1000)
+
+    Template.render = render
+    try:
+        yield timings
+    finally:
+        Template.render = original
+
+
+def time_url(client, path, repeat):
+    """Request `path` `repeat` times (after one warm-up) and return timing stats."""
+    client.get(path)
+    timings = []
+    render_timings = []
+    queries = []
+    status = None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx, render_timer() as rendered:
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+        render_timings.append(sum(rendered))
+        queries.append(len(ctx.captured_queries))
+        status = response.status_code
+    return {
+        'status': status,
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+        'render_p50_ms': round(statistics.median(render_timings), 2),
+        'queries': max(queries),
+    }
+
+
+def benchmark_dataset(size, repeat=5, roles=ROLES, url_names=None, fragment_cache=True):
+    """Time every benchmark URL for each role against the current database."""
+    results = []
+    users = benchmark_users()
+    # 403/500 responses are recorded in the results; don't log a line or traceback for each
+    quiet_loggers = [logging.getLogger(name) for name in ('django.request', 'apps.core.requests')]
+    previous_levels = [logger.level for logger in quiet_loggers]
+    for logger in quiet_loggers:
+        logger.setLevel(logging.CRITICAL)
+    # The warm-up request in time_url fills the fragment cache, so timed requests hit it
+    fragment_settings = {} if fragment_cache else {'FRAGMENT_CACHE_SECONDS': 0}
+    try:
+        with override_settings(**fragment_settings):
+            _benchmark_roles(results, users, size, repeat, roles, url_names)
+    finally:
+        for logger, level in zip(quiet_loggers, previous_levels):
+            logger.setLevel(level)
+    return results
+
+
+def _benchmark_roles(results, users, size, repeat, roles, url_names):
+    for role in roles:
+        user = users.get(role)
+        if user is None:
+            continue
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        for url_name in url_names or benchmark_urls():
+            path = benchmark_path(url_name, user)
+            if path is None:
+                continue
+            stats = time_url(client, path, repeat)
+            results.append({'size': size, 'role': role, 'url_name': url_name, 'path': path, **stats})
+
+
+def run_benchmarks(sizes, days=90, repeat=5, seed=42, roles=ROLES, url_names=None,
+                   fragment_cache=True, create_test_db=True, log=None):
+    """
+    Seed a database at each size and benchmark every URL.
+
+    With `create_test_db` (the default) a separate test database is created
+    and destroyed around the run, so the configured database is never touched.
+    Pass False when already running inside a test database.
+    """
+    log = log or (lambda message: None)
+    old_name = None
+    if create_test_db:
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    results = []
+    try:
+        for size in sizes:
+            log(f'Seeding {size} employees x {days} days...')
+            call_command('flush', interactive=False, verbosity=0)
+            call_command('generate_dataset', employees=size, days=days, seed=seed, stdout=StringIO())
+            log(f'Timing views at size {size}...')
+            results.extend(benchmark_dataset(
+                size, repeat=repeat, roles=roles, url_names=url_names, fragment_cache=fragment_cache,
+            ))
+    finally:
+        if create_test_db:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'database': connection.vendor,
+        'sizes': list(sizes),
+        'days': days,
+        'repeat': repeat,
+        'seed': seed,
+        'fragment_cache': fragment_cache,
+        'results': results,
+    }
@@ -0,0 +1,253 @@
+"""
+Two-tier cache with versioned namespaces.
+
+L1 is a per-process LocMemCache (the 'local' cache); L2 is the shared
+'default' cache, which every gunicorn worker and instance reads. Lookups
+check L1, then L2 (filling L1 on a hit); writes go to both. L1 entries live
+at most CACHE_L1_SECONDS, which bounds how long one worker can serve a value
+another worker has already replaced or deleted.
+
+A namespace groups keys that are invalidated together. Its version number
+is an IdSequence row, which the cache never culls and which bump()
+increments under a row lock; keys are built as ``<namespace>:v<n>:<key>``
+(e.g. ``hr-metrics:v12:...``), so bump() orphans every key in the namespace
+for all workers at once. invalidate_on() bumps a namespace after commit whenever
+one of the given models is saved or deleted; bulk writes that bypass
+signals should call invalidate_models() themselves.
+
+A key can also depend on several namespaces, such as the per-table data
+versions from table_namespace(), in which case it changes when any of them
+is bumped.
+
+Lookups through cached() and cached_view() are counted in the
+hrms_cache_requests_total metric under the namespace name.
+"""
+
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+
+from . import metrics
+from .models import IdSequence
+from .services import reserve_id
+
+_MISSING = object()
+
+
+class TieredCache:
+    """Read-through L1 (process memory) in front of L2 (shared) cache."""
+
+    def __init__(self, local='local', shared='default'):
+        self.local_alias = local
+        self.shared_alias = shared
+
+    @property
+    def local(self):
+        return caches[self.local_alias]
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _l1_timeout(self, timeout):
+        l1 = settings.CACHE_L1_SECONDS
+        return l1 if timeout is None else min(timeout, l1)
+
+    def get(self, key, default=None):
+        value = self.local.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.shared.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self.local.set(key, value, self._l1_timeout(None))
+        return value
+
+    def set(self, key, value, timeout=300):
+        self.shared.set(key, value, timeout)
+        self.local.set(key, value, self._l1_timeout(timeout))
+
+    def delete(self, key):
+        self.shared.delete(key)
+        self.local.delete(key)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        self.shared.delete_many(keys)
+        self.local.delete_many(keys)
+
+    def get_or_set(self, key, func, timeout=300, metric=None):
+        """Return the cached value for `key`, computing and storing func() on a miss."""
+        value = self.get(key, _MISSING)
+        if metric:
+            metrics.record_cache(metric, value is not _MISSING)
+        if value is _MISSING:
+            value = func()
+            self.set(key, value, timeout)
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+
+
+tiered = TieredCache()
+
+
+# Namespaces
+
+def _version_key(namespace):
+    key = f'cache-ns:{namespace}'
+    max_length = IdSequence._meta.get_field('name').max_length
+    return key if len(key) <= max_length else f'cache-ns:{hashlib.md5(namespace.encode()).hexdigest()}'
+
+
+def namespace_versions(namespaces):
+    """Current versions of `namespaces` (read from the database at most every CACHE_L1_SECONDS per process)."""
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = tiered.local.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        found = dict.fromkeys(missing, 0)
+        found.update(IdSequence.objects.filter(name__in=missing).values_list('name', 'last_value'))
+        tiered.local.set_many(found, settings.CACHE_L1_SECONDS)
+        versions.update(found)
+    return [versions[key] for key in keys]
+
+
+def namespace_version(namespace):
+    return namespace_versions([namespace])[0]
+
+
+def namespace_key(namespaces, key):
+    """Versioned key for `key` in one namespace or a list of them."""
+    if isinstance(namespaces, str):
+        namespaces = [namespaces]
+    versions = namespace_versions(namespaces)
+    prefix = ':'.join(f'{namespace}:v{version}' for namespace, version in zip(namespaces, versions))
+    return f'{prefix}:{key}'
+
+
+def bump(namespace):
+    """Invalidate every key in `namespace` for all processes."""
+    key = _version_key(namespace)
+    reserve_id(key)
+    tiered.local.delete(key)
+
+
+def bump_all(namespaces):
+    for namespace in namespaces:
+        bump(namespace)
+
+
+_model_namespaces = {}
+
+
+def invalidate_on(namespace, *models):
+    """Bump `namespace` after commit whenever one of `models` is saved or deleted."""
+    def handler(sender, **kwargs):
+        transaction.on_commit(functools.partial(bump, namespace))
+
+    for model in models:
+        _model_namespaces.setdefault(model, set()).add(namespace)
+        uid = f'cache-ns:{namespace}:{model._meta.label}'
+        post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+        post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+def invalidate_models(*models):
+    """Bump every namespace registered for `models`, for writes that don't send signals (bulk_create, update())."""
+    namespaces = set()
+    for model in models:
+        namespaces |= _model_namespaces.get(model, set())
+    transaction.on_commit(functools.partial(bump_all, sorted(namespaces)))
+
+
+def table_namespace(model):
+    """Namespace holding the data version of `model`'s table; see track_tables()."""
+    return f'table:{model._meta.db_table}'
+
+
+def track_tables(*models):
+    """Keep a data version for each model's table, bumped on every save or delete."""
+    for model in models:
+        invalidate_on(table_namespace(model), model)
+
+
+# Decorators
+
+def _hash(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def cached(namespace, timeout=300, metric=None):
+    """
+    Cache a function's result in `namespace` (or a list of namespaces), keyed
+    by its arguments.
+
+    Arguments must have a stable repr() (ids, dates, strings rather than
+    model instances). Lookups are counted under `metric`, by default the
+    namespace. The wrapped function gets an ``invalidate()`` that bumps the
+    namespace(s), and a ``peek()`` that returns the cached result for the
+    given arguments, or None, without calling the function.
+    """
+    namespaces = [namespace] if isinstance(namespace, str) else list(namespace)
+    metric = metric or '+'.join(namespaces)
+
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        def make_key(args, kwargs):
+            return namespace_key(namespaces, f'{name}:{_hash(args, sorted(kwargs.items()))}')
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return tiered.get_or_set(make_key(args, kwargs), lambda: func(*args, **kwargs), timeout, metric=metric)
+
+        wrapper.invalidate = functools.partial(bump_all, namespaces)
+        wrapper.peek = lambda *args, **kwargs: tiered.get(make_key(args, kwargs))
+        return wrapper
+    return decorator
+
+
+def cached_view(namespace, timeout=300, per_session=True):
+    """
+    Cache successful GET responses of a view in `namespace`, keyed by full path.
+
+    With `per_session` (the default) each session gets its own copy, so
+    pages with user-specific content or CSRF tokens are safe to cache.
+    Requests with pending flash messages are never served from or stored in
+    the cache. Use with method_decorator for class-based views.
+    """
+    def decorator(view):
+        name = f'{view.__module__}.{view.__qualname__}'
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            storage = getattr(request, '_messages', None)
+            if request.method not in ('GET', 'HEAD') or (storage is not None and len(storage)):
+                return view(request, *args, **kwargs)
+
+            session = request.session.session_key if per_session and hasattr(request, 'session') else None
+            key = namespace_key(namespace, f'view:{name}:{_hash(request.get_full_path(), session)}')
+            entry = tiered.get(key)
+            metrics.record_cache(namespace, entry is not None)
+            if entry is not None:
+                content, status, headers = entry
+                response = HttpResponse(content, status=status)
+                for header, value in headers:
+                    response[header] = value
+                return response
+
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                tiered.set(key, (response.content, response.status_code, list(response.items())), timeout)
+            return response
+        return wrapper
+    return decorator
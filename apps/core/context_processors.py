@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Timeout for the cached navbar fragments (0 renders them on every request)."""
+    return {'fragment_cache_seconds': settings.FRAGMENT_CACHE_SECONDS}
@@ -0,0 +1,190 @@
+"""
+Mail transports.
+
+Outgoing email is handed to the transport named by settings.EMAIL_TRANSPORT
+as a SendGrid v3 "mail/send" payload: one subject and HTML body with a list
+of personalizations, each a recipient plus the substitutions to apply to
+the body for them. That lets a burst of emails sharing a template go out
+as one request per MAX_PERSONALIZATIONS recipients.
+
+- ``sendgrid``: the SendGrid HTTP API over one kept-alive HTTPS connection
+  per thread, so consecutive sends skip the TCP and TLS handshakes.
+- ``locmem``: payloads are appended to ``outbox`` (for tests).
+- ``file``: each payload is written as JSON to EMAIL_FILE_PATH (offline use).
+"""
+
+import http.client
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# SendGrid accepts at most 1000 personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+outbox = []
+
+
+@dataclass
+class Recipient:
+    """One personalization: an address and the body substitutions for it."""
+
+    email: str
+    substitutions: dict = field(default_factory=dict)
+
+
+def build_payload(from_email, subject, html, recipients):
+    personalizations = []
+    for recipient in recipients:
+        personalization = {'to': [{'email': recipient.email}]}
+        if recipient.substitutions:
+            personalization['substitutions'] = {key: str(value) for key, value in recipient.substitutions.items()}
+        personalizations.append(personalization)
+    return {
+        'personalizations': personalizations,
+        'from': {'email': from_email},
+        'subject': subject,
+        'content': [{'type': 'text/html', 'value': html}],
+    }
+
+
+class BaseTransport:
+    """Sends payloads; subclasses implement post()."""
+
+    def send(self, from_email, subject, html, recipients):
+        """Send to every recipient, in chunks of MAX_PERSONALIZATIONS. Returns how many were accepted."""
+        accepted = 0
+        for start in range(0, len(recipients), MAX_PERSONALIZATIONS):
+            chunk = recipients[start:start + MAX_PERSONALIZATIONS]
+            if self.post(build_payload(from_email, subject, html, chunk)):
+                accepted += len(chunk)
+        return accepted
+
+    def post(self, payload):
+        """Deliver one payload; return True if it was accepted."""
+        raise NotImplementedError
+
+
+class LocmemTransport(BaseTransport):
+    def post(self, payload):
+        outbox.append(payload)
+        return True
+
+
+class FileTransport(BaseTransport):
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def post(self, payload):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f'{uuid.uuid4().hex}.json').write_text(json.dumps(payload, indent=2))
+        return True
+
+
+class SendGridTransport(BaseTransport):
+    """SendGrid v3 API client that reuses its HTTPS connection (one per thread)."""
+
+    host = 'api.sendgrid.com'
+    path = '/v3/mail/send'
+
+    def __init__(self, api_key, timeout=10):
+        self.api_key = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def post(self, payload):
+        body = json.dumps(payload)
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+        }
+        # A kept-alive connection may have been closed by the server; retry once on a fresh
+        # one, but only while sending. Once the request is written SendGrid may have accepted
+        # it, and retrying could deliver the whole batch twice.
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.request('POST', self.path, body=body, headers=headers)
+                break
+            except (http.client.HTTPException, OSError):
+                self._close()
+                if attempt:
+                    raise
+        try:
+            response = conn.getresponse()
+            detail = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            self._close()
+            logger.error(f"SendGrid send failed after the request was sent, not retrying: {e!r}")
+            return False
+        if response.will_close:
+            self._close()
+        if response.status not in (200, 201, 202):
+            logger.warning(f"SendGrid rejected a send (status {response.status}): {detail[:500]!r}")
+            return False
+        return True
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    The configured transport, shared by every caller in the process.
+
+    Returns None when the SendGrid transport is selected but SENDGRID_API_KEY
+    is not set.
+    """
+    name = getattr(settings, 'EMAIL_TRANSPORT', 'sendgrid')
+    if name == 'locmem':
+        key = (name,)
+    elif name == 'file':
+        key = (name, str(settings.EMAIL_FILE_PATH))
+    elif name == 'sendgrid':
+        api_key = os.environ.get('SENDGRID_API_KEY')
+        if not api_key:
+            return None
+        key = (name, api_key)
+    else:
+        raise ValueError(f'Unknown EMAIL_TRANSPORT {name!r}')
+
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            if name == 'locmem':
+                transport = LocmemTransport()
+            elif name == 'file':
+                transport = FileTransport(settings.EMAIL_FILE_PATH)
+            else:
+                transport = SendGridTransport(key[1])
+            _transports[key] = transport
+    return transport
+
+
+@receiver(setting_changed)
+def _reset_transports(setting, **kwargs):
+    if setting in ('EMAIL_TRANSPORT', 'EMAIL_FILE_PATH'):
+        with _transports_lock:
+            _transports.clear()
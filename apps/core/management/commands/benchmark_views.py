@@ -0,0 +1,55 @@
+"""
+Management command to benchmark per-view latency at several dataset sizes.
+"""
+
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.benchmarks import ROLES, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Time every HR and employee portal URL at several dataset sizes and report p50/p95 latency as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help='Comma-separated employee counts')
+        parser.add_argument('--days', type=int, default=90, help='Days of history per dataset')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per URL')
+        parser.add_argument('--seed', type=int, default=42, help='Dataset RNG seed')
+        parser.add_argument('--roles', default=','.join(ROLES), help='Comma-separated roles to log in as')
+        parser.add_argument('--url', action='append', dest='url_names',
+                            help='Only benchmark this URL name (e.g. hr:reports); may be repeated')
+        parser.add_argument('--no-fragment-cache', action='store_false', dest='fragment_cache',
+                            help='Render the navbar fragments on every request (the "before" numbers)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+        
+        report = run_benchmarks(
+            sizes,
+            days=options['days'],
+            repeat=options['repeat'],
+            seed=options['seed'],
+            roles=[role for role in options['roles'].split(',') if role],
+            url_names=options['url_names'],
+            fragment_cache=options['fragment_cache'],
+            log=lambda message: self.stderr.write(message),
+        )
+        
+        for row in report['results']:
+            self.stderr.write(
+                f"{row['size']:>7} {row['role']:<9} {row['url_name']:<40} {row['status']} "
+                f"p50={row['p50_ms']:>8.2f}ms p95={row['p95_ms']:>8.2f}ms render={row['render_p50_ms']:>7.2f}ms "
+                f"queries={row['queries']}"
+            )
+        
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
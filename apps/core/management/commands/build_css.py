@@ -0,0 +1,45 @@
+"""
+Management command to compile the Tailwind utilities used in templates into static/css/app.css.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.assets import STYLESHEET, build_stylesheet, source_files
+
+HEADER = '/* Generated by `python manage.py build_css` from the classes used in templates/ and apps/. Do not edit. */\n'
+
+
+class Command(BaseCommand):
+    help = 'Write a stylesheet containing only the Tailwind utilities the templates use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Exit with an error if the stylesheet is out of date instead of writing it')
+
+    def handle(self, *args, **options):
+        files = list(source_files())
+        css, unknown = build_stylesheet(path.read_text(encoding='utf-8') for path in files)
+        css = HEADER + css
+        path = Path(settings.STATICFILES_DIRS[0]) / STYLESHEET
+
+        for name in sorted(unknown):
+            self.stderr.write(self.style.WARNING(f'Unknown utility class: {name}'))
+
+        current = path.read_text(encoding='utf-8') if path.exists() else None
+        if options['check']:
+            if unknown:
+                raise CommandError(f'{len(unknown)} utility classes could not be compiled; add them to apps/core/assets.py')
+            if current != css:
+                raise CommandError(f'{path} is out of date; run python manage.py build_css')
+            self.stdout.write(self.style.SUCCESS(f'{path} is up to date'))
+            return
+
+        if current != css:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(css, encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {path} ({len(css.encode()) / 1024:.1f} KiB from {len(files)} files)'
+        ))
@@ -0,0 +1,53 @@
+"""
+Management command to download the pinned third-party scripts into static/vendor/.
+
+Each download is checked against the SHA-384 digest pinned in VENDOR_ASSETS
+before anything is written; a mismatch fails the command, and an asset with
+no pinned digest is skipped with a warning.
+"""
+
+import re
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.assets import VENDOR_ASSETS, integrity
+
+# Source maps aren't vendored; a dangling reference would make collectstatic's manifest step fail
+SOURCE_MAP_RE = re.compile(rb'\n?//# sourceMappingURL=\S+\s*$')
+
+
+class Command(BaseCommand):
+    help = 'Download the pinned front-end libraries (htmx, Chart.js) into static/vendor/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download files that already exist again')
+        parser.add_argument('--timeout', type=int, default=30, help='Seconds to wait for each download')
+
+    def handle(self, *args, **options):
+        static_dir = Path(settings.STATICFILES_DIRS[0])
+        for name, (url, expected) in VENDOR_ASSETS.items():
+            path = static_dir / name
+            if path.exists() and not options['force']:
+                self.stdout.write(f'{name} already present')
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=options['timeout']) as response:
+                    content = response.read()
+            except OSError as exc:
+                raise CommandError(f'Could not download {url}: {exc}')
+            actual = integrity(content)
+            if expected is None:
+                # Not written, so pages keep loading it from the pinned URL (see vendor_script)
+                self.stderr.write(self.style.WARNING(
+                    f'Skipping {name}: no integrity pinned. Downloaded {url} with digest {actual}; '
+                    'verify it against the upstream release and pin it in VENDOR_ASSETS.'
+                ))
+                continue
+            if actual != expected:
+                raise CommandError(f'Integrity mismatch for {url}: expected {expected}, got {actual}')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(SOURCE_MAP_RE.sub(b'\n', content))
+            self.stdout.write(self.style.SUCCESS(f'Downloaded {name} ({len(content) / 1024:.0f} KiB)'))
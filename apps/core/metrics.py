@@ -0,0 +1,243 @@
+"""
+In-process metrics registry.
+
+Counters and histograms are kept in memory per process and rendered in the
+Prometheus text format by the /metrics/ endpoint. Under gunicorn each worker
+has its own registry, so when METRICS_DIR is set every process periodically
+writes a snapshot file there and the endpoint sums the snapshots of all
+workers (the same idea as prometheus_client's multiprocess mode).
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# Latency buckets in seconds, from 5ms to 10s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        _mark_dirty()
+
+    def snapshot(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+    def merge(self, values, samples):
+        for key, value in samples:
+            key = tuple(key)
+            values[key] = values.get(key, 0) + value
+
+    def render(self, values):
+        lines = []
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, key)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with _lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.values[key] = (counts, total + value)
+        _mark_dirty()
+
+    def snapshot(self):
+        return [[list(key), counts, total] for key, (counts, total) in self.values.items()]
+
+    def merge(self, values, samples):
+        for key, counts, total in samples:
+            key = tuple(key)
+            merged, merged_total = values.get(key) or ([0] * len(counts), 0.0)
+            values[key] = ([a + b for a, b in zip(merged, counts)], merged_total + total)
+
+    def render(self, values):
+        lines = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                labels = _labels(self.labelnames + ('le',), key + (le,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_lock = threading.Lock()
+_dirty = False
+_last_flush = 0.0
+REGISTRY = {}
+
+
+def _register(metric):
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+def _mark_dirty():
+    global _dirty
+    _dirty = True
+
+
+REQUEST_LATENCY = _register(Histogram(
+    'hrms_request_duration_seconds', 'Request latency by URL name.', ['view', 'method'],
+))
+REQUEST_DB_TIME = _register(Histogram(
+    'hrms_request_db_seconds', 'Time spent in the database per request, by URL name.', ['view'],
+))
+REQUESTS = _register(Counter(
+    'hrms_requests_total', 'Requests by URL name and status code.', ['view', 'method', 'status'],
+))
+CACHE_REQUESTS = _register(Counter(
+    'hrms_cache_requests_total', 'Cache lookups by cache and result (hit or miss).', ['cache', 'result'],
+))
+EMAILS = _register(Counter(
+    'hrms_emails_total', 'Email send attempts by outcome (sent, failed, skipped, error).', ['outcome'],
+))
+EMAIL_LATENCY = _register(Histogram(
+    'hrms_email_send_duration_seconds', 'Time taken to hand an email to the provider.', [],
+))
+
+
+def record_request(view, method, status, duration, db_duration):
+    REQUEST_LATENCY.observe(duration, view=view, method=method)
+    REQUEST_DB_TIME.observe(db_duration, view=view)
+    REQUESTS.inc(view=view, method=method, status=status)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def record_email(outcome, duration, count=1):
+    EMAILS.inc(count, outcome=outcome)
+    EMAIL_LATENCY.observe(duration)
+
+
+# Multi-process aggregation
+
+def metrics_dir():
+    directory = getattr(settings, 'METRICS_DIR', '')
+    return Path(directory) if directory else None
+
+
+def flush(force=False):
+    """Write this process's snapshot to METRICS_DIR (at most every METRICS_FLUSH_INTERVAL seconds)."""
+    global _dirty, _last_flush
+    directory = metrics_dir()
+    if directory is None or not _dirty:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+        return
+
+    with _lock:
+        snapshot = {name: metric.snapshot() for name, metric in REGISTRY.items()}
+        _dirty = False
+        _last_flush = now
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'metrics-{os.getpid()}.json'
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(snapshot))
+    os.replace(tmp, path)
+
+
+atexit.register(lambda: flush(force=True))
+
+
+def collect():
+    """Return {metric name: merged values} across all worker snapshots (or just this process)."""
+    directory = metrics_dir()
+    if directory is None:
+        with _lock:
+            return {name: {k: _copy(v) for k, v in metric.values.items()} for name, metric in REGISTRY.items()}
+
+    flush(force=True)
+    merged = {name: {} for name in REGISTRY}
+    for path in directory.glob('metrics-*.json'):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, samples in snapshot.items():
+            if name in REGISTRY:
+                REGISTRY[name].merge(merged[name], samples)
+    return merged
+
+
+def _copy(value):
+    if isinstance(value, tuple):
+        return (list(value[0]), value[1])
+    return value
+
+
+def render_prometheus():
+    """Render every metric in the Prometheus text exposition format."""
+    values = collect()
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        lines.extend(metric.render(values[name]))
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Clear every metric in this process (used by tests)."""
+    global _dirty
+    with _lock:
+        for metric in REGISTRY.values():
+            metric.values.clear()
+        _dirty = False
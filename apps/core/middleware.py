@@ -0,0 +1,198 @@
+"""
+Request instrumentation middleware.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics, profiling
+
+logger = logging.getLogger('apps.core.requests')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint_sql(sql):
+    """Normalize a SQL statement so queries differing only in values share a fingerprint."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """
+    Database execute wrapper that counts queries and time for one request.
+
+    Statements are only counted while the request runs; fingerprinting is
+    deferred to repeated_fingerprints() so the per-query overhead stays small.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            try:
+                self.executions[(sql, repr(params))] += 1
+            except Exception:
+                pass
+
+    @property
+    def duplicates(self):
+        """Number of executions repeating an earlier identical statement and parameters."""
+        return sum(n - 1 for n in self.executions.values() if n > 1)
+
+    def repeated_fingerprints(self, threshold):
+        """Fingerprints executed at least `threshold` times (likely N+1 patterns)."""
+        fingerprints = Counter()
+        for sql, n in self.statements.items():
+            fingerprints[fingerprint_sql(sql)] += n
+        return [(fp, n) for fp, n in fingerprints.most_common() if n >= threshold]
+
+
+class DBTimer:
+    """Database execute wrapper that only sums query time."""
+
+    def __init__(self):
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """
+    Record latency, DB time and status of every request in the metrics
+    registry (apps.core.metrics), labelled by URL name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        timer = DBTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        metrics.record_request(view, request.method, response.status_code, duration, timer.duration)
+        metrics.flush()
+        return response
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count queries, DB time and duplicate SQL per request.
+
+    Sampled requests get a Server-Timing header and a structured log line;
+    likely N+1 patterns (the same statement fingerprint run many times) are
+    logged as warnings. Controlled by QUERY_INSTRUMENTATION_SAMPLE_RATE
+    (0 disables it) and QUERY_N_PLUS_ONE_THRESHOLD.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, 'QUERY_INSTRUMENTATION_SAMPLE_RATE', 0)
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        request.query_stats = stats
+        started = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        db_ms = stats.duration * 1000
+        total_ms = total * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", '
+            f'app;dur={max(total_ms - db_ms, 0):.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+
+        threshold = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 10)
+        repeated = stats.repeated_fingerprints(threshold)
+        match = getattr(request, 'resolver_match', None)
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(db_ms, 1),
+            'queries': stats.count,
+            'duplicates': stats.duplicates,
+            'n_plus_one': len(repeated),
+        }))
+        for fp, n in repeated:
+            logger.warning(json.dumps({
+                'event': 'n_plus_one',
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'count': n,
+                'sql': fp[:500],
+            }))
+
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile a single request on demand.
+
+    Only runs for admin users who pass a profiling token signed for their own
+    account (see apps.core.profiling); every other request goes straight
+    through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = profiling.requested_token(request)
+        user = getattr(request, 'user', None)
+        if (
+            token
+            and user is not None
+            and user.is_authenticated
+            and user.role == 'admin'
+            and profiling.token_user_id(token) == str(user.pk)
+        ):
+            return profiling.profile_request(self.get_response, request)
+        return self.get_response(request)
@@ -19,6 +19,18 @@ class HRRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
         return super().handle_no_permission()
 
 
+class AdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+    """Mixin that requires user to be Admin - for diagnostics such as request profiles."""
+    
+    def test_func(self):
+        return self.request.user.role == 'admin'
+    
+    def handle_no_permission(self):
+        if self.request.user.is_authenticated:
+            raise PermissionDenied("You don't have permission to access this page.")
+        return super().handle_no_permission()
+
+
 class ManagerRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     """Mixin that requires user to be Manager, HR, or Admin - for leave requests and reports."""
     
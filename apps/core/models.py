@@ -1,3 +1,15 @@
 from django.db import models
 
-# Create your models here.
+
+class IdSequence(models.Model):
+    """
+    Named counter used to hand out unique, gap-tolerant identifiers.
+    Rows are locked with select_for_update while a block is reserved.
+    """
+    
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.last_value})"
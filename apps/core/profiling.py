@@ -0,0 +1,160 @@
+"""
+On-demand request profiling.
+
+An admin requests a page with ``?_profile=<token>`` (or the ``X-Profile``
+header) where the token is signed for their own account. The middleware then
+runs cProfile around the view and template render, records a timeline of the
+SQL it executed, and stores the result as JSON in PROFILE_DIR, where the HR
+settings "Profiles" page lists it.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+
+PROFILE_SALT = 'apps.core.profiling'
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILE_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def make_token(user):
+    """Signed token that enables profiling for `user`'s requests."""
+    return signing.TimestampSigner(salt=PROFILE_SALT).sign(str(user.pk))
+
+
+def token_user_id(token):
+    """Return the user pk a token was issued for, or None if it is invalid or expired."""
+    max_age = getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 60 * 60 * 24)
+    try:
+        return signing.TimestampSigner(salt=PROFILE_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return None
+
+
+def requested_token(request):
+    return request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+
+
+class SQLTimeline:
+    """Database execute wrapper recording when each statement ran and how long it took."""
+
+    def __init__(self, started):
+        self.started = started
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.entries.append({
+                'start_ms': round((start - self.started) * 1000, 2),
+                'duration_ms': round((end - start) * 1000, 2),
+                'sql': sql[:2000],
+                'many': many,
+            })
+
+
+def top_functions(profiler, limit=40):
+    """Summarise a cProfile run as the `limit` functions with the highest cumulative time."""
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    base = str(settings.BASE_DIR) + os.sep
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.items():
+        rows.append({
+            'function': name,
+            'file': filename.replace(base, ''),
+            'line': line,
+            'calls': ncalls,
+            'own_ms': round(tottime * 1000, 2),
+            'cumulative_ms': round(cumtime * 1000, 2),
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+def save_profile(data):
+    """Write a profile to PROFILE_DIR, prune old ones, and return its id."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    (directory / f'{profile_id}.json').write_text(json.dumps({'id': profile_id, **data}))
+
+    keep = getattr(settings, 'PROFILE_KEEP', 50)
+    for old in sorted(directory.glob('*.json'), reverse=True)[keep:]:
+        old.unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles(limit=50):
+    """Summaries of the most recent profiles, newest first."""
+    profiles = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True)[:limit]:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        data.pop('functions', None)
+        data['query_count'] = len(data.pop('queries', []))
+        profiles.append(data)
+    return profiles
+
+
+def load_profile(profile_id):
+    """Return a stored profile, or None if there is no such profile."""
+    path = profile_dir() / f'{profile_id}.json'
+    if path.parent != profile_dir() or not path.is_file():
+        return None
+    return json.loads(path.read_text())
+
+
+def profile_request(get_response, request):
+    """Run the request under cProfile and store the result; returns the response."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this thread
+        return get_response(request)
+    profiler.disable()
+
+    started = time.perf_counter()
+    timeline = SQLTimeline(started)
+    with connection.execute_wrapper(timeline):
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    total_ms = (time.perf_counter() - started) * 1000
+
+    query = request.GET.copy()
+    query.pop(PROFILE_PARAM, None)
+    match = getattr(request, 'resolver_match', None)
+    profile_id = save_profile({
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'method': request.method,
+        'path': f'{request.path}?{query.urlencode()}' if query else request.path,
+        'view': match.view_name if match else None,
+        'user': request.user.email,
+        'status': response.status_code,
+        'total_ms': round(total_ms, 1),
+        'db_ms': round(sum(entry['duration_ms'] for entry in timeline.entries), 1),
+        'functions': top_functions(profiler),
+        'queries': timeline.entries,
+    })
+    response['X-Profile-Id'] = profile_id
+    return response
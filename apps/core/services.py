@@ -0,0 +1,40 @@
+"""
+Shared services used across apps.
+"""
+
+from django.db import transaction
+from django.db.models import F
+from .models import IdSequence
+
+
+def reserve_ids(name, count=1, initial=None):
+    """
+    Atomically reserve a block of `count` values from the named sequence.
+    
+    Returns a range of the reserved values. `initial` is an optional callable
+    returning the starting value, used only the first time the sequence row
+    is created (e.g. to continue numbering from existing data).
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    
+    with transaction.atomic():
+        sequence = IdSequence.objects.select_for_update().filter(name=name).first()
+        if sequence is None:
+            start_value = initial() if initial else 0
+            sequence, _ = IdSequence.objects.get_or_create(
+                name=name,
+                defaults={'last_value': start_value}
+            )
+            sequence = IdSequence.objects.select_for_update().get(pk=sequence.pk)
+        
+        IdSequence.objects.filter(pk=sequence.pk).update(last_value=F('last_value') + count)
+        sequence.refresh_from_db(fields=['last_value'])
+    
+    end = sequence.last_value
+    return range(end - count + 1, end + 1)
+
+
+def reserve_id(name, initial=None):
+    """Reserve a single value from the named sequence."""
+    return reserve_ids(name, 1, initial=initial)[0]
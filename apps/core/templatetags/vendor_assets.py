@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from apps.core.assets import VENDOR_ASSETS
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _vendored(name):
+    return finders.find(name) is not None
+
+
+@register.simple_tag
+def vendor_script(name):
+    """
+    Script tag for a VENDOR_ASSETS entry.
+
+    Serves the copy fetch_assets put in static/vendor/ when there is one;
+    otherwise loads the pinned CDN URL, with its integrity digest if pinned,
+    so a checkout without the vendored files still works.
+    """
+    url, digest = VENDOR_ASSETS[name]
+    if _vendored(name):
+        return format_html('<script src="{}"></script>', static(name))
+    if digest:
+        return format_html('<script src="{}" integrity="{}" crossorigin="anonymous"></script>', url, digest)
+    return format_html('<script src="{}"></script>', url)
@@ -0,0 +1,38 @@
+"""
+pytest entry point for the per-view latency benchmarks.
+
+Skipped unless RUN_BENCHMARKS is set, e.g.:
+
+    RUN_BENCHMARKS=1 BENCHMARK_SIZES=10,1000 BENCHMARK_OUTPUT=bench.json python -m pytest apps/core/test_benchmarks.py
+
+Set BENCHMARK_FRAGMENT_CACHE=0 to render the navbar fragments on every
+request. The benchmark creates and destroys its own test database.
+"""
+
+import json
+import os
+import unittest
+
+from apps.core.benchmarks import run_benchmarks
+
+
+def test_view_latency():
+    if not os.environ.get('RUN_BENCHMARKS'):
+        raise unittest.SkipTest('Set RUN_BENCHMARKS=1 to run the view benchmarks')
+    
+    sizes = [int(size) for size in os.environ.get('BENCHMARK_SIZES', '10,100,1000').split(',')]
+    report = run_benchmarks(
+        sizes,
+        days=int(os.environ.get('BENCHMARK_DAYS', 90)),
+        repeat=int(os.environ.get('BENCHMARK_REPEAT', 5)),
+        fragment_cache=os.environ.get('BENCHMARK_FRAGMENT_CACHE', '1') != '0',
+    )
+    
+    output = os.environ.get('BENCHMARK_OUTPUT')
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    # Permission denials and redirects are expected; server errors are not
+    errors = [r for r in report['results'] if r['status'] >= 500]
+    assert not errors, f"Views returned server errors: {[(r['role'], r['url_name']) for r in errors]}"
@@ -1,3 +1,362 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from . import assets, benchmarks, cache, mail, metrics, profiling
+from .middleware import QueryInstrumentationMiddleware, fingerprint_sql
+from .models import IdSequence
+from .services import reserve_id, reserve_ids
+from .templatetags import vendor_assets
+
+
+class IdSequenceTests(TestCase):
+    """Tests for the shared ID sequence allocator."""
+    
+    def test_reserves_consecutive_values(self):
+        self.assertEqual(reserve_id('test'), 1)
+        self.assertEqual(reserve_id('test'), 2)
+        self.assertEqual(IdSequence.objects.get(name='test').last_value, 2)
+    
+    def test_reserves_blocks(self):
+        block = reserve_ids('test', 5)
+        self.assertEqual(list(block), [1, 2, 3, 4, 5])
+        self.assertEqual(list(reserve_ids('test', 2)), [6, 7])
+    
+    def test_initial_value_only_used_on_creation(self):
+        self.assertEqual(reserve_id('test', initial=lambda: 1000), 1001)
+        self.assertEqual(reserve_id('test', initial=lambda: 5000), 1002)
+    
+    def test_rejects_empty_block(self):
+        with self.assertRaises(ValueError):
+            reserve_ids('test', 0)
+
+
+class QueryInstrumentationTests(TestCase):
+    """Tests for the per-request SQL instrumentation middleware."""
+    
+    def _get_response(self, request):
+        from django.http import HttpResponse
+        for _ in range(3):
+            list(IdSequence.objects.filter(name='a'))
+        list(IdSequence.objects.filter(name='b'))
+        return HttpResponse('ok')
+    
+    def test_fingerprint_normalizes_values(self):
+        self.assertEqual(
+            fingerprint_sql("SELECT * FROM t WHERE id = 5 AND name = 'x' AND pk IN (%s, %s, %s)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)',
+        )
+    
+    @override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=1.0, QUERY_N_PLUS_ONE_THRESHOLD=4)
+    def test_server_timing_and_n_plus_one_detection(self):
+        request = RequestFactory().get('/hr/')
+        with self.assertLogs('apps.core.requests', level='INFO') as logs:
+            response = QueryInstrumentationMiddleware(self._get_response)(request)
+        
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+        self.assertEqual(request.query_stats.duplicates, 2)
+        self.assertTrue(any('n_plus_one' in line and 'WARNING' in line for line in logs.output))
+    
+    @override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_disabled_when_not_sampled(self):
+        request = RequestFactory().get('/hr/')
+        response = QueryInstrumentationMiddleware(self._get_response)(request)
+        self.assertNotIn('Server-Timing', response)
+
+
+class ProfilingTests(TestCase):
+    """Tests for on-demand request profiling."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PROFILE_DIR=directory.name, QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        User = get_user_model()
+        self.admin = User.objects.create_user(email='admin@ethos.com', password='x', role='admin')
+        self.hr = User.objects.create_user(email='hr@ethos.com', password='x', role='hr')
+    
+    def test_admin_with_token_is_profiled(self):
+        self.client.force_login(self.admin)
+        url = reverse('hr:settings')
+        response = self.client.get(url, {'_profile': profiling.make_token(self.admin)})
+        
+        profile = profiling.load_profile(response['X-Profile-Id'])
+        self.assertEqual(profile['path'], url)
+        self.assertEqual(profile['status'], 200)
+        self.assertTrue(profile['functions'])
+        self.assertTrue(profile['queries'])
+        
+        response = self.client.get(reverse('hr:profile_detail', args=[profile['id']]))
+        self.assertContains(response, 'SQL Timeline')
+        self.assertContains(self.client.get(reverse('hr:profiles')), profile['id'])
+    
+    def test_token_must_belong_to_an_admin_making_the_request(self):
+        self.client.force_login(self.hr)
+        response = self.client.get(reverse('hr:settings'), {'_profile': profiling.make_token(self.hr)})
+        self.assertNotIn('X-Profile-Id', response)
+        
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('hr:settings'), HTTP_X_PROFILE=profiling.make_token(self.hr))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.list_profiles(), [])
+    
+    def test_profiling_link_stays_on_site(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('hr:profiles'), {'target': '/hr/employees/'})
+        self.assertTrue(response.context['profile_url'].startswith('/hr/employees/?_profile='))
+        for target in ['//evil.example/', '/\\evil.example/', 'https://evil.example/']:
+            with self.subTest(target=target):
+                response = self.client.get(reverse('hr:profiles'), {'target': target})
+                self.assertNotIn('profile_url', response.context)
+    
+    def test_profiles_page_is_admin_only(self):
+        self.client.force_login(self.hr)
+        self.assertEqual(self.client.get(reverse('hr:profiles')).status_code, 403)
+
+
+class BenchmarkRouteTests(TestCase):
+    """Every route the benchmark harness enumerates must reverse for every role."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(PROFILE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        call_command('generate_dataset', employees=12, days=60, seed=7, stdout=StringIO())
+        profiling.save_profile({'path': '/hr/', 'status': 200})
+    
+    def test_every_route_reverses(self):
+        from apps.hr.models import ReportJob
+        
+        users = benchmarks.benchmark_users()
+        self.assertEqual(set(users), set(benchmarks.ROLES))
+        for role, user in users.items():
+            ReportJob.objects.create(report_type='headcount', requested_by=user, status=ReportJob.Status.DONE)
+            for url_name in benchmarks.benchmark_urls():
+                with self.subTest(role=role, url_name=url_name):
+                    self.assertIsNotNone(benchmarks.benchmark_path(url_name, user))
+
+
+class MetricsTests(TestCase):
+    """Tests for the metrics registry and /metrics/ endpoint."""
+    
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+    
+    def test_renders_histograms_in_prometheus_format(self):
+        metrics.record_request('hr:reports', 'GET', 200, 0.2, 0.05)
+        metrics.record_request('hr:reports', 'GET', 200, 3.0, 0.1)
+        text = metrics.render_prometheus()
+        
+        self.assertIn('# TYPE hrms_request_duration_seconds histogram', text)
+        self.assertIn('hrms_request_duration_seconds_bucket{view="hr:reports",method="GET",le="0.25"} 1', text)
+        self.assertIn('hrms_request_duration_seconds_bucket{view="hr:reports",method="GET",le="+Inf"} 2', text)
+        self.assertIn('hrms_request_duration_seconds_count{view="hr:reports",method="GET"} 2', text)
+        self.assertIn('hrms_requests_total{view="hr:reports",method="GET",status="200"} 2', text)
+    
+    def test_sums_snapshots_from_all_workers(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other_worker = {'hrms_emails_total': [[['sent'], 3]]}
+            with open(os.path.join(directory, 'metrics-99999.json'), 'w') as f:
+                json.dump(other_worker, f)
+            metrics.record_email('sent', 0.1)
+            
+            self.assertEqual(metrics.collect()['hrms_emails_total'], {('sent',): 4})
+            self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{os.getpid()}.json')))
+    
+    @override_settings(METRICS_TOKEN='scrape-secret', QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_endpoint_is_admin_or_token_only(self):
+        User = get_user_model()
+        admin = User.objects.create_user(email='admin@ethos.com', password='x', role='admin')
+        hr = User.objects.create_user(email='hr@ethos.com', password='x', role='hr')
+        url = reverse('metrics')
+        
+        self.assertEqual(self.client.get(url).status_code, 302)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertContains(response, 'hrms_requests_total')
+        
+        self.client.force_login(hr)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(admin)
+        self.client.get(reverse('hr:settings'))
+        self.assertContains(self.client.get(url), 'view="hr:settings"')
+
+
+class MailTransportTests(TestCase):
+    """Tests for the mail transports."""
+    
+    def test_sendgrid_reuses_connection_and_chunks_personalizations(self):
+        response = mock.Mock(status=202, will_close=False)
+        response.read.return_value = b''
+        with mock.patch('http.client.HTTPSConnection') as connection_class:
+            connection_class.return_value.getresponse.return_value = response
+            transport = mail.SendGridTransport('key')
+            recipients = [mail.Recipient(f'user{i}@example.com') for i in range(mail.MAX_PERSONALIZATIONS + 1)]
+            self.assertEqual(transport.send('hr@example.com', 'Hi', '<p>Hi</p>', recipients), len(recipients))
+            self.assertEqual(transport.send('hr@example.com', 'Hi', '<p>Hi</p>', recipients[:1]), 1)
+        
+        connection_class.assert_called_once()
+        calls = connection_class.return_value.request.call_args_list
+        self.assertEqual(len(calls), 3)
+        payload = json.loads(calls[0].kwargs['body'])
+        self.assertEqual(len(payload['personalizations']), mail.MAX_PERSONALIZATIONS)
+    
+    def test_sendgrid_retries_only_before_the_request_is_sent(self):
+        response = mock.Mock(status=202, will_close=False)
+        response.read.return_value = b''
+        recipients = [mail.Recipient('a@example.com')]
+        with mock.patch('http.client.HTTPSConnection') as connection_class:
+            conn = connection_class.return_value
+            conn.request.side_effect = [BrokenPipeError, None]
+            conn.getresponse.return_value = response
+            transport = mail.SendGridTransport('key')
+            self.assertEqual(transport.send('hr@example.com', 'Hi', '<p>Hi</p>', recipients), 1)
+            self.assertEqual(conn.request.call_count, 2)
+            
+            conn.request.reset_mock(side_effect=True)
+            conn.getresponse.side_effect = TimeoutError
+            with self.assertLogs('apps.core.mail', 'ERROR'):
+                self.assertEqual(transport.send('hr@example.com', 'Hi', '<p>Hi</p>', recipients), 0)
+            conn.request.assert_called_once()
+    
+    def test_file_transport_writes_payloads(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(EMAIL_TRANSPORT='file', EMAIL_FILE_PATH=directory):
+            transport = mail.get_transport()
+            self.assertIs(transport, mail.get_transport())
+            transport.send('hr@example.com', 'Hi', '<p>Hi</p>', [mail.Recipient('a@example.com')])
+            [written] = os.listdir(directory)
+            with open(os.path.join(directory, written)) as f:
+                self.assertEqual(json.load(f)['personalizations'], [{'to': [{'email': 'a@example.com'}]}])
+
+
+class TieredCacheTests(TestCase):
+    """Tests for the two-tier cache and namespace invalidation."""
+    
+    def setUp(self):
+        cache.tiered.clear()
+        self.addCleanup(cache.tiered.clear)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+    
+    def test_l2_hits_fill_l1(self):
+        cache.tiered.shared.set('greeting', 'hello')
+        self.assertIsNone(cache.tiered.local.get('greeting'))
+        self.assertEqual(cache.tiered.get('greeting'), 'hello')
+        self.assertEqual(cache.tiered.local.get('greeting'), 'hello')
+    
+    def test_cached_function_is_invalidated_by_model_signals(self):
+        calls = []
+        
+        @cache.cached('test-ns')
+        def count_users(domain):
+            calls.append(domain)
+            return get_user_model().objects.filter(email__endswith=domain).count()
+        
+        cache.invalidate_on('test-ns', get_user_model())
+        self.assertEqual(count_users('@ethos.com'), 0)
+        self.assertEqual(count_users('@ethos.com'), 0)
+        self.assertEqual(len(calls), 1)
+        
+        version = cache.namespace_version('test-ns')
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.create_user(email='jane@ethos.com', password='x')
+        self.assertEqual(cache.namespace_version('test-ns'), version + 1)
+        self.assertEqual(count_users('@ethos.com'), 1)
+        self.assertEqual(metrics.collect()['hrms_cache_requests_total'], {('test-ns', 'hit'): 1, ('test-ns', 'miss'): 2})
+    
+    def test_versions_survive_cache_eviction(self):
+        cache.bump('test-ns')
+        cache.bump('test-ns')
+        # Losing every cache entry (e.g. to culling) must not send a namespace back to an old version
+        cache.tiered.clear()
+        self.assertEqual(cache.namespace_version('test-ns'), 2)
+        self.assertEqual(IdSequence.objects.get(name='cache-ns:test-ns').last_value, 2)
+    
+    def test_cached_view_caches_get_per_session(self):
+        calls = []
+        
+        @cache.cached_view('test-views')
+        def view(request):
+            calls.append(request.method)
+            return HttpResponse(f'call {len(calls)}')
+        
+        factory = RequestFactory()
+        request = factory.get('/page/')
+        request.session = mock.Mock(session_key='abc')
+        self.assertEqual(view(request).content, b'call 1')
+        self.assertEqual(view(request).content, b'call 1')
+        
+        request.session = mock.Mock(session_key='def')
+        self.assertEqual(view(request).content, b'call 2')
+        post = factory.post('/page/')
+        post.session = request.session
+        self.assertEqual(view(post).content, b'call 3')
+
+
+class StylesheetTests(TestCase):
+    """Tests for the utility stylesheet builder."""
+    
+    def test_compiles_only_used_utilities(self):
+        css, unknown = assets.build_stylesheet([
+            '<div class="px-4 h-2.5 bg-black bg-opacity-50 hover:bg-green-50 md:grid-cols-3 hover:bg-pink-50">',
+            '<span class="bg-orange-100 text-pink-800 text-center">',
+        ])
+        self.assertIn('.px-4{padding-left:1rem;padding-right:1rem}', css)
+        self.assertIn(r'.h-2\.5{height:0.625rem}', css)
+        self.assertIn(r'.hover\:bg-green-50:hover{', css)
+        self.assertNotIn('.px-6', css)
+        self.assertIn('.bg-orange-100{', css)
+        self.assertEqual(unknown, {'hover:bg-pink-50', 'text-pink-800'})
+        # Opacity modifiers and variants must come after the utilities they override
+        self.assertLess(css.index('.bg-black{'), css.index('.bg-opacity-50{'))
+        self.assertLess(css.index('.bg-opacity-50{'), css.index(r'.hover\:bg-green-50'))
+        self.assertLess(css.index(r'.hover\:bg-green-50'), css.index('@media (min-width:768px){'))
+    
+    def test_space_utilities_target_siblings(self):
+        css, _ = assets.build_stylesheet(['class="space-y-4"'])
+        self.assertIn('.space-y-4 > :not([hidden]) ~ :not([hidden]){margin-top:1rem;margin-bottom:0}', css)
+    
+    def test_fetch_assets_checks_integrity(self):
+        content = b'console.log(1);\n//# sourceMappingURL=lib.js.map'
+        response = mock.MagicMock()
+        response.__enter__.return_value.read.return_value = content
+        pinned = {
+            'vendor/good.js': ('https://cdn.example/good.js', assets.integrity(content)),
+            'vendor/unpinned.js': ('https://cdn.example/unpinned.js', None),
+            'vendor/bad.js': ('https://cdn.example/bad.js', assets.integrity(b'other')),
+        }
+        with tempfile.TemporaryDirectory() as directory, override_settings(STATICFILES_DIRS=[directory]), \
+                mock.patch('urllib.request.urlopen', return_value=response), \
+                mock.patch('apps.core.management.commands.fetch_assets.VENDOR_ASSETS', pinned):
+            with self.assertRaisesMessage(CommandError, 'Integrity mismatch for https://cdn.example/bad.js'):
+                call_command('fetch_assets', stdout=StringIO())
+            with open(os.path.join(directory, 'vendor', 'good.js'), 'rb') as f:
+                self.assertEqual(f.read(), b'console.log(1);\n')
+            self.assertFalse(os.path.exists(os.path.join(directory, 'vendor', 'unpinned.js')))
+            self.assertFalse(os.path.exists(os.path.join(directory, 'vendor', 'bad.js')))
+    
+    def test_vendor_script_falls_back_to_pinned_url(self):
+        template = Template("{% load vendor_assets %}{% vendor_script 'vendor/htmx-1.9.10.min.js' %}")
+        url, digest = assets.VENDOR_ASSETS['vendor/htmx-1.9.10.min.js']
+        for vendored, expected in [(True, '/static/vendor/htmx-1.9.10.min.js"'), (False, f'{url}" integrity="{digest}"')]:
+            with self.subTest(vendored=vendored), mock.patch.object(vendor_assets, '_vendored', return_value=vendored):
+                self.assertIn(expected, template.render(Context()))
+    
+    def test_committed_stylesheet_is_current(self):
+        call_command('build_css', check=True, stdout=StringIO())
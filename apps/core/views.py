@@ -1,6 +1,12 @@
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib import messages
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from . import metrics
 
 @login_required
 def dashboard(request):
@@ -17,4 +23,21 @@ def dashboard(request):
     
     # Fallback - no employee profile found
     messages.error(request, 'No employee profile found. Please contact HR.')
-    return redirect('account_login')
\ No newline at end of file
+    return redirect('account_login')
+
+
+def metrics_view(request):
+    """
+    Prometheus metrics for admins.
+    
+    Scrapers authenticate with an `Authorization: Bearer <METRICS_TOKEN>` header.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorization = request.headers.get('Authorization', '')
+    if not (token and constant_time_compare(authorization, f'Bearer {token}')):
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if request.user.role != 'admin':
+            raise PermissionDenied("You don't have permission to access this page.")
+    
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
-from .models import Department, Employee, Attendance, Payslip, LeaveRequest, AttendanceCorrection
+from .models import Department, Employee, Attendance, PayrollRun, Payslip, LeaveRequest, AttendanceCorrection
 
 
 @admin.register(Department)
@@ -31,6 +31,12 @@ class PayslipAdmin(SimpleHistoryAdmin):
     search_fields = ('employee__first_name', 'employee__last_name')
 
 
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ('period_start', 'period_end', 'pay_date', 'employee_count', 'total_gross', 'total_net', 'run_by')
+    readonly_fields = ('employee_count', 'total_gross', 'total_deductions', 'total_net', 'rules')
+
+
 @admin.register(LeaveRequest)
 class LeaveRequestAdmin(SimpleHistoryAdmin):
     list_display = ('employee', 'leave_type', 'start_date', 'end_date', 'status')
@@ -1,9 +1,20 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import unread_state
+
+
 def notification_count(request):
-    """Add unread notification count to all employee templates."""
-    if request.user.is_authenticated and hasattr(request.user, 'employee_profile'):
-        try:
-            count = request.user.employee_profile.notifications.filter(is_read=False).count()
-            return {'unread_notification_count': count}
-        except:
-            pass
-    return {'unread_notification_count': 0}
\ No newline at end of file
+    """
+    Add unread notification count to all employee templates.
+    
+    Lazy, so pages that don't show the badge skip the lookup, and served from
+    the cached unread state rather than a count query per page.
+    """
+    if not request.user.is_authenticated:
+        return {'unread_notification_count': 0}
+    user_id = request.user.pk
+    return {
+        'unread_notification_count': SimpleLazyObject(lambda: unread_state(user_id)['count']),
+        'notification_poll_seconds': settings.NOTIFICATION_POLL_SECONDS,
+    }
@@ -0,0 +1,528 @@
+"""
+Management command to generate large synthetic datasets for load and benchmark testing.
+
+Unlike seed_data, every row is produced from a seeded RNG and written with
+bulk_create in batches, so a 10k-employee, multi-year database can be built
+in minutes and rebuilt identically with the same --seed.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history
+from apps.core.cache import invalidate_models
+from apps.employees.models import (
+    Department, Employee, Attendance, Payslip, LeaveRequest, AttendanceCorrection, Notification
+)
+from apps.employees.services import allocate_employee_ids
+
+User = get_user_model()
+
+DEPARTMENTS = {
+    'Human Resources': ['HR Specialist', 'Recruiter', 'Payroll Specialist', 'Benefits Coordinator'],
+    'Engineering': ['Software Engineer', 'Senior Developer', 'QA Engineer', 'DevOps Engineer', 'Data Engineer'],
+    'Sales': ['Sales Representative', 'Account Executive', 'Customer Success'],
+    'Marketing': ['Marketing Specialist', 'Content Writer', 'Graphic Designer'],
+    'Finance': ['Accountant', 'Financial Analyst', 'Business Analyst'],
+    'Operations': ['Operations Coordinator', 'Warehouse Associate', 'Facilities Technician', 'Support Specialist'],
+}
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony', 'Betty', 'Mark', 'Sandra', 'Steven', 'Ashley',
+    'Paul', 'Emily', 'Andrew', 'Donna', 'Joshua', 'Michelle', 'Kevin', 'Carol', 'Brian', 'Amanda',
+    'Wei', 'Priya', 'Carlos', 'Fatima', 'Hiro', 'Olga', 'Kwame', 'Ana', 'Mateo', 'Aisha',
+]
+
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Chen', 'Patel', 'Kim', 'Nguyen', 'Okafor', 'Ivanova', 'Tanaka', 'Silva', 'Khan', 'Mensah',
+]
+
+LEAVE_REASONS = [
+    'Family vacation', 'Medical appointment', 'Personal matters', 'Feeling unwell',
+    'Moving house', 'Wedding', 'Rest and recovery', 'Child care',
+]
+
+
+@contextmanager
+def backdated(model, *field_names):
+    """Temporarily disable auto_now/auto_now_add so generated timestamps are kept."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class BatchWriter:
+    """Buffers model instances and writes them with bulk_create every `batch_size` rows."""
+
+    def __init__(self, model, batch_size):
+        self.model = model
+        self.batch_size = batch_size
+        self.buffer = []
+        self.written = 0
+
+    def add(self, obj):
+        self.buffer.append(obj)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        created = self.model.objects.bulk_create(self.buffer, batch_size=self.batch_size)
+        self.written += len(created)
+        self.buffer = []
+
+
+class RowWriter:
+    """
+    Buffers raw row tuples and inserts them with executemany.
+    
+    Used for the high-volume tables, where building model instances and
+    compiling bulk_create SQL costs more than the insert itself. Values must
+    already be adapted for the database (see connection.ops.adapt_*).
+    """
+
+    def __init__(self, model, field_names, batch_size):
+        opts = model._meta
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(opts.get_field(name).column) for name in field_names)
+        placeholders = ', '.join(['%s'] * len(field_names))
+        self.sql = f'INSERT INTO {quote(opts.db_table)} ({columns}) VALUES ({placeholders})'
+        self.batch_size = batch_size
+        self.buffer = []
+        self.written = 0
+
+    def add(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(self.sql, self.buffer)
+        self.written += len(self.buffer)
+        self.buffer = []
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, deterministic synthetic dataset for load and benchmark testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1000, help='Number of employees to create')
+        parser.add_argument('--days', type=int, default=365, help='Days of history to generate, ending yesterday')
+        parser.add_argument('--seed', type=int, default=42, help='RNG seed (same seed gives the same dataset)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create call')
+        parser.add_argument('--password', default='password123', help='Password for every generated account')
+        parser.add_argument('--domain', default='example.com', help='Email domain for generated accounts')
+
+        # Distribution knobs
+        parser.add_argument('--manager-ratio', type=float, default=0.08, help='Share of employees who are managers')
+        parser.add_argument('--hr-ratio', type=float, default=0.02, help='Share of employees with the HR role')
+        parser.add_argument('--terminated-rate', type=float, default=0.05, help='Share of terminated employees')
+        parser.add_argument('--late-rate', type=float, default=0.08, help='Probability a work day is late')
+        parser.add_argument('--absent-rate', type=float, default=0.03, help='Probability a work day is absent')
+        parser.add_argument('--half-day-rate', type=float, default=0.02, help='Probability a work day is a half day')
+        parser.add_argument('--leave-per-year', type=float, default=4, help='Average leave requests per employee per year')
+        parser.add_argument('--correction-rate', type=float, default=0.01,
+                            help='Probability an attendance record gets a correction request')
+        parser.add_argument('--notifications-per-employee', type=int, default=10,
+                            help='Average in-app notifications per employee')
+
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['days'] < 1:
+            raise CommandError('--employees and --days must be positive')
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.today = date.today()
+        self.first_day = self.today - timedelta(days=options['days'])
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            departments = self._create_departments()
+            employees = self._create_employees(departments)
+
+        leave_dates = self._create_leave_requests(employees)
+        self._create_attendance(employees, leave_dates)
+        self._create_payslips(employees)
+        self._create_notifications(employees)
+        # Rows were bulk-inserted without signals, so cached dashboards and reports don't know about them
+        invalidate_models(Department, Employee, Attendance, LeaveRequest, AttendanceCorrection)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\nDataset generated in {elapsed:.1f}s'))
+        self.stdout.write(f'  - {Employee.objects.count()} employees')
+        self.stdout.write(f'  - {Attendance.objects.count()} attendance records')
+        self.stdout.write(f'  - {AttendanceCorrection.objects.count()} attendance corrections')
+        self.stdout.write(f'  - {LeaveRequest.objects.count()} leave requests')
+        self.stdout.write(f'  - {Payslip.objects.count()} payslips')
+        self.stdout.write(f'  - {Notification.objects.count()} notifications')
+
+    # ------------------------------------------------------------------
+    # People
+    # ------------------------------------------------------------------
+
+    def _create_departments(self):
+        departments = {}
+        for name in DEPARTMENTS:
+            dept, _ = Department.objects.get_or_create(name=name, defaults={'description': f'{name} department'})
+            departments[name] = dept
+        return departments
+
+    def _create_employees(self, departments):
+        """Create users and employee profiles (managers first, so reports can point at them)."""
+        opts = self.options
+        rng = self.rng
+        count = opts['employees']
+        self.stdout.write(f'Creating {count} employees...')
+
+        employee_ids = allocate_employee_ids(count)
+        manager_count = max(1, int(count * opts['manager_ratio']))
+        hr_count = max(1, int(count * opts['hr_ratio']))
+        dept_names = list(DEPARTMENTS)
+
+        people = []
+        for i, employee_id in enumerate(employee_ids):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            if i < hr_count:
+                role, dept_name = 'hr', 'Human Resources'
+            elif i < hr_count + manager_count:
+                role, dept_name = 'manager', dept_names[i % len(dept_names)]
+            else:
+                role, dept_name = 'employee', rng.choice(dept_names)
+            people.append({
+                'employee_id': employee_id,
+                'first': first,
+                'last': last,
+                'role': role,
+                'department': departments[dept_name],
+                'email': f'{first.lower()}.{last.lower()}.{employee_id.lower()}@{opts["domain"]}',
+            })
+
+        users = User.objects.bulk_create_users(
+            [
+                {
+                    'email': p['email'],
+                    'password': opts['password'],
+                    'role': p['role'],
+                    'first_name': p['first'],
+                    'last_name': p['last'],
+                }
+                for p in people
+            ],
+            batch_size=opts['batch_size'],
+            share_password_hashes=True,
+        )
+
+        # Most people joined before the generated window; some are hired during it
+        earliest_start = self.first_day - timedelta(days=365 * 8)
+        span = (self.today - timedelta(days=30) - earliest_start).days
+        managers_by_dept = {}
+
+        def build(p, user):
+            dept = p['department']
+            is_lead = p['role'] != 'employee'
+            dept_managers = managers_by_dept.get(dept.pk)
+            status = Employee.Status.ACTIVE
+            if not is_lead and rng.random() < opts['terminated_rate']:
+                status = Employee.Status.TERMINATED
+            if p['role'] == 'hr':
+                job_title = 'HR Manager'
+            elif p['role'] == 'manager':
+                job_title = f'{dept.name} Manager'
+            else:
+                job_title = rng.choice(DEPARTMENTS[dept.name])
+            return Employee(
+                user=user,
+                employee_id=p['employee_id'],
+                first_name=p['first'],
+                last_name=p['last'],
+                department=dept,
+                job_title=job_title,
+                manager=rng.choice(dept_managers) if dept_managers and not is_lead else None,
+                start_date=earliest_start + timedelta(days=int(span * rng.random() ** 0.7)),
+                status=status,
+                salary=Decimal(rng.randrange(38000, 160000, 500)),
+                phone=f'555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+                address=f'{rng.randint(100, 9999)} Main Street, Anytown, ST {rng.randint(10000, 99999)}',
+                emergency_contact=f'{rng.choice(FIRST_NAMES)} {p["last"]}',
+                emergency_phone=f'555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+                annual_leave_balance=Decimal(rng.randint(0, 20)),
+                sick_leave_balance=Decimal(rng.randint(0, 10)),
+                vacation_balance=Decimal(rng.randint(0, 15)),
+            )
+
+        # HR and managers are saved first so their reports can point at them
+        leads = [build(p, u) for p, u in zip(people, users) if p['role'] != 'employee']
+        leads = bulk_create_with_history(leads, Employee, batch_size=opts['batch_size'])
+        for lead in leads:
+            if lead.user.role == 'manager':
+                managers_by_dept.setdefault(lead.department_id, []).append(lead)
+
+        staff = [build(p, u) for p, u in zip(people, users) if p['role'] == 'employee']
+        staff = bulk_create_with_history(staff, Employee, batch_size=opts['batch_size'])
+        return leads + staff
+
+    # ------------------------------------------------------------------
+    # Leave and attendance
+    # ------------------------------------------------------------------
+
+    def _work_days(self, employee):
+        """Weekdays inside the generated window while the employee was employed."""
+        current = max(self.first_day, employee.start_date)
+        end = self.today - timedelta(days=1)
+        if employee.status == Employee.Status.TERMINATED:
+            # Terminated people stop appearing somewhere in the last part of the window
+            end = end - timedelta(days=int((end - current).days * self.rng.random() * 0.5))
+        while current <= end:
+            if current.weekday() < 5:
+                yield current
+            current += timedelta(days=1)
+
+    def _create_leave_requests(self, employees):
+        """Create leave requests; returns {employee_pk: set(dates)} for approved leave."""
+        opts = self.options
+        rng = self.rng
+        self.stdout.write('Creating leave requests...')
+
+        years = opts['days'] / 365
+        leave_types = ['annual'] * 4 + ['sick'] * 3 + ['vacation'] * 3 + ['unpaid', 'other']
+        reviewers = [e for e in employees if e.user.role in ('hr', 'manager')] or employees
+        leave_dates = {}
+        writer = BatchWriter(LeaveRequest, opts['batch_size'])
+
+        with backdated(LeaveRequest, 'submitted_at', 'updated_at'):
+            for employee in employees:
+                window_start = max(self.first_day, employee.start_date)
+                window_days = (self.today + timedelta(days=60) - window_start).days
+                if window_days <= 0:
+                    continue
+                for _ in range(self._poisson(opts['leave_per_year'] * years)):
+                    start = window_start + timedelta(days=rng.randrange(window_days))
+                    end = start + timedelta(days=rng.choice([0, 0, 1, 2, 4, 6, 9]))
+                    submitted = self._aware(start - timedelta(days=rng.randint(1, 30)))
+                    if start > self.today:
+                        status = rng.choice(['pending', 'pending', 'approved'])
+                    else:
+                        status = rng.choice(['approved'] * 7 + ['rejected', 'rejected', 'cancelled'])
+                    reviewed = status in ('approved', 'rejected')
+                    reviewed_at = submitted + timedelta(days=rng.randint(0, 3)) if reviewed else None
+                    writer.add(LeaveRequest(
+                        employee=employee,
+                        leave_type=rng.choice(leave_types),
+                        start_date=start,
+                        end_date=end,
+                        reason=rng.choice(LEAVE_REASONS),
+                        status=status,
+                        reviewed_by=rng.choice(reviewers) if reviewed else None,
+                        reviewed_at=reviewed_at,
+                        submitted_at=submitted,
+                        updated_at=reviewed_at or submitted,
+                    ))
+                    if status == 'approved':
+                        dates = leave_dates.setdefault(employee.pk, set())
+                        day = start
+                        while day <= end:
+                            dates.add(day)
+                            day += timedelta(days=1)
+            writer.flush()
+        return leave_dates
+
+    def _create_attendance(self, employees, leave_dates):
+        opts = self.options
+        rng = self.rng
+        ops = connection.ops
+        self.stdout.write('Creating attendance records and corrections...')
+
+        late, absent, half = opts['late_rate'], opts['absent_rate'], opts['half_day_rate']
+        zero_hours = ops.adapt_decimalfield_value(Decimal('0'), 4, 2)
+        correction_targets = []
+
+        writer = RowWriter(Attendance, ['employee', 'date', 'time_in', 'time_out', 'hours_worked', 'status', 'notes'],
+                           opts['batch_size'])
+        for employee in employees:
+            on_leave = leave_dates.get(employee.pk, ())
+            for day in self._work_days(employee):
+                time_in = time_out = None
+                hours = zero_hours
+                if day in on_leave:
+                    status = Attendance.Status.ON_LEAVE
+                else:
+                    roll = rng.random()
+                    if roll < absent:
+                        status = Attendance.Status.ABSENT
+                    else:
+                        if roll < absent + late:
+                            status, start_minutes, length = Attendance.Status.LATE, rng.randint(550, 660), rng.randint(390, 480)
+                        elif roll < absent + late + half:
+                            status, start_minutes, length = Attendance.Status.HALF_DAY, rng.randint(480, 540), rng.randint(200, 260)
+                        else:
+                            status, start_minutes, length = Attendance.Status.PRESENT, rng.randint(460, 540), rng.randint(450, 560)
+                        end_minutes = min(start_minutes + length, 23 * 60 + 59)
+                        time_in = dt_time(start_minutes // 60, start_minutes % 60)
+                        time_out = dt_time(end_minutes // 60, end_minutes % 60)
+                        hours = ops.adapt_decimalfield_value(Decimal(end_minutes - start_minutes) / 60, 4, 2)
+                    if rng.random() < opts['correction_rate']:
+                        correction_targets.append((employee.pk, day, time_in, time_out, status))
+                writer.add((
+                    employee.pk,
+                    ops.adapt_datefield_value(day),
+                    ops.adapt_timefield_value(time_in),
+                    ops.adapt_timefield_value(time_out),
+                    hours,
+                    status,
+                    '',
+                ))
+        writer.flush()
+        self._create_corrections(correction_targets)
+
+    def _create_corrections(self, targets):
+        """Create correction requests for sampled attendance rows, linked to the stored records."""
+        rng = self.rng
+        writer = BatchWriter(AttendanceCorrection, self.options['batch_size'])
+        chunk_size = 200
+
+        with backdated(AttendanceCorrection, 'submitted_at'):
+            for i in range(0, len(targets), chunk_size):
+                chunk = targets[i:i + chunk_size]
+                lookup = Q()
+                for employee_id, day, *_ in chunk:
+                    lookup |= Q(employee_id=employee_id, date=day)
+                attendance_ids = {
+                    (employee_id, day): pk
+                    for pk, employee_id, day in Attendance.objects.filter(lookup).values_list('pk', 'employee_id', 'date')
+                }
+                for employee_id, day, time_in, time_out, status in chunk:
+                    submitted = self._aware(day + timedelta(days=rng.randint(0, 5)))
+                    review_status = rng.choice(['approved'] * 6 + ['rejected'] * 2 + ['pending'])
+                    writer.add(AttendanceCorrection(
+                        employee_id=employee_id,
+                        attendance_id=attendance_ids.get((employee_id, day)),
+                        date=day,
+                        current_time_in=time_in,
+                        current_time_out=time_out,
+                        current_status=status,
+                        requested_time_in=dt_time(rng.randint(8, 9), rng.choice([0, 15, 30, 45])),
+                        requested_time_out=dt_time(rng.randint(16, 18), rng.choice([0, 15, 30, 45])),
+                        requested_status=Attendance.Status.PRESENT,
+                        reason='Forgot to clock in' if time_in is None else 'Clock-in time recorded incorrectly',
+                        status=review_status,
+                        reviewed_at=submitted + timedelta(days=1) if review_status != 'pending' else None,
+                        submitted_at=submitted,
+                    ))
+            writer.flush()
+
+    # ------------------------------------------------------------------
+    # Payroll and notifications
+    # ------------------------------------------------------------------
+
+    def _create_payslips(self, employees):
+        opts = self.options
+        ops = connection.ops
+        self.stdout.write('Creating payslips...')
+        writer = RowWriter(Payslip, ['employee', 'pay_period_start', 'pay_period_end', 'pay_date', 'gross_pay',
+                                     'deductions', 'net_pay', 'details', 'pdf_file', 'created_at'], opts['batch_size'])
+
+        months = []
+        month = self.first_day.replace(day=1)
+        while month < self.today.replace(day=1):
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            months.append((month, next_month - timedelta(days=1)))
+            month = next_month
+
+        for employee in employees:
+            gross = (employee.salary / 12).quantize(Decimal('0.01'))
+            deductions = (gross * Decimal('0.25')).quantize(Decimal('0.01'))
+            amounts = [ops.adapt_decimalfield_value(v, 10, 2) for v in (gross, deductions, gross - deductions)]
+            for period_start, period_end in months:
+                if period_end < employee.start_date:
+                    continue
+                pay_date = ops.adapt_datefield_value(period_end)
+                writer.add((
+                    employee.pk,
+                    ops.adapt_datefield_value(period_start),
+                    pay_date,
+                    pay_date,
+                    *amounts,
+                    '{}',
+                    None,
+                    ops.adapt_datetimefield_value(self._aware(period_end)),
+                ))
+        writer.flush()
+
+    def _create_notifications(self, employees):
+        opts = self.options
+        rng = self.rng
+        ops = connection.ops
+        self.stdout.write('Creating notifications...')
+        writer = RowWriter(Notification, ['recipient', 'notification_type', 'title', 'message', 'is_read', 'link',
+                                          'created_at'], opts['batch_size'])
+        types = [
+            (Notification.Type.LEAVE_APPROVED, 'Leave Request Approved', '/employee/leave/'),
+            (Notification.Type.LEAVE_REJECTED, 'Leave Request Rejected', '/employee/leave/'),
+            (Notification.Type.CORRECTION_APPROVED, 'Attendance Correction Approved', '/employee/attendance/'),
+            (Notification.Type.CORRECTION_REJECTED, 'Attendance Correction Rejected', '/employee/attendance/'),
+            (Notification.Type.PAYSLIP_AVAILABLE, 'Payslip Available', '/employee/payslips/'),
+            (Notification.Type.GENERAL, 'Company Update', ''),
+        ]
+        window = opts['days'] * 24 * 3600
+        now = timezone.now()
+
+        for employee in employees:
+            for _ in range(self._poisson(opts['notifications_per_employee'])):
+                notification_type, title, link = rng.choice(types)
+                age = rng.random() ** 2 * window  # skew towards recent
+                writer.add((
+                    employee.pk,
+                    notification_type,
+                    title,
+                    f'{title} for {employee.first_name}.',
+                    age > 14 * 24 * 3600 or rng.random() < 0.5,
+                    link,
+                    ops.adapt_datetimefield_value(now - timedelta(seconds=age)),
+                ))
+        writer.flush()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _poisson(self, mean):
+        """Small Poisson sampler driven by the command's RNG (Knuth)."""
+        if mean <= 0:
+            return 0
+        if mean > 30:
+            return max(0, int(round(self.rng.gauss(mean, mean ** 0.5))))
+        limit, k, p = pow(2.718281828459045, -mean), 0, 1.0
+        while True:
+            p *= self.rng.random()
+            if p <= limit:
+                return k
+            k += 1
+
+    def _aware(self, day):
+        """Random working-hours timestamp on `day` (never in the future)."""
+        day = min(day, self.today)
+        hour = self.rng.randint(8, 18)
+        return timezone.make_aware(datetime.combine(day, dt_time(hour, self.rng.randint(0, 59))))
@@ -0,0 +1,25 @@
+"""
+Delete old read notifications.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.employees.notifications import purge_read_notifications
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications older than a number of days, in bounded batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+            help='Keep read notifications newer than this (default: NOTIFICATION_RETENTION_DAYS)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement')
+
+    def handle(self, *args, **options):
+        deleted = purge_read_notifications(options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} read notifications older than {options['days']} days"
+        ))
@@ -0,0 +1,53 @@
+"""
+Render payslip PDFs for a pay period.
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employees.models import Payslip
+from apps.employees.payslips import render_payslip_pdfs
+
+
+class Command(BaseCommand):
+    help = 'Render payslip PDFs for a pay period across a process pool (unchanged payslips are skipped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Pay period month as YYYY-MM (default: last month)')
+        parser.add_argument('--all', action='store_true', help='Render every payslip regardless of period')
+        parser.add_argument('--employee', help='Only render payslips for this employee ID (e.g. ETH1042)')
+        parser.add_argument('--workers', type=int, default=None, help='Rendering processes (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Payslips loaded and saved per batch')
+        parser.add_argument('--force', action='store_true', help='Re-render even if the stored PDF is up to date')
+
+    def handle(self, *args, **options):
+        payslips = Payslip.objects.order_by('pk')
+        if not options['all']:
+            start, end = self._period(options['period'])
+            payslips = payslips.filter(pay_period_start__lte=end, pay_period_end__gte=start)
+            self.stdout.write(f'Rendering payslips for {start:%B %Y}...')
+        if options['employee']:
+            payslips = payslips.filter(employee__employee_id=options['employee'])
+
+        started = time.perf_counter()
+        updated, skipped = render_payslip_pdfs(
+            payslips, workers=options['workers'], force=options['force'], batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} payslip PDFs written, {skipped} unchanged, in {elapsed:.1f}s'
+        ))
+
+    def _period(self, value):
+        if value:
+            try:
+                year, month = (int(part) for part in value.split('-'))
+                start = date(year, month, 1)
+            except ValueError:
+                raise CommandError('--period must be YYYY-MM')
+        else:
+            start = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return start, end
@@ -0,0 +1,57 @@
+"""
+Run payroll for a pay period.
+"""
+
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employees.payroll import month_period, previous_month, run_payroll
+from apps.employees.payslips import render_payslip_pdfs
+
+
+class Command(BaseCommand):
+    help = 'Compute payslips for every active employee for a month (each month is only paid once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', help='Pay period month as YYYY-MM (default: last month)')
+        parser.add_argument('--pay-date', help='Pay date as YYYY-MM-DD (default: last day of the period)')
+        parser.add_argument('--run-by', help='Email of the user running payroll, recorded in the audit log')
+        parser.add_argument('--rerun', action='store_true', help='Recompute the payslips of an existing run')
+        parser.add_argument('--no-notify', action='store_true', help="Don't send 'payslip available' notifications")
+        parser.add_argument('--pdfs', action='store_true', help='Render the payslip PDFs afterwards')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Payslips inserted per batch')
+
+    def handle(self, *args, **options):
+        try:
+            if options['period']:
+                year, month = (int(part) for part in options['period'].split('-'))
+                start, end = month_period(year, month)
+            else:
+                start, end = previous_month()
+            pay_date = date.fromisoformat(options['pay_date']) if options['pay_date'] else None
+        except ValueError:
+            raise CommandError('--period must be YYYY-MM and --pay-date YYYY-MM-DD')
+        
+        run_by = None
+        if options['run_by']:
+            run_by = get_user_model().objects.filter(email=options['run_by']).first()
+            if run_by is None:
+                raise CommandError(f"No user with email {options['run_by']}")
+        
+        started = time.perf_counter()
+        run = run_payroll(
+            start, end, pay_date=pay_date, run_by=run_by, rerun=options['rerun'],
+            notify=not options['no_notify'], batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Payroll {start:%B %Y}: {run.employee_count} payslips, gross {run.total_gross:,}, '
+            f'deductions {run.total_deductions:,}, net {run.total_net:,} ({elapsed:.1f}s)'
+        ))
+        
+        if options['pdfs']:
+            updated, skipped = render_payslip_pdfs(run.payslips.all())
+            self.stdout.write(f'{updated} payslip PDFs written, {skipped} unchanged')
@@ -8,6 +8,8 @@ from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from apps.employees.models import Department, Employee, Attendance, Payslip, LeaveRequest
+from apps.employees.payroll import month_period, run_payroll
+from apps.employees.services import allocate_employee_ids
 
 User = get_user_model()
 
@@ -155,22 +157,29 @@ class Command(BaseCommand):
         
         created_employees = []
         
-        for i, (first, last, title, role, salary) in enumerate(employees_data):
+        # Skip people that already exist, then reserve one block of IDs for the rest
+        existing_emails = set(User.objects.values_list('email', flat=True))
+        new_employees_data = []
+        for first, last, title, role, salary in employees_data:
             email = f"{first.lower()}.{last.lower()}@ethos.com"
-            employee_id = f"ETH{str(i+1001).zfill(4)}"
-            
-            # Check if user already exists
-            if User.objects.filter(email=email).exists():
+            if email in existing_emails:
                 self.stdout.write(f'  Skipping {email} (already exists)')
                 continue
-            
-            # Create user
-            user = User.objects.create_user(
-                email=email,
-                password='password123',
-                role=role,
-            )
-            
+            new_employees_data.append((first, last, title, role, salary))
+        
+        employee_ids = allocate_employee_ids(len(new_employees_data)) if new_employees_data else []
+        
+        # Create all user accounts in one go (sample data, so the shared password is hashed once)
+        users = User.objects.bulk_create_users([
+            {
+                'email': f"{first.lower()}.{last.lower()}@ethos.com",
+                'password': 'password123',
+                'role': role,
+            }
+            for first, last, title, role, salary in new_employees_data
+        ], share_password_hashes=True)
+        
+        for employee_id, user, (first, last, title, role, salary) in zip(employee_ids, users, new_employees_data):
             # Get department
             dept_name = job_to_dept.get(title, 'Operations')
             dept = Department.objects.get(name=dept_name)
@@ -238,29 +247,13 @@ class Command(BaseCommand):
                     }
                 )
         
-        # Create some payslips
-        self.stdout.write('Creating payslips...')
-        for employee in Employee.objects.all():
-            for month_ago in range(1, 4):  # Last 3 months
-                pay_date = date.today().replace(day=15) - timedelta(days=month_ago*30)
-                period_start = pay_date.replace(day=1)
-                period_end = pay_date.replace(day=28)
-                
-                gross = employee.salary / 12
-                deductions = gross * Decimal('0.25')  # 25% deductions
-                net = gross - deductions
-                
-                Payslip.objects.get_or_create(
-                    employee=employee,
-                    pay_period_start=period_start,
-                    pay_period_end=period_end,
-                    defaults={
-                        'pay_date': pay_date,
-                        'gross_pay': gross,
-                        'deductions': deductions,
-                        'net_pay': net,
-                    }
-                )
+        # Run payroll for the last 3 months
+        self.stdout.write('Running payroll...')
+        period_end = date.today().replace(day=1) - timedelta(days=1)
+        for _ in range(3):
+            period_start, period_end = month_period(period_end.year, period_end.month)
+            run_payroll(period_start, period_end, notify=False)
+            period_end = period_start - timedelta(days=1)
         
         # Create some leave requests
         self.stdout.write('Creating leave requests...')
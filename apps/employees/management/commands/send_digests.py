@@ -0,0 +1,19 @@
+"""
+Email daily notification digests.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.employees.services import send_notification_digests
+
+
+class Command(BaseCommand):
+    help = 'Email each digest subscriber one summary of their unread notifications (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Only include notifications from the last N days')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Digests sent per API request')
+
+    def handle(self, *args, **options):
+        people, notifications = send_notification_digests(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {people} digests covering {notifications} notifications'))
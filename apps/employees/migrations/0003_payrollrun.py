@@ -0,0 +1,60 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_alter_employee_status_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employee',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('on_leave', 'Pending'), ('terminated', 'Terminated')], default='active', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='historicalemployee',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('on_leave', 'Pending'), ('terminated', 'Terminated')], default='active', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('pay_date', models.DateField()),
+                ('employee_count', models.PositiveIntegerField(default=0)),
+                ('total_gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_net', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rules', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payroll_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='historicalpayslip',
+            name='payroll_run',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='employees.payrollrun'),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='payroll_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payslips', to='employees.payrollrun'),
+        ),
+        migrations.AddConstraint(
+            model_name='payrollrun',
+            constraint=models.UniqueConstraint(fields=('period_start', 'period_end'), name='unique_payroll_period'),
+        ),
+    ]
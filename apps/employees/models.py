@@ -139,6 +139,42 @@ class Attendance(models.Model):
         return f"{self.employee} - {self.date}"
 
 
+class PayrollRun(models.Model):
+    """A payroll calculation for one pay period (see apps.employees.payroll)."""
+    
+    period_start = models.DateField()
+    period_end = models.DateField()
+    pay_date = models.DateField()
+    
+    # Totals across every payslip in the run
+    employee_count = models.PositiveIntegerField(default=0)
+    total_gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_deductions = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_net = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # Deduction rules the run was calculated with
+    rules = models.JSONField(default=list, blank=True)
+    
+    run_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payroll_runs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period_start', 'period_end'], name='unique_payroll_period'),
+        ]
+    
+    def __str__(self):
+        return f"Payroll {self.period_start} to {self.period_end}"
+
+
 class Payslip(models.Model):
     """Employee payslips."""
     
@@ -147,6 +183,13 @@ class Payslip(models.Model):
         on_delete=models.CASCADE,
         related_name='payslips'
     )
+    payroll_run = models.ForeignKey(
+        PayrollRun,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='payslips'
+    )
     pay_period_start = models.DateField()
     pay_period_end = models.DateField()
     pay_date = models.DateField()
@@ -335,9 +378,19 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     link = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set once the notification has been emailed (instantly or in a digest)
+    emailed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a recipient's notifications, newest first
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_recipient_feed'),
+            # Unread counts and mark-all-read only touch the (small) unread set
+            models.Index(fields=['recipient'], condition=models.Q(is_read=False), name='notification_unread'),
+            # purge_notifications walks old read rows
+            models.Index(fields=['created_at'], condition=models.Q(is_read=True), name='notification_read_created'),
+        ]
     
     def __str__(self):
         return f"{self.recipient} - {self.title}"
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Live notification delivery.
+
+Unread state (count and newest notification id) is cached per user, so the
+navbar and the polling endpoint don't run a count query on every request;
+anything that creates notifications or changes read state calls
+notify_changed() after commit, which drops the cached state and tells the
+user's open SSE streams through an in-process broker. The state lives in
+the shared cache, so streams in other worker processes pick the change up
+on their next heartbeat.
+
+Read notifications are deleted after NOTIFICATION_RETENTION_DAYS by the
+purge_notifications command.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.core.cache import tiered
+
+from .models import Notification
+
+
+class Broker:
+    """
+    Per-user fan-out of events to SSE streams in this process.
+
+    Subscribers are asyncio queues owned by the stream's event loop; publish()
+    may be called from any thread (views run in sync threads under ASGI).
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """Register a queue for `user_id`; must be called from the stream's event loop."""
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.maxsize))
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put, queue, event)
+            except RuntimeError:
+                # The stream's loop has already closed
+                pass
+
+
+def _put(queue, event):
+    # A client that stopped reading loses events rather than growing the queue
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+broker = Broker()
+
+
+def _state_key(user_id):
+    return f'notifications:state:{user_id}'
+
+
+def unread_state(user_id):
+    """{'count': unread notifications, 'latest': newest notification id} for a user, cached."""
+    key = _state_key(user_id)
+    state = tiered.get(key)
+    if state is None:
+        state = Notification.objects.filter(recipient__user_id=user_id).aggregate(
+            count=Count('id', filter=Q(is_read=False)),
+            latest=Max('id'),
+        )
+        state['latest'] = state['latest'] or 0
+        tiered.set(key, state, settings.NOTIFICATION_STATE_CACHE_SECONDS)
+    return state
+
+
+def state_etag(state):
+    return f'"{state["count"]}-{state["latest"]}"'
+
+
+def serialize(notification):
+    return {
+        'id': notification.pk,
+        'type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'link': notification.link,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def notify_changed(user_ids, notification=None):
+    """
+    Invalidate cached unread state for `user_ids` and wake their streams.
+
+    Pass `notification` when a single new notification is the cause so
+    streams can show it without another query.
+    """
+    user_ids = list(user_ids)
+    tiered.delete_many([_state_key(user_id) for user_id in user_ids])
+    event = {'notification': serialize(notification)} if notification is not None else {}
+    for user_id in user_ids:
+        broker.publish(user_id, event)
+
+
+def purge_read_notifications(days, batch_size=1000):
+    """
+    Delete read notifications older than `days` days, `batch_size` rows per
+    DELETE so a large purge never holds a long lock. Returns the number deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    old = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by()
+    deleted = 0
+    while True:
+        pks = list(old.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += Notification.objects.filter(pk__in=pks).delete()[0]
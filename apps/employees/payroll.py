@@ -0,0 +1,200 @@
+"""
+Payroll runs.
+
+run_payroll() computes a payslip for every active employee in a pay period
+in one pass over a values() queryset, using Decimal arithmetic and the
+deduction rules in settings.PAYROLL_DEDUCTION_RULES, and inserts the
+payslips in batches. A period is paid at most once: running it again
+returns the existing PayrollRun unless `rerun` is set.
+"""
+
+import calendar
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from simple_history.utils import bulk_create_with_history
+
+from .models import Employee, Notification, PayrollRun, Payslip
+from .notifications import notify_changed
+
+CENT = Decimal('0.01')
+
+
+def deduction_rules():
+    """
+    The configured deduction rules as (name, rate, amount) with Decimal values.
+
+    Each rule in PAYROLL_DEDUCTION_RULES has a `name` and either a `rate`
+    (fraction of gross pay) or a flat `amount` per pay period.
+    """
+    rules = []
+    for rule in settings.PAYROLL_DEDUCTION_RULES:
+        rate = Decimal(str(rule['rate'])) if 'rate' in rule else None
+        amount = Decimal(str(rule['amount'])) if 'amount' in rule else None
+        if (rate is None) == (amount is None):
+            raise ValueError(f"Deduction rule {rule['name']!r} needs exactly one of 'rate' or 'amount'")
+        rules.append((rule['name'], rate, amount))
+    return rules
+
+
+def month_period(year, month):
+    """First and last day of a calendar month."""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def calculate_pay(salary, employed_days, period_days, rules):
+    """
+    Return (gross, deductions, net, details) for one employee and period.
+
+    Gross is a twelfth of the annual salary, pro-rated for employees who
+    started part-way through the period. Flat deductions are capped so net
+    pay never goes negative.
+    """
+    gross = (salary / 12 * employed_days / period_days).quantize(CENT, ROUND_HALF_UP)
+    items = {}
+    remaining = gross
+    for name, rate, amount in rules:
+        value = (gross * rate).quantize(CENT, ROUND_HALF_UP) if rate is not None else amount
+        value = min(value, remaining)
+        remaining -= value
+        items[name] = str(value)
+    deductions = gross - remaining
+    details = {'earnings': {'Base salary': str(gross)}, 'deductions': items}
+    return gross, deductions, remaining, details
+
+
+def run_payroll(period_start, period_end, pay_date=None, run_by=None, rerun=False, notify=True, batch_size=1000):
+    """
+    Create payslips for every active or on-leave employee for a pay period.
+
+    Employees who already have a payslip for the period (from another
+    source) are skipped. Returns the PayrollRun; if the period has already
+    been run it is returned unchanged unless `rerun` is set, in which case
+    its payslips are recomputed (and only newly added employees are
+    notified).
+    """
+    pay_date = pay_date or period_end
+    period_days = (period_end - period_start).days + 1
+    rules = deduction_rules()
+
+    with transaction.atomic():
+        run = PayrollRun.objects.select_for_update().filter(
+            period_start=period_start, period_end=period_end
+        ).first()
+        if run is not None and not rerun:
+            return run
+        if run is None:
+            try:
+                with transaction.atomic():
+                    run = PayrollRun.objects.create(
+                        period_start=period_start, period_end=period_end, pay_date=pay_date, run_by=run_by,
+                    )
+            except IntegrityError:
+                # Another process started the same period first
+                return PayrollRun.objects.get(period_start=period_start, period_end=period_end)
+        
+        # On a re-run, existing payslips are updated in place rather than deleted and re-inserted
+        existing = dict(run.payslips.values_list('employee_id', 'pk'))
+        already_paid = Payslip.objects.filter(
+            pay_period_start=period_start, pay_period_end=period_end,
+        ).exclude(payroll_run=run).values('employee_id')
+        employees = Employee.objects.filter(
+            status__in=[Employee.Status.ACTIVE, Employee.Status.ON_LEAVE],
+            start_date__lte=period_end,
+        ).exclude(pk__in=already_paid).values_list('pk', 'salary', 'start_date').order_by('pk')
+        
+        totals = [Decimal('0')] * 3
+        count = 0
+        payslips = []
+        for employee_id, salary, start_date in employees.iterator(chunk_size=batch_size):
+            employed_days = (period_end - max(start_date, period_start)).days + 1
+            gross, deductions, net, details = calculate_pay(salary, employed_days, period_days, rules)
+            payslips.append(Payslip(
+                pk=existing.pop(employee_id, None), employee_id=employee_id, payroll_run=run,
+                pay_period_start=period_start, pay_period_end=period_end, pay_date=pay_date,
+                gross_pay=gross, deductions=deductions, net_pay=net, details=details,
+            ))
+            totals = [totals[0] + gross, totals[1] + deductions, totals[2] + net]
+            count += 1
+            if len(payslips) >= batch_size:
+                _save_batch(payslips, run_by, notify, batch_size)
+                payslips = []
+        if payslips:
+            _save_batch(payslips, run_by, notify, batch_size)
+        
+        # Employees who are no longer eligible (e.g. terminated since the last run)
+        if existing:
+            Payslip.objects.filter(pk__in=existing.values()).delete()
+        
+        run.pay_date = pay_date
+        run.employee_count = count
+        run.total_gross, run.total_deductions, run.total_net = totals
+        run.rules = [
+            {'name': name, **({'rate': str(rate)} if rate is not None else {'amount': str(amount)})}
+            for name, rate, amount in rules
+        ]
+        run.run_by = run_by or run.run_by
+        run.save()
+    return run
+
+
+PAYSLIP_FIELDS = ['pay_date', 'gross_pay', 'deductions', 'net_pay', 'details']
+
+
+def _update_payslips(payslips, run_by):
+    """
+    Write recomputed amounts to existing payslips with one executemany.
+    
+    QuerySet.bulk_update builds a CASE expression per field and row, which
+    takes seconds per thousand payslips; a plain parameterised UPDATE doesn't.
+    The raw UPDATE bypasses simple_history, so the changed rows are re-read
+    and given "~" history records in bulk afterwards.
+    """
+    fields = [Payslip._meta.get_field(name) for name in PAYSLIP_FIELDS]
+    qn = connection.ops.quote_name
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        qn(Payslip._meta.db_table),
+        ', '.join(f'{qn(field.column)} = %s' for field in fields),
+        qn(Payslip._meta.pk.column),
+    )
+    rows = [
+        [field.get_db_prep_save(getattr(payslip, field.attname), connection) for field in fields] + [payslip.pk]
+        for payslip in payslips
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    
+    updated = Payslip.objects.filter(pk__in=[payslip.pk for payslip in payslips])
+    Payslip.history.bulk_history_create(list(updated), update=True, default_user=run_by)
+
+
+def _save_batch(payslips, run_by, notify, batch_size):
+    created = [payslip for payslip in payslips if payslip.pk is None]
+    updated = [payslip for payslip in payslips if payslip.pk is not None]
+    if updated:
+        _update_payslips(updated, run_by)
+    if created:
+        bulk_create_with_history(created, Payslip, batch_size=batch_size, default_user=run_by)
+    if notify and created:
+        Notification.objects.bulk_create([
+            Notification(
+                recipient_id=payslip.employee_id,
+                notification_type=Notification.Type.PAYSLIP_AVAILABLE,
+                title='Payslip Available',
+                message=f'Your payslip for {payslip.pay_period_start:%B %Y} is ready.',
+                link='/employee/payslips/',
+            )
+            for payslip in created
+        ], batch_size=batch_size)
+        user_ids = list(Employee.objects.filter(
+            pk__in=[payslip.employee_id for payslip in created],
+        ).values_list('user_id', flat=True))
+        transaction.on_commit(lambda: notify_changed(user_ids))
+
+
+def previous_month():
+    """(start, end) of last calendar month."""
+    last_month = date.today().replace(day=1) - timedelta(days=1)
+    return month_period(last_month.year, last_month.month)
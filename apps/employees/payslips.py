@@ -0,0 +1,123 @@
+"""
+Payslip PDF rendering.
+
+PDFs are content-addressed: the file name is a hash of everything printed
+on the slip, so re-running a render skips payslips whose data hasn't
+changed and identical slips share a file. Rendering itself
+(apps.employees.pdf) is pure Python and is spread across a process pool for
+large batches.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import Payslip
+from .pdf import render_payslip
+
+# Bump when the PDF layout changes so every payslip is re-rendered
+PAYSLIP_PDF_VERSION = 1
+
+# Below this many payslips the pool start-up cost outweighs the gain
+MIN_PARALLEL_PAYSLIPS = 20
+
+
+def _line_items(items):
+    return [[str(label), str(amount)] for label, amount in (items or {}).items()]
+
+
+def payslip_pdf_data(payslip):
+    """Everything printed on a payslip, as a JSON-serialisable dict."""
+    employee = payslip.employee
+    details = payslip.details or {}
+    return {
+        'version': PAYSLIP_PDF_VERSION,
+        'company': getattr(settings, 'COMPANY_NAME', 'Ethos HRMS'),
+        'employee_name': employee.full_name,
+        'employee_id': employee.employee_id,
+        'department': employee.department.name if employee.department_id else '',
+        'job_title': employee.job_title,
+        'period_start': payslip.pay_period_start.strftime('%b %d, %Y'),
+        'period_end': payslip.pay_period_end.strftime('%b %d, %Y'),
+        'pay_date': payslip.pay_date.strftime('%b %d, %Y'),
+        'gross_pay': str(payslip.gross_pay),
+        'total_deductions': str(payslip.deductions),
+        'net_pay': str(payslip.net_pay),
+        'earnings': _line_items(details.get('earnings')),
+        'deductions': _line_items(details.get('deductions')),
+    }
+
+
+def payslip_pdf_name(data):
+    """Content-addressed storage name for a payslip's PDF."""
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return f'payslips/{digest[:2]}/{digest}.pdf'
+
+
+def _render_all(datas, workers):
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(datas) >= MIN_PARALLEL_PAYSLIPS:
+        chunksize = max(1, len(datas) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(render_payslip, datas, chunksize=chunksize))
+    return [render_payslip(data) for data in datas]
+
+
+def render_payslip_pdfs(payslips, workers=None, force=False, batch_size=500):
+    """
+    Render PDFs for `payslips` (a queryset or iterable) and store them.
+
+    Payslips whose current file already matches their data are skipped
+    unless `force` is set. Returns (updated, skipped) counts.
+    """
+    updated = skipped = 0
+    if hasattr(payslips, 'select_related'):
+        payslips = payslips.select_related('employee', 'employee__department').iterator(chunk_size=batch_size)
+
+    batch = []
+    for payslip in payslips:
+        batch.append(payslip)
+        if len(batch) >= batch_size:
+            r, s = _render_batch(batch, workers, force)
+            updated, skipped = updated + r, skipped + s
+            batch = []
+    if batch:
+        r, s = _render_batch(batch, workers, force)
+        updated, skipped = updated + r, skipped + s
+    return updated, skipped
+
+
+def _render_batch(payslips, workers, force):
+    changed = []
+    to_render = {}
+    skipped = 0
+    for payslip in payslips:
+        data = payslip_pdf_data(payslip)
+        name = payslip_pdf_name(data)
+        if payslip.pdf_file.name == name and not force and default_storage.exists(name):
+            skipped += 1
+            continue
+        if force or not default_storage.exists(name):
+            to_render.setdefault(name, data)
+        payslip.pdf_file.name = name
+        changed.append(payslip)
+
+    names = list(to_render)
+    for name, pdf in zip(names, _render_all(list(to_render.values()), workers)):
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(pdf))
+
+    Payslip.objects.bulk_update(changed, ['pdf_file'])
+    return len(changed), skipped
+
+
+def ensure_payslip_pdf(payslip):
+    """Render a single payslip's PDF if it is missing or stale; returns its storage name."""
+    render_payslip_pdfs([payslip], workers=1)
+    return payslip.pdf_file.name
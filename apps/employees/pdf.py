@@ -0,0 +1,124 @@
+"""
+Minimal PDF writer for payslips.
+
+Produces small single-page PDFs using the standard Helvetica fonts, so no
+PDF library is needed. Output is deterministic (no timestamps or random
+IDs): the same payslip data always yields the same bytes. Functions here
+take plain dicts and don't touch the database, so they can run in worker
+processes.
+"""
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+
+def _escape(text):
+    text = str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('cp1252', errors='replace').decode('latin-1')
+
+
+class Page:
+    """Collects drawing operators for one page."""
+
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, text, size=10, bold=False, align='left'):
+        if align == 'right':
+            # Helvetica averages ~0.5em per character; close enough for right-aligned amounts
+            x -= len(str(text)) * size * 0.5
+        font = 'F2' if bold else 'F1'
+        self.ops.append(f'BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET')
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.ops.append(f'{width} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S')
+
+    def rect(self, x, y, width, height, gray=0.93):
+        self.ops.append(f'{gray} g {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f 0 g')
+
+    def build(self):
+        """Return the complete PDF document as bytes."""
+        content = '\n'.join(self.ops).encode('latin-1')
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+            (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+             f'/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> /Contents 4 0 R >>').encode(),
+            b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        ]
+
+        out = bytearray(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        for offset in offsets:
+            out += b'%010d 00000 n \n' % offset
+        out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+        return bytes(out)
+
+
+def _money(value):
+    return f'${float(value):,.2f}'
+
+
+def render_payslip(data):
+    """
+    Render a payslip PDF from a plain dict (see services.payslip_pdf_data).
+
+    `earnings` and `deductions` in the dict are lists of (label, amount)
+    pairs; when empty the totals are shown as single lines.
+    """
+    page = Page()
+    left, right = MARGIN, PAGE_WIDTH - MARGIN
+    y = PAGE_HEIGHT - MARGIN
+
+    page.text(left, y - 10, data['company'], size=18, bold=True)
+    page.text(right, y - 10, 'PAYSLIP', size=14, bold=True, align='right')
+    y -= 30
+    page.line(left, y, right, y, width=1)
+
+    y -= 25
+    rows = [
+        ('Employee', data['employee_name'], 'Pay period', f"{data['period_start']} to {data['period_end']}"),
+        ('Employee ID', data['employee_id'], 'Pay date', data['pay_date']),
+        ('Department', data['department'] or '-', 'Job title', data['job_title'] or '-'),
+    ]
+    for label, value, label2, value2 in rows:
+        page.text(left, y, label, size=9)
+        page.text(left + 80, y, value, size=10, bold=True)
+        page.text(320, y, label2, size=9)
+        page.text(400, y, value2, size=10, bold=True)
+        y -= 18
+
+    for title, items, total_label, total in (
+        ('Earnings', data['earnings'] or [('Gross pay', data['gross_pay'])], 'Gross pay', data['gross_pay']),
+        ('Deductions', data['deductions'] or [('Total deductions', data['total_deductions'])],
+         'Total deductions', data['total_deductions']),
+    ):
+        y -= 20
+        page.rect(left, y - 6, right - left, 20)
+        page.text(left + 8, y, title, size=11, bold=True)
+        page.text(right - 8, y, 'Amount', size=11, bold=True, align='right')
+        y -= 22
+        for label, amount in items:
+            page.text(left + 8, y, label, size=10)
+            page.text(right - 8, y, _money(amount), size=10, align='right')
+            y -= 16
+        page.line(left, y + 8, right, y + 8)
+        page.text(left + 8, y - 6, total_label, size=10, bold=True)
+        page.text(right - 8, y - 6, _money(total), size=10, bold=True, align='right')
+        y -= 24
+
+    y -= 16
+    page.rect(left, y - 10, right - left, 30, gray=0.85)
+    page.text(left + 8, y, 'NET PAY', size=13, bold=True)
+    page.text(right - 8, y, _money(data['net_pay']), size=13, bold=True, align='right')
+
+    page.text(left, MARGIN, 'This payslip was generated electronically and does not require a signature.', size=8)
+    return page.build()
@@ -1,11 +1,27 @@
 from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.utils import timezone
+from django.utils.html import conditional_escape, format_html, format_html_join, strip_tags
 from django.conf import settings
-from .models import Notification
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from apps.core import metrics
+from apps.core.mail import MAX_PERSONALIZATIONS, Recipient, get_transport
+from apps.core.services import reserve_ids
+from .models import Employee, Notification
+from .notifications import notify_changed
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
 import logging
 import os
+import time
 
 logger = logging.getLogger(__name__)
+User = get_user_model()
+
+EMPLOYEE_ID_PREFIX = 'ETH'
+EMPLOYEE_ID_SEQUENCE = 'employee_id'
+FIRST_EMPLOYEE_NUMBER = 1001
 
 
 def get_base_url():
@@ -13,73 +29,256 @@ def get_base_url():
     return os.environ.get('BASE_URL', 'http://127.0.0.1:8000')
 
 
+def _highest_employee_number():
+    """Find the highest numeric part among existing employee IDs (EMP/ETH prefixes)."""
+    highest = 0
+    for emp_id in Employee.objects.values_list('employee_id', flat=True).iterator():
+        num_part = ''.join(filter(str.isdigit, emp_id))
+        if num_part:
+            highest = max(highest, int(num_part))
+    return highest
+
+
+def _employee_number_floor():
+    """Where the sequence starts: after the highest existing ID, and never below ETH1001."""
+    return max(_highest_employee_number(), FIRST_EMPLOYEE_NUMBER - 1)
+
+
+def allocate_employee_ids(count=1):
+    """Reserve `count` new employee IDs (e.g. ETH1042) from the shared sequence."""
+    numbers = reserve_ids(EMPLOYEE_ID_SEQUENCE, count, initial=_employee_number_floor)
+    return [f"{EMPLOYEE_ID_PREFIX}{number:04d}" for number in numbers]
+
+
 def create_notification(recipient, notification_type, title, message, link=''):
-    """Create an in-app notification."""
-    return Notification.objects.create(
+    """Create an in-app notification and push it to the recipient's open tabs."""
+    notification = Notification.objects.create(
         recipient=recipient,
         notification_type=notification_type,
         title=title,
         message=message,
         link=link
     )
+    transaction.on_commit(lambda: notify_changed([recipient.user_id], notification))
+    return notification
+
+
+def broadcast_notification(title, message, link='', departments=None, roles=None,
+                           notification_type=Notification.Type.GENERAL, batch_size=1000):
+    """
+    Send the same notification to many employees at once.
+
+    Recipients are active or on-leave employees, optionally limited to
+    `departments` (Department instances or ids) and/or user `roles`. Rows are
+    inserted with one bulk_create per `batch_size` recipients while streaming
+    ids from the database. Returns the number of notifications created.
+    """
+    recipients = Employee.objects.filter(status__in=[Employee.Status.ACTIVE, Employee.Status.ON_LEAVE])
+    if departments:
+        recipients = recipients.filter(department__in=departments)
+    if roles:
+        recipients = recipients.filter(user__role__in=roles)
+    recipients = recipients.order_by('pk').values_list('pk', 'user_id')
+
+    user_ids = []
+    with transaction.atomic():
+        batch = []
+        for employee_id, user_id in recipients.iterator(chunk_size=batch_size):
+            batch.append(Notification(
+                recipient_id=employee_id, notification_type=notification_type,
+                title=title, message=message, link=link,
+            ))
+            user_ids.append(user_id)
+            if len(batch) >= batch_size:
+                Notification.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Notification.objects.bulk_create(batch)
+        transaction.on_commit(lambda: notify_changed(user_ids))
+    return len(user_ids)
+
+
+def _from_email():
+    return os.environ.get('SENDGRID_FROM_EMAIL', settings.DEFAULT_FROM_EMAIL)
 
 
 def send_email_notification(to_email, subject, template_name, context):
-    """Send an email notification using SendGrid HTTP API."""
+    """Send an email notification through the configured mail transport."""
+    return send_email_batch(subject, template_name, [Recipient(to_email)], context) == 1
+
+
+def send_email_batch(subject, template_name, recipients, context=None):
+    """
+    Send one template to many recipients with as few API requests as possible.
+
+    The template is rendered once with `context`; per-recipient values are
+    passed as each Recipient's substitutions and replaced in the rendered
+    body by the provider (see substitution_tag). Substituted values are
+    HTML-escaped here (unless marked safe) since they bypass template
+    autoescaping, so keep them out of `subject`. Returns the number of recipients accepted.
+    """
+    started = time.perf_counter()
+    recipients = list(recipients)
+    outcome = 'error'
+    accepted = 0
     try:
-        from sendgrid import SendGridAPIClient
-        from sendgrid.helpers.mail import Mail, Email, To, Content
-        
-        api_key = os.environ.get('SENDGRID_API_KEY')
-        from_email = os.environ.get('SENDGRID_FROM_EMAIL', settings.DEFAULT_FROM_EMAIL)
-        
-        if not api_key:
+        transport = get_transport()
+        if transport is None:
             logger.warning("SENDGRID_API_KEY not set, skipping email")
-            return False
-        
-        html_content = render_to_string(template_name, context)
+            outcome = 'skipped'
+            return 0
         
-        message = Mail(
-            from_email=from_email,
-            to_emails=to_email,
-            subject=subject,
-            html_content=html_content
-        )
+        html_content = render_to_string(template_name, context or {})
+        recipients = [
+            Recipient(r.email, {key: conditional_escape(value) for key, value in r.substitutions.items()})
+            for r in recipients
+        ]
+        accepted = transport.send(_from_email(), subject, html_content, recipients)
         
-        sg = SendGridAPIClient(api_key)
-        response = sg.send(message)
-        
-        logger.info(f"Email sent to {to_email}: {subject} (status: {response.status_code})")
-        return response.status_code in [200, 201, 202]
+        logger.info(f"Email '{subject}' accepted for {accepted}/{len(recipients)} recipients")
+        outcome = 'sent' if accepted == len(recipients) else 'failed'
+        return accepted
         
     except Exception as e:
-        logger.error(f"Email failed to {to_email}: {str(e)}")
-        return False
+        logger.error(f"Email '{subject}' failed: {str(e)}")
+        return accepted
+    finally:
+        metrics.record_email(outcome, time.perf_counter() - started, count=max(len(recipients), 1))
+
+
+def substitution_tag(name):
+    """Placeholder rendered into a batch template and replaced per recipient."""
+    return f'%{name}%'
 
 
 def send_welcome_email(employee, password):
     """Send welcome email with login credentials to new employee."""
+    return send_welcome_emails([(employee, password)]) == 1
+
+
+def send_welcome_emails(accounts):
+    """
+    Send welcome emails for many new employees as one batch.
+    
+    `accounts` is a list of (employee, password) pairs. Returns the number of
+    emails accepted.
+    """
     base_url = get_base_url()
+    fields = ['first_name', 'email', 'employee_id', 'password']
+    tag = {name: substitution_tag(name) for name in fields}
     
-    return send_email_notification(
-        to_email=employee.user.email,
+    return send_email_batch(
         subject='Welcome to Ethos HRMS - Your Account Details',
         template_name='emails/welcome.html',
+        recipients=[
+            Recipient(employee.user.email, {
+                tag['first_name']: employee.first_name,
+                tag['email']: employee.user.email,
+                tag['employee_id']: employee.employee_id,
+                tag['password']: password,
+            })
+            for employee, password in accounts
+        ],
         context={
-            'employee': employee,
-            'password': password,
+            'employee': {
+                'first_name': tag['first_name'],
+                'employee_id': tag['employee_id'],
+                'user': {'email': tag['email']},
+            },
+            'password': tag['password'],
             'login_url': f'{base_url}/accounts/login/',
             'base_url': base_url
         }
     )
 
 
+def _email_notification(notification, subject, template_name, context):
+    """
+    Email a notification now, unless its recipient has chosen the daily
+    digest (send_notification_digests picks it up instead).
+    """
+    user = notification.recipient.user
+    if user.notification_email == User.NotificationEmail.DIGEST:
+        return False
+    sent = send_email_notification(user.email, subject, template_name, context)
+    if sent:
+        Notification.objects.filter(pk=notification.pk).update(emailed_at=timezone.now())
+    return sent
+
+
+DIGEST_MAX_ITEMS = 20
+
+
+def send_notification_digests(days=2, batch_size=MAX_PERSONALIZATIONS):
+    """
+    Email each digest subscriber one summary of their unread, un-emailed
+    notifications from the last `days` days.
+
+    The digest template is rendered once; each person's list is passed as
+    substitutions and up to `batch_size` people share one API request.
+    Notifications are marked emailed only when their batch was accepted, so
+    a failed run is retried the next time. Returns (people, notifications)
+    emailed.
+    """
+    since = timezone.now() - timedelta(days=days)
+    pending = Notification.objects.filter(
+        is_read=False,
+        emailed_at__isnull=True,
+        created_at__gte=since,
+        recipient__user__notification_email=User.NotificationEmail.DIGEST,
+    ).order_by('recipient_id', '-created_at').values_list(
+        'pk', 'recipient_id', 'recipient__first_name', 'recipient__user__email', 'title', 'message',
+    )
+    
+    base_url = get_base_url()
+    tag = {name: substitution_tag(name) for name in ['first_name', 'count', 'items']}
+    context = {
+        'first_name': tag['first_name'],
+        'count': tag['count'],
+        'items': tag['items'],
+        'base_url': base_url,
+    }
+    
+    people = emailed = 0
+    batch, batch_ids = [], []
+    
+    def flush():
+        nonlocal people, emailed
+        accepted = send_email_batch('Your Ethos HRMS updates', 'emails/digest.html', batch, context)
+        if accepted == len(batch):
+            Notification.objects.filter(pk__in=batch_ids).update(emailed_at=timezone.now())
+            people += len(batch)
+            emailed += len(batch_ids)
+    
+    rows = pending.iterator(chunk_size=2000)
+    for _, group in groupby(rows, key=itemgetter(1)):
+        group = list(group)
+        _, _, first_name, email, _, _ = group[0]
+        items = format_html_join('', '<li><strong>{}</strong> - {}</li>', (
+            (title, message) for _, _, _, _, title, message in group[:DIGEST_MAX_ITEMS]
+        ))
+        if len(group) > DIGEST_MAX_ITEMS:
+            items += format_html('<li>and {} more</li>', len(group) - DIGEST_MAX_ITEMS)
+        batch.append(Recipient(email, {
+            tag['first_name']: first_name,
+            tag['count']: len(group),
+            tag['items']: items,
+        }))
+        batch_ids.extend(pk for pk, *_ in group)
+        if len(batch) >= batch_size:
+            flush()
+            batch, batch_ids = [], []
+    if batch:
+        flush()
+    return people, emailed
+
+
 def notify_leave_approved(leave_request):
     """Notify employee that their leave request was approved."""
     employee = leave_request.employee
     base_url = get_base_url()
     
-    create_notification(
+    notification = create_notification(
         recipient=employee,
         notification_type=Notification.Type.LEAVE_APPROVED,
         title='Leave Request Approved',
@@ -87,8 +286,8 @@ def notify_leave_approved(leave_request):
         link='/employee/leave/'
     )
     
-    send_email_notification(
-        to_email=employee.user.email,
+    _email_notification(
+        notification,
         subject='Leave Request Approved - Ethos HRMS',
         template_name='emails/leave_approved.html',
         context={
@@ -104,7 +303,7 @@ def notify_leave_rejected(leave_request):
     employee = leave_request.employee
     base_url = get_base_url()
     
-    create_notification(
+    notification = create_notification(
         recipient=employee,
         notification_type=Notification.Type.LEAVE_REJECTED,
         title='Leave Request Rejected',
@@ -112,8 +311,8 @@ def notify_leave_rejected(leave_request):
         link='/employee/leave/'
     )
     
-    send_email_notification(
-        to_email=employee.user.email,
+    _email_notification(
+        notification,
         subject='Leave Request Update - Ethos HRMS',
         template_name='emails/leave_rejected.html',
         context={
@@ -129,7 +328,7 @@ def notify_correction_approved(correction):
     employee = correction.employee
     base_url = get_base_url()
     
-    create_notification(
+    notification = create_notification(
         recipient=employee,
         notification_type=Notification.Type.CORRECTION_APPROVED,
         title='Attendance Correction Approved',
@@ -137,8 +336,8 @@ def notify_correction_approved(correction):
         link='/employee/attendance/'
     )
     
-    send_email_notification(
-        to_email=employee.user.email,
+    _email_notification(
+        notification,
         subject='Attendance Correction Approved - Ethos HRMS',
         template_name='emails/correction_approved.html',
         context={
@@ -154,7 +353,7 @@ def notify_correction_rejected(correction):
     employee = correction.employee
     base_url = get_base_url()
     
-    create_notification(
+    notification = create_notification(
         recipient=employee,
         notification_type=Notification.Type.CORRECTION_REJECTED,
         title='Attendance Correction Rejected',
@@ -162,8 +361,8 @@ def notify_correction_rejected(correction):
         link='/employee/attendance/'
     )
     
-    send_email_notification(
-        to_email=employee.user.email,
+    _email_notification(
+        notification,
         subject='Attendance Correction Update - Ethos HRMS',
         template_name='emails/correction_rejected.html',
         context={
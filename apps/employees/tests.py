@@ -1,3 +1,457 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core import mail, metrics
+from apps.core.cache import tiered
+
+from .models import Attendance, Department, Employee, LeaveRequest, Notification, PayrollRun, Payslip
+from .payroll import calculate_pay, deduction_rules, run_payroll
+from .payslips import payslip_pdf_data, render_payslip_pdfs
+from .pdf import render_payslip
+from .notifications import notify_changed, unread_state
+from .services import (
+    allocate_employee_ids, broadcast_notification, create_notification, notify_leave_approved,
+    send_email_notification, send_notification_digests, send_welcome_emails,
+)
+
+User = get_user_model()
+
+
+class EmployeeIdAllocationTests(TestCase):
+    """Tests for employee ID allocation."""
+    
+    def test_continues_from_existing_employee_ids(self):
+        user = User.objects.create_user(email='jane.doe@ethos.com', password='x')
+        Employee.objects.create(
+            user=user, employee_id='ETH1050', first_name='Jane', last_name='Doe',
+            job_title='Analyst', start_date=date(2024, 1, 1), salary=50000,
+        )
+        self.assertEqual(allocate_employee_ids(), ['ETH1051'])
+        self.assertEqual(allocate_employee_ids(3), ['ETH1052', 'ETH1053', 'ETH1054'])
+    
+    def test_starts_at_1001_without_employees(self):
+        self.assertEqual(allocate_employee_ids(2), ['ETH1001', 'ETH1002'])
+
+
+class GenerateDatasetTests(TestCase):
+    """Tests for the synthetic dataset generator."""
+    
+    def test_generates_related_data(self):
+        call_command('generate_dataset', employees=12, days=60, seed=7, stdout=StringIO())
+        
+        self.assertEqual(Employee.objects.count(), 12)
+        self.assertEqual(Employee.history.count(), 12)
+        self.assertTrue(Employee.objects.filter(manager__isnull=False).exists())
+        self.assertTrue(Attendance.objects.exists())
+        self.assertTrue(Payslip.objects.exists())
+        self.assertTrue(LeaveRequest.objects.exists())
+        self.assertTrue(Notification.objects.exists())
+        self.assertFalse(Attendance.objects.filter(date__gte=date.today()).exists())
+
+
+class EmailMetricsTests(TestCase):
+    """Tests for email outcome metrics."""
+    
+    def test_records_skipped_send(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        with mock.patch.dict(os.environ), self.assertLogs('apps.employees.services', level='WARNING'):
+            os.environ.pop('SENDGRID_API_KEY', None)
+            sent = send_email_notification('a@b.com', 'Hi', 'emails/welcome.html', {})
+        
+        self.assertFalse(sent)
+        self.assertEqual(metrics.collect()['hrms_emails_total'], {('skipped',): 1})
+
+
+@override_settings(EMAIL_TRANSPORT='locmem')
+class BatchEmailTests(TestCase):
+    """Tests for batched template emails."""
+    
+    def setUp(self):
+        mail.outbox.clear()
+        self.addCleanup(mail.outbox.clear)
+        self.enterContext(self.assertLogs('apps.employees.services', level='INFO'))
+    
+    def test_welcome_emails_share_one_request(self):
+        accounts = []
+        for i, name in enumerate(['Ann', 'Bob <b>']):
+            user = User.objects.create_user(email=f'user{i}@ethos.com', password='x')
+            employee = Employee.objects.create(
+                user=user, employee_id=f'ETH{i:04d}', first_name=name, last_name='Doe',
+                start_date=date(2024, 1, 1), salary=60000,
+            )
+            accounts.append((employee, f'secret{i}'))
+        
+        self.assertEqual(send_welcome_emails(accounts), 2)
+        [payload] = mail.outbox
+        body = payload['content'][0]['value']
+        self.assertIn('Hi %first_name%', body)
+        second = payload['personalizations'][1]
+        self.assertEqual(second['to'], [{'email': 'user1@ethos.com'}])
+        self.assertEqual(second['substitutions']['%first_name%'], 'Bob &lt;b&gt;')
+        self.assertEqual(second['substitutions']['%password%'], 'secret1')
+
+
+class PayslipPdfTests(TestCase):
+    """Tests for payslip PDF rendering and downloads."""
+    
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        user = User.objects.create_user(email='jane.doe@ethos.com', password='x')
+        self.employee = Employee.objects.create(
+            user=user, employee_id='ETH0001', first_name='Jane', last_name='Doe',
+            job_title='Analyst', start_date=date(2024, 1, 1), salary=60000,
+        )
+        self.payslips = [
+            Payslip.objects.create(
+                employee=self.employee, pay_period_start=date(2025, month, 1),
+                pay_period_end=date(2025, month, 28), pay_date=date(2025, month, 28),
+                gross_pay=5000, deductions=1250, net_pay=3750,
+            )
+            for month in (1, 2)
+        ]
+    
+    def test_renders_deterministic_pdf(self):
+        data = payslip_pdf_data(self.payslips[0])
+        pdf = render_payslip(data)
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertTrue(pdf.rstrip().endswith(b'%%EOF'))
+        self.assertIn(b'Jane Doe', pdf)
+        self.assertEqual(pdf, render_payslip(data))
+    
+    def test_rerun_skips_unchanged_payslips(self):
+        self.assertEqual(render_payslip_pdfs(Payslip.objects.all(), workers=1), (2, 0))
+        self.assertEqual(render_payslip_pdfs(Payslip.objects.all(), workers=1), (0, 2))
+        
+        Payslip.objects.filter(pk=self.payslips[0].pk).update(net_pay=3800)
+        self.assertEqual(render_payslip_pdfs(Payslip.objects.all(), workers=1), (1, 1))
+    
+    def test_command_renders_period(self):
+        out = StringIO()
+        call_command('render_payslips', period='2025-02', workers=1, stdout=out)
+        self.assertIn('1 payslip PDFs written', out.getvalue())
+        self.assertFalse(Payslip.objects.get(pk=self.payslips[0].pk).pdf_file)
+        self.assertTrue(Payslip.objects.get(pk=self.payslips[1].pk).pdf_file)
+    
+    def test_download_streams_with_etag(self):
+        self.client.force_login(self.employee.user)
+        url = reverse('employees:payslip_download', args=[self.payslips[0].pk])
+        response = self.client.get(url)
+        
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag = response['ETag']
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"stale", {etag}')
+        self.assertEqual(response.status_code, 304)
+        # A header that merely contains the tag is not a match
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"stale{etag}"')
+        self.assertEqual(response.status_code, 200)
+        
+        other = User.objects.create_user(email='john.roe@ethos.com', password='x')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class PayrollTests(TestCase):
+    """Tests for payroll runs."""
+    
+    def _employee(self, employee_id, salary, start_date=date(2024, 1, 1), status=Employee.Status.ACTIVE):
+        user = User.objects.create_user(email=f'{employee_id.lower()}@ethos.com', password='x')
+        return Employee.objects.create(
+            user=user, employee_id=employee_id, first_name='Pat', last_name=employee_id,
+            job_title='Analyst', start_date=start_date, salary=salary, status=status,
+        )
+    
+    def test_calculates_deductions_from_rules(self):
+        gross, deductions, net, details = calculate_pay(Decimal('60000'), 31, 31, deduction_rules())
+        
+        self.assertEqual(gross, Decimal('5000.00'))
+        self.assertEqual(deductions, Decimal('1382.50'))
+        self.assertEqual(net, Decimal('3617.50'))
+        self.assertEqual(details['deductions']['Medicare'], '72.50')
+    
+    def test_run_is_idempotent_per_period(self):
+        paid = self._employee('ETH0001', 60000)
+        new_starter = self._employee('ETH0002', 62000, start_date=date(2025, 1, 17))
+        self._employee('ETH0003', 50000, status=Employee.Status.TERMINATED)
+        
+        run = run_payroll(date(2025, 1, 1), date(2025, 1, 31))
+        self.assertEqual(run.employee_count, 2)
+        self.assertEqual(run.total_net, Decimal('3617.50') + new_starter.payslips.get().net_pay)
+        self.assertEqual(new_starter.payslips.get().gross_pay, Decimal('2500.00'))
+        self.assertEqual(Notification.objects.filter(notification_type='payslip_available').count(), 2)
+        
+        self.assertEqual(run_payroll(date(2025, 1, 1), date(2025, 1, 31)), run)
+        self.assertEqual(Payslip.objects.count(), 2)
+        
+        Employee.objects.filter(pk=paid.pk).update(salary=72000)
+        run = run_payroll(date(2025, 1, 1), date(2025, 1, 31), rerun=True, notify=False)
+        self.assertEqual(Payslip.objects.count(), 2)
+        self.assertEqual(paid.payslips.get().gross_pay, Decimal('6000.00'))
+        self.assertEqual(PayrollRun.objects.count(), 1)
+        
+        history = paid.payslips.get().history.order_by('history_date')
+        self.assertEqual([record.history_type for record in history], ['+', '~'])
+        self.assertEqual(history.last().gross_pay, Decimal('6000.00'))
+    
+    def test_skips_employees_paid_outside_a_run(self):
+        employee = self._employee('ETH0001', 60000)
+        Payslip.objects.create(
+            employee=employee, pay_period_start=date(2025, 1, 1), pay_period_end=date(2025, 1, 31),
+            pay_date=date(2025, 1, 31), gross_pay=5000, deductions=0, net_pay=5000,
+        )
+        out = StringIO()
+        call_command('run_payroll', period='2025-01', stdout=out)
+        
+        self.assertIn('0 payslips', out.getvalue())
+        self.assertEqual(Payslip.objects.count(), 1)
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class PayslipHistoryTests(TestCase):
+    """Tests for the year-by-year payslip page."""
+    
+    def setUp(self):
+        user = User.objects.create_user(email='jane.doe@ethos.com', password='x')
+        self.employee = Employee.objects.create(
+            user=user, employee_id='ETH0001', first_name='Jane', last_name='Doe',
+            start_date=date(2023, 1, 1), salary=60000,
+        )
+        for year, month in ((2024, 11), (2024, 12), (2025, 1)):
+            Payslip.objects.create(
+                employee=self.employee, pay_period_start=date(year, month, 1),
+                pay_period_end=date(year, month, 28), pay_date=date(year, month, 28),
+                gross_pay=5000, deductions=1250, net_pay=3750,
+                details={'earnings': {'Base salary': '5000.00'}, 'deductions': {'Income tax': '1250.00'}},
+            )
+        self.client.force_login(user)
+    
+    def test_pages_by_year_with_totals(self):
+        response = self.client.get(reverse('employees:payslips'))
+        self.assertEqual([y['year'] for y in response.context['years']], [2025, 2024])
+        self.assertEqual(len(response.context['payslips']), 1)
+        
+        response = self.client.get(reverse('employees:payslips'), {'year': 2024})
+        totals = response.context['year_totals']
+        self.assertEqual((totals['count'], totals['gross'], totals['net']), (2, 10000, 7500))
+        payslips = list(response.context['payslips'])
+        self.assertEqual(len(payslips), 2)
+        self.assertIn('details', payslips[0].get_deferred_fields())
+    
+    def test_detail_partial_is_owner_only(self):
+        payslip = self.employee.payslips.first()
+        response = self.client.get(reverse('employees:payslip_detail', args=[payslip.pk]))
+        self.assertContains(response, 'Income tax')
+        
+        other = User.objects.create_user(email='john.roe@ethos.com', password='x')
+        Employee.objects.create(
+            user=other, employee_id='ETH0002', first_name='John', last_name='Roe',
+            start_date=date(2023, 1, 1), salary=60000,
+        )
+        self.client.force_login(other)
+        response = self.client.get(reverse('employees:payslip_detail', args=[payslip.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class LiveNotificationTests(TestCase):
+    """Tests for the cached unread count, polling endpoint and SSE stream."""
+    
+    def setUp(self):
+        tiered.clear()
+        self.user = User.objects.create_user(email='jane.doe@ethos.com', password='x')
+        self.employee = Employee.objects.create(
+            user=self.user, employee_id='ETH0001', first_name='Jane', last_name='Doe',
+            start_date=date(2024, 1, 1), salary=60000,
+        )
+    
+    def test_unread_state_is_cached_until_changed(self):
+        self.assertEqual(unread_state(self.user.pk)['count'], 0)
+        with self.assertNumQueries(0):
+            unread_state(self.user.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(self.employee, Notification.Type.GENERAL, 'Hello', 'World')
+        self.assertEqual(unread_state(self.user.pk)['count'], 1)
+    
+    def test_polling_endpoint_uses_etag(self):
+        self.client.force_login(self.user)
+        url = reverse('employees:notifications_unread')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['count'], 0)
+        
+        etag = response['ETag']
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"stale{etag}"').status_code, 200)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(self.employee, Notification.Type.GENERAL, 'Hello', 'World')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['count'], 1)
+    
+    def test_stream_declined_under_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('employees:notifications_stream'))
+        self.assertEqual(response.status_code, 204)
+    
+    async def test_stream_pushes_new_notifications(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('employees:notifications_stream'))
+        events = aiter(response.streaming_content)
+        self.assertIn(b'event: count\ndata: {"count": 0', await anext(events))
+        
+        notification = await sync_to_async(Notification.objects.create)(
+            recipient=self.employee, notification_type=Notification.Type.GENERAL, title='Hello', message='World',
+        )
+        await sync_to_async(notify_changed)([self.user.pk], notification)
+        self.assertIn(b'event: notification', await anext(events))
+        self.assertIn(b'"count": 1', await anext(events))
+
+
+class BroadcastNotificationTests(TestCase):
+    """Tests for announcement fan-out."""
+    
+    def setUp(self):
+        self.sales, engineering = Department.objects.bulk_create([Department(name='Sales'), Department(name='Engineering')])
+        people = [
+            ('ann', self.sales, 'employee', Employee.Status.ACTIVE),
+            ('bob', self.sales, 'manager', Employee.Status.ON_LEAVE),
+            ('cat', engineering, 'employee', Employee.Status.ACTIVE),
+            ('dan', engineering, 'hr', Employee.Status.TERMINATED),
+        ]
+        for i, (name, department, role, status) in enumerate(people):
+            user = User.objects.create_user(email=f'{name}@ethos.com', password='x', role=role)
+            Employee.objects.create(
+                user=user, employee_id=f'ETH{i:04d}', first_name=name.title(), last_name='Doe',
+                department=department, start_date=date(2024, 1, 1), salary=60000, status=status,
+            )
+    
+    def test_targets_current_employees_in_batches(self):
+        with CaptureQueriesContext(connection) as ctx:
+            count = broadcast_notification('Office closed', 'See you Monday', batch_size=2)
+        self.assertEqual(count, 3)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertFalse(Notification.objects.filter(recipient__status=Employee.Status.TERMINATED).exists())
+    
+    def test_filters_by_department_and_role(self):
+        self.assertEqual(broadcast_notification('Sales', 'Targets', departments=[self.sales]), 2)
+        self.assertEqual(broadcast_notification('Managers', 'Meeting', roles=['manager']), 1)
+        self.assertEqual(
+            set(Notification.objects.filter(title='Sales').values_list('recipient__first_name', flat=True)),
+            {'Ann', 'Bob'},
+        )
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class NotificationRetentionTests(TestCase):
+    """Tests for notification paging, mark-all-read and purging."""
+    
+    def setUp(self):
+        tiered.clear()
+        self.user = User.objects.create_user(email='jane.doe@ethos.com', password='x')
+        self.employee = Employee.objects.create(
+            user=self.user, employee_id='ETH0001', first_name='Jane', last_name='Doe',
+            start_date=date(2024, 1, 1), salary=60000,
+        )
+        Notification.objects.bulk_create([
+            Notification(recipient=self.employee, title=f'Notice {i}', message='Hello') for i in range(60)
+        ])
+        # Rows sharing a timestamp must still page without gaps or repeats
+        Notification.objects.update(created_at=timezone.now())
+        self.client.force_login(self.user)
+    
+    def test_keyset_pages_cover_every_notification_once(self):
+        response = self.client.get(reverse('employees:notifications'))
+        seen = [n.pk for n in response.context['notifications']]
+        self.assertEqual(len(seen), 50)
+        response = self.client.get(reverse('employees:notifications'), {'before': response.context['next_cursor']})
+        seen += [n.pk for n in response.context['notifications']]
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(sorted(seen, reverse=True), seen)
+        self.assertEqual(len(set(seen)), 60)
+    
+    def test_mark_all_read_returns_updated_count(self):
+        url = reverse('employees:mark_all_notifications_read')
+        self.assertEqual(self.client.get(url).status_code, 405)
+        response = self.client.post(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json(), {'updated': 60})
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+    
+    def test_purge_deletes_only_old_read_notifications(self):
+        old = timezone.now() - timedelta(days=100)
+        pks = list(Notification.objects.values_list('pk', flat=True)[:30])
+        Notification.objects.filter(pk__in=pks[:20]).update(is_read=True, created_at=old)
+        Notification.objects.filter(pk__in=pks[20:]).update(created_at=old)
+        out = StringIO()
+        call_command('purge_notifications', days=90, batch_size=7, stdout=out)
+        self.assertIn('Deleted 20', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 40)
+
+
+@override_settings(EMAIL_TRANSPORT='locmem')
+class NotificationDigestTests(TestCase):
+    """Tests for instant vs. digest notification emails."""
+    
+    def setUp(self):
+        mail.outbox.clear()
+        self.addCleanup(mail.outbox.clear)
+        self.enterContext(self.assertLogs('apps.employees.services', level='INFO'))
+        self.employees = {}
+        for i, (name, preference) in enumerate([('ann', 'digest'), ('bob', 'digest'), ('cat', 'instant')]):
+            user = User.objects.create_user(email=f'{name}@ethos.com', password='x', notification_email=preference)
+            self.employees[name] = Employee.objects.create(
+                user=user, employee_id=f'ETH{i:04d}', first_name=name.title(), last_name='Doe',
+                start_date=date(2024, 1, 1), salary=60000,
+            )
+    
+    def approve_leave(self, name):
+        leave = LeaveRequest.objects.create(
+            employee=self.employees[name], leave_type=LeaveRequest.LeaveType.ANNUAL,
+            start_date=date(2025, 3, 3), end_date=date(2025, 3, 4), reason='Trip',
+        )
+        notify_leave_approved(leave)
+    
+    def test_instant_users_are_emailed_immediately(self):
+        self.approve_leave('cat')
+        self.approve_leave('ann')
+        self.assertEqual([p['personalizations'][0]['to'][0]['email'] for p in mail.outbox], ['cat@ethos.com'])
+        self.assertTrue(Notification.objects.get(recipient__first_name='Cat').emailed_at)
+        self.assertIsNone(Notification.objects.get(recipient__first_name='Ann').emailed_at)
+    
+    def test_digests_batch_pending_notifications_once(self):
+        for name in ['ann', 'ann', 'bob', 'cat']:
+            self.approve_leave(name)
+        mail.outbox.clear()
+        
+        self.assertEqual(send_notification_digests(), (2, 3))
+        [payload] = mail.outbox
+        ann = payload['personalizations'][0]
+        self.assertEqual(ann['to'], [{'email': 'ann@ethos.com'}])
+        self.assertEqual(ann['substitutions']['%count%'], '2')
+        self.assertIn('<li><strong>Leave Request Approved</strong>', ann['substitutions']['%items%'])
+        self.assertIn('%items%', payload['content'][0]['value'])
+        
+        self.assertEqual(send_notification_digests(), (0, 0))
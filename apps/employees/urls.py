@@ -9,10 +9,16 @@ urlpatterns = [
     path('attendance/', views.attendance_view, name='attendance'),
     path('attendance/correction/', views.request_attendance_correction, name='request_correction'),
     path('payslips/', views.payslips_view, name='payslips'),
+    path('payslips/<int:pk>/', views.payslip_detail, name='payslip_detail'),
+    path('payslips/<int:pk>/pdf/', views.payslip_download, name='payslip_download'),
     path('leave/', views.leave_request_view, name='leave_request'),
     path('api/check-balance/', views.check_leave_balance, name='check_balance'),
     path('settings/', views.EmployeeSettingsView.as_view(), name='settings'),
+    path('settings/notification-email/', views.update_notification_email, name='update_notification_email'),
     path('api/calendar/', views.attendance_calendar, name='attendance_calendar'),
     path('notifications/', views.notifications_view, name='notifications'),
     path('notifications/<int:pk>/read/', views.mark_notification_read, name='mark_notification_read'),
+    path('notifications/read-all/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
+    path('notifications/unread/', views.notifications_unread, name='notifications_unread'),
+    path('notifications/stream/', views.notifications_stream, name='notifications_stream'),
 ]
\ No newline at end of file
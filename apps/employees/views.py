@@ -3,15 +3,32 @@ Employee self-service views.
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.http import parse_etags, url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractYear
 from apps.core.mixins import EmployeeRequiredMixin
 from django.views.generic import TemplateView, UpdateView
 from .models import Employee, Attendance, Payslip, LeaveRequest, AttendanceCorrection, Notification
 from .forms import LeaveRequestForm, ProfileUpdateForm
+from .notifications import broker, notify_changed, state_etag, unread_state
+from .payslips import ensure_payslip_pdf
+from asgiref.sync import sync_to_async
 from datetime import datetime, timedelta, date
+import asyncio
+import json
+
+User = get_user_model()
 
 
 
@@ -153,16 +170,79 @@ def attendance_view(request):
 
 @login_required
 def payslips_view(request):
-    """View payslips."""
+    """View payslips one year at a time, with year-to-date totals."""
     employee = get_object_or_404(Employee, user=request.user)
-    payslips = employee.payslips.all()
+    
+    # Per-year totals for every year in one grouped query; also drives the year tabs
+    years = list(
+        employee.payslips.annotate(year=ExtractYear('pay_date'))
+        .values('year')
+        .annotate(
+            count=Count('id'),
+            gross=Sum('gross_pay'),
+            deductions=Sum('deductions'),
+            net=Sum('net_pay'),
+        )
+        .order_by('-year')
+    )
+    
+    try:
+        selected_year = int(request.GET.get('year', ''))
+    except ValueError:
+        selected_year = None
+    totals = next((y for y in years if y['year'] == selected_year), years[0] if years else None)
+    
+    payslips = Payslip.objects.none()
+    if totals:
+        payslips = employee.payslips.filter(pay_date__year=totals['year']).defer('details')
     
     return render(request, 'employees/payslips.html', {
         'employee': employee,
         'payslips': payslips,
+        'years': years,
+        'year_totals': totals,
+    })
+
+
+@login_required
+def payslip_detail(request, pk):
+    """HTMX partial with one payslip's earnings and deductions breakdown."""
+    employee = get_object_or_404(Employee, user=request.user)
+    payslip = get_object_or_404(Payslip, pk=pk, employee=employee)
+    details = payslip.details or {}
+    
+    return render(request, 'employees/partials/payslip_detail.html', {
+        'payslip': payslip,
+        'earnings': (details.get('earnings') or {}).items(),
+        'deductions': (details.get('deductions') or {}).items(),
     })
 
 
+@login_required
+def payslip_download(request, pk):
+    """Download a payslip PDF, rendering it first if it is missing or out of date."""
+    payslip = get_object_or_404(Payslip.objects.select_related('employee', 'employee__department'), pk=pk)
+    if payslip.employee.user_id != request.user.pk and request.user.role not in ['hr', 'admin']:
+        raise PermissionDenied
+    
+    name = ensure_payslip_pdf(payslip)
+    # File names are content hashes, so the name doubles as a strong ETag
+    etag = '"%s"' % name.rsplit('/', 1)[-1].removesuffix('.pdf')
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=True,
+            filename=f'payslip-{payslip.employee.employee_id}-{payslip.pay_date:%Y-%m-%d}.pdf',
+            content_type='application/pdf',
+        )
+    response['ETag'] = etag
+    # The URL stays the same when a payroll rerun changes the PDF, so always revalidate
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @login_required
 def leave_request_view(request):
     """View and submit leave requests."""
@@ -255,7 +335,20 @@ class EmployeeSettingsView(EmployeeRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         context['user'] = self.request.user
         context['employee'] = self.request.user.employee_profile
+        context['notification_email_choices'] = User.NotificationEmail.choices
         return context
+
+
+@login_required
+@require_POST
+def update_notification_email(request):
+    """Switch between an email per notification and the daily digest."""
+    choice = request.POST.get('notification_email')
+    if choice in User.NotificationEmail.values:
+        request.user.notification_email = choice
+        request.user.save(update_fields=['notification_email'])
+        messages.success(request, 'Email preference updated.')
+    return redirect('employees:settings')
     
 
 @login_required
@@ -367,24 +460,63 @@ def request_attendance_correction(request):
 
 
 
+NOTIFICATIONS_PAGE_SIZE = 50
+
+
 @login_required
 def notifications_view(request):
-    """View all notifications for the logged-in employee."""
+    """
+    View the logged-in employee's notifications, newest first.
+    
+    Paged by keyset: `?before=<created_at>_<id>` continues after the last
+    notification shown, which stays fast however far back the list goes.
+    """
     employee = get_object_or_404(Employee, user=request.user)
-    notifications = employee.notifications.all()[:50]
+    notifications = employee.notifications.order_by('-created_at', '-id')
+    
+    before = request.GET.get('before', '')
+    if before:
+        try:
+            created_at, pk = before.rsplit('_', 1)
+            created_at, pk = datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            return redirect('employees:notifications')
+        notifications = notifications.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
     
-    # Mark as read
-    if request.GET.get('mark_read'):
-        employee.notifications.filter(is_read=False).update(is_read=True)
-        return redirect('employees:notifications')
+    notifications = list(notifications[:NOTIFICATIONS_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(notifications) > NOTIFICATIONS_PAGE_SIZE:
+        notifications = notifications[:NOTIFICATIONS_PAGE_SIZE]
+        last = notifications[-1]
+        next_cursor = f'{last.created_at.isoformat()}_{last.pk}'
     
     context = {
         'notifications': notifications,
-        'unread_count': employee.notifications.filter(is_read=False).count(),
+        'unread_count': unread_state(request.user.pk)['count'],
+        'next_cursor': next_cursor,
+        'is_first_page': not before,
     }
     return render(request, 'employees/notifications.html', context)
 
 
+@login_required
+@require_POST
+def mark_all_notifications_read(request):
+    """Mark every unread notification read in one UPDATE; returns the number updated."""
+    employee = get_object_or_404(Employee, user=request.user)
+    with transaction.atomic():
+        updated = employee.notifications.filter(is_read=False).update(is_read=True)
+        transaction.on_commit(lambda: notify_changed([request.user.pk]))
+    
+    if request.headers.get('HX-Request') or 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'updated': updated})
+    if updated:
+        messages.success(request, f'Marked {updated} notification{"s" if updated != 1 else ""} as read.')
+    return redirect('employees:notifications')
+
+
 @login_required
 def mark_notification_read(request, pk):
     """Mark a single notification as read."""
@@ -393,7 +525,72 @@ def mark_notification_read(request, pk):
     
     notification.is_read = True
     notification.save()
+    transaction.on_commit(lambda: notify_changed([request.user.pk]))
     
-    if notification.link:
+    if notification.link and url_has_allowed_host_and_scheme(
+        notification.link, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
         return redirect(notification.link)
-    return redirect('employees:notifications')
\ No newline at end of file
+    return redirect('employees:notifications')
+
+
+@login_required
+def notifications_unread(request):
+    """Unread count for the navbar's polling fallback; 304 while nothing has changed."""
+    state = unread_state(request.user.pk)
+    etag = state_etag(state)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(state)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def _notification_events(user_id):
+    loop, queue = subscription = broker.subscribe(user_id)
+    deadline = loop.time() + settings.NOTIFICATION_STREAM_MAX_SECONDS
+    try:
+        state = await sync_to_async(unread_state)(user_id)
+        yield f'retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n' + _sse('count', state)
+        while loop.time() < deadline:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.NOTIFICATION_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                event = None
+            if event and 'notification' in event:
+                yield _sse('notification', event['notification'])
+            # Usually an L1 cache hit; changes made in other workers show up within CACHE_L1_SECONDS
+            new_state = await sync_to_async(unread_state)(user_id)
+            if new_state != state:
+                state = new_state
+                yield _sse('count', state)
+            elif event is None:
+                yield ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(user_id, subscription)
+
+
+@login_required
+async def notifications_stream(request):
+    """
+    Server-Sent Events stream of new notifications and unread counts.
+    
+    Streams are only held open under ASGI (config/asgi.py); under WSGI each
+    one would tie up a worker, so the endpoint answers 204, which tells
+    EventSource not to reconnect, and the navbar polls notifications_unread
+    instead. Streams end after NOTIFICATION_STREAM_MAX_SECONDS and the
+    browser reconnects.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    response = StreamingHttpResponse(_notification_events(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
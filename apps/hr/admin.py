@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ReportJob
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('report_type', 'department', 'start_date', 'end_date', 'status', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'report_type')
+    readonly_fields = ('html', 'csv_file', 'error', 'started_at', 'finished_at')
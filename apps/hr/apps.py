@@ -4,4 +4,14 @@ from django.apps import AppConfig
 class HrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.hr'  # Changed from 'hr' to 'apps.hr'
-    verbose_name = 'HR Management'
\ No newline at end of file
+    verbose_name = 'HR Management'
+    
+    def ready(self):
+        from apps.core.cache import invalidate_on, track_tables
+        from apps.employees.models import AttendanceCorrection, Department, Employee, LeaveRequest
+        
+        from .reports import REPORT_MODELS
+        
+        invalidate_on('hr-metrics', Employee, Department, LeaveRequest, AttendanceCorrection)
+        invalidate_on('hr-pending', LeaveRequest, AttendanceCorrection)
+        track_tables(*REPORT_MODELS)
@@ -0,0 +1,109 @@
+"""
+Report chart series.
+
+Each chart on the reports page is registered in CHARTS and served as JSON
+({'labels': [...], 'data': [...]}) by the report_chart view, which the page
+fetches as the chart scrolls into view. Series are cached in the
+'hr-metrics' namespace, so any employee, department or leave change
+recomputes them; functions take `today` so date-relative series roll over
+at midnight.
+"""
+
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Avg, Count, Q
+
+from apps.core.cache import cached
+from apps.employees.models import Department, Employee, LeaveRequest
+
+CHARTS = {}
+
+# (label, minimum days employed, maximum days employed) for the tenure chart
+TENURE_BANDS = [
+    ('< 1 year', 0, 365),
+    ('1-2 years', 365, 730),
+    ('2-3 years', 730, 1095),
+    ('3-5 years', 1095, 1825),
+    ('5+ years', 1825, None),
+]
+
+
+def chart(name):
+    """Register a series function under `name` (its URL slug)."""
+    def register(func):
+        CHARTS[name] = func
+        return func
+    return register
+
+
+def chart_data(name, today):
+    return CHARTS[name](today)
+
+
+@chart('headcount')
+@cached('hr-metrics', timeout=3600)
+def headcount(today):
+    """Active and on-leave employees who had started by each of the last six months."""
+    months = [today - relativedelta(months=i) for i in range(5, -1, -1)]
+    counts = Employee.objects.filter(
+        status__in=[Employee.Status.ACTIVE, Employee.Status.ON_LEAVE],
+    ).aggregate(**{
+        f'm{i}': Count('id', filter=Q(start_date__lte=month)) for i, month in enumerate(months)
+    })
+    return {
+        'labels': [month.strftime('%b %Y') for month in months],
+        'data': [counts[f'm{i}'] for i in range(len(months))],
+    }
+
+
+@chart('departments')
+@cached('hr-metrics', timeout=3600)
+def departments(today):
+    rows = Department.objects.annotate(
+        employee_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE))
+    ).values_list('name', 'employee_count')
+    return {'labels': [name for name, _ in rows], 'data': [count for _, count in rows]}
+
+
+@chart('leave-types')
+@cached('hr-metrics', timeout=3600)
+def leave_types(today):
+    rows = LeaveRequest.objects.order_by('leave_type').values_list('leave_type').annotate(count=Count('id'))
+    return {'labels': [leave_type.title() for leave_type, _ in rows], 'data': [count for _, count in rows]}
+
+
+@chart('leave-status')
+@cached('hr-metrics', timeout=3600)
+def leave_status(today):
+    statuses = [LeaveRequest.Status.PENDING, LeaveRequest.Status.APPROVED, LeaveRequest.Status.REJECTED]
+    counts = LeaveRequest.objects.aggregate(**{
+        status.value: Count('id', filter=Q(status=status)) for status in statuses
+    })
+    return {'labels': [status.label for status in statuses], 'data': [counts[status.value] for status in statuses]}
+
+
+@chart('tenure')
+@cached('hr-metrics', timeout=3600)
+def tenure(today):
+    """Active employees bucketed by years since their start date."""
+    filters = {}
+    for i, (label, min_days, max_days) in enumerate(TENURE_BANDS):
+        condition = Q()
+        if min_days:
+            condition &= Q(start_date__lte=today - timedelta(days=min_days))
+        if max_days is not None:
+            condition &= Q(start_date__gt=today - timedelta(days=max_days))
+        filters[f'band{i}'] = Count('id', filter=condition)
+    counts = Employee.objects.filter(status=Employee.Status.ACTIVE).aggregate(**filters)
+    return {'labels': [label for label, _, _ in TENURE_BANDS], 'data': [counts[f'band{i}'] for i in range(len(TENURE_BANDS))]}
+
+
+@chart('salary')
+@cached('hr-metrics', timeout=3600)
+def salary(today):
+    """Average salary of active employees per department (departments without any are left out)."""
+    rows = Department.objects.annotate(
+        avg_salary=Avg('employees__salary', filter=Q(employees__status=Employee.Status.ACTIVE))
+    ).filter(avg_salary__isnull=False).values_list('name', 'avg_salary')
+    return {'labels': [name for name, _ in rows], 'data': [round(float(average), 2) for _, average in rows]}
@@ -1,11 +1,31 @@
+from django.utils.functional import SimpleLazyObject
+
+from apps.core.cache import cached
 from apps.employees.models import LeaveRequest, AttendanceCorrection
 
 
+@cached('hr-pending', timeout=300)
+def pending_totals():
+    """Pending leave requests and attendance corrections, shared by every HR user."""
+    return {
+        'leave': LeaveRequest.objects.filter(status='pending').count(),
+        'correction': AttendanceCorrection.objects.filter(status='pending').count(),
+    }
+
+
 def pending_counts(request):
-    """Add pending counts to all HR templates."""
+    """
+    Add pending counts to all HR templates.
+    
+    Lazy and cached in the 'hr-pending' namespace, which is bumped whenever a
+    leave request or correction changes; the navbar fragment varies on the
+    counts, so it is re-rendered exactly when they change.
+    """
     if request.user.is_authenticated and hasattr(request.user, 'is_hr') and request.user.is_hr:
+        totals = SimpleLazyObject(pending_totals)
         return {
-            'pending_leave_count': LeaveRequest.objects.filter(status='pending').count(),
-            'pending_correction_count': AttendanceCorrection.objects.filter(status='pending').count(),
+            'pending_leave_count': SimpleLazyObject(lambda: totals['leave']),
+            'pending_correction_count': SimpleLazyObject(lambda: totals['correction']),
         }
-    return {}
\ No newline at end of file
+    return {}
+
@@ -4,7 +4,9 @@ Forms for HR management.
 
 from django import forms
 from django.contrib.auth import get_user_model
+from django.utils.http import url_has_allowed_host_and_scheme
 from apps.employees.models import Employee, Department
+from apps.employees.services import allocate_employee_ids
 import secrets
 
 User = get_user_model()
@@ -143,27 +145,10 @@ class EmployeeForm(forms.ModelForm):
             random_password = secrets.token_urlsafe(8)  # Shorter, easier to type
     
         # Generate employee ID
-            last_employee = Employee.objects.order_by('-id').first()
-            if last_employee:
-                try:
-                # Handle both EMP and ETH prefixes
-                    emp_id = last_employee.employee_id
-                    num_part = ''.join(filter(str.isdigit, emp_id))
-                    last_num = int(num_part) if num_part else 0
-                    new_num = last_num + 1
-                except (ValueError, AttributeError):
-                    new_num = Employee.objects.count() + 1
-            else:
-                new_num = 1
-            employee.employee_id = f"ETH{new_num:04d}"
+            employee.employee_id = allocate_employee_ids()[0]
     
         # Create username from email
-            username = email.split('@')[0]
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
+            username = User.objects.allocate_username(email.split('@')[0])
     
         # Create user manually (more reliable than create_user)
             user = User(
@@ -229,4 +214,66 @@ class EmployeeSearchForm(forms.Form):
         widget=forms.Select(attrs={
             'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500'
         })
-    )
\ No newline at end of file
+    )
+
+
+class AnnouncementForm(forms.Form):
+    """Form for sending an announcement to everyone, some departments or some roles."""
+    
+    AUDIENCE_CHOICES = [
+        ('all', 'All employees'),
+        ('departments', 'Selected departments'),
+        ('roles', 'Selected roles'),
+    ]
+    
+    title = forms.CharField(
+        max_length=255,
+        widget=forms.TextInput(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500',
+            'placeholder': 'e.g., Office closed on Friday'
+        })
+    )
+    message = forms.CharField(
+        widget=forms.Textarea(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500',
+            'rows': 4
+        })
+    )
+    link = forms.CharField(
+        required=False,
+        max_length=255,
+        widget=forms.TextInput(attrs={
+            'class': 'w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-green-500 focus:border-green-500',
+            'placeholder': 'Optional link, e.g. /employee/leave/'
+        })
+    )
+    audience = forms.ChoiceField(choices=AUDIENCE_CHOICES, initial='all', widget=forms.RadioSelect)
+    departments = forms.ModelMultipleChoiceField(
+        queryset=Department.objects.order_by('name'),
+        required=False,
+        widget=forms.CheckboxSelectMultiple
+    )
+    roles = forms.MultipleChoiceField(
+        choices=User.Role.choices,
+        required=False,
+        widget=forms.CheckboxSelectMultiple
+    )
+    
+    def clean_link(self):
+        # Recipients are redirected to the link, so only same-site paths are allowed
+        link = self.cleaned_data['link'].strip()
+        if link and (
+            not link.startswith('/') or link.startswith('//')
+            or not url_has_allowed_host_and_scheme(link, allowed_hosts=None)
+        ):
+            raise forms.ValidationError('Enter a path on this site, e.g. /employee/leave/')
+        return link
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        audience = cleaned_data.get('audience')
+        if audience == 'departments' and not cleaned_data.get('departments'):
+            self.add_error('departments', 'Select at least one department.')
+        if audience == 'roles' and not cleaned_data.get('roles'):
+            self.add_error('roles', 'Select at least one role.')
+        return cleaned_data
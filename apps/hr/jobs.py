@@ -0,0 +1,86 @@
+"""
+Background report jobs.
+
+A custom report over a long date range (more than REPORT_JOB_SYNC_DAYS days,
+or with no start date) can take longer than a web worker should spend on a
+request, so unless it is already cached the generate_report view queues a
+ReportJob and the page polls report_job until the run_report_jobs worker has
+stored the rendered report and a CSV of its figures. Jobs are off unless
+REPORT_JOB_SYNC_DAYS is set, since without a worker they would never finish.
+"""
+
+import csv
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import reports
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+def needs_job(report_type, start_date, end_date):
+    """Whether a report covers too long a range to build inside a request (0 days disables jobs)."""
+    limit = settings.REPORT_JOB_SYNC_DAYS
+    if not limit or not reports.is_dated(report_type):
+        return False
+    if start_date is None:
+        return True
+    return ((end_date or timezone.localdate()) - start_date).days > limit
+
+
+def enqueue(user, report_type, department_id, start_date, end_date):
+    """Queue a report for `user`, reusing their pending job with the same parameters."""
+    params = {
+        'report_type': report_type,
+        'department_id': department_id,
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+    pending = ReportJob.objects.filter(
+        requested_by=user, status__in=[ReportJob.Status.QUEUED, ReportJob.Status.RUNNING], **params
+    )
+    return pending.first() or ReportJob.objects.create(requested_by=user, **params)
+
+
+def claim_next():
+    """Mark the oldest queued job as running and return it, or None if the queue is empty."""
+    queued = ReportJob.objects.filter(status=ReportJob.Status.QUEUED).order_by('created_at', 'pk')
+    for pk in queued.values_list('pk', flat=True)[:10]:
+        # Conditional update so two workers never claim the same job
+        claimed = ReportJob.objects.filter(pk=pk, status=ReportJob.Status.QUEUED).update(
+            status=ReportJob.Status.RUNNING, started_at=timezone.now(),
+        )
+        if claimed:
+            return ReportJob.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale(older_than):
+    """Queue running jobs again whose worker started them more than `older_than` ago (it likely died)."""
+    return ReportJob.objects.filter(
+        status=ReportJob.Status.RUNNING, started_at__lt=timezone.now() - older_than,
+    ).update(status=ReportJob.Status.QUEUED, started_at=None)
+
+
+def run_job(job):
+    """Build, render and store a claimed job's report; a failure is recorded on the job."""
+    try:
+        template_name, context = reports.build_report(job.report_type, job.department_id, job.start_date, job.end_date)
+        job.html = render_to_string(template_name, context)
+        output = io.StringIO()
+        csv.writer(output).writerows(reports.summary_rows(job.report_type, context))
+        job.csv_file.save(job.csv_filename, ContentFile(output.getvalue().encode()), save=False)
+        job.status = ReportJob.Status.DONE
+    except Exception as e:
+        logger.exception(f"Report job {job.pk} failed")
+        job.status = ReportJob.Status.FAILED
+        job.error = str(e) or e.__class__.__name__
+    job.finished_at = timezone.now()
+    job.save()
+    return job
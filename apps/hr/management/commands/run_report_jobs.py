@@ -0,0 +1,45 @@
+"""
+Build queued custom reports in the background.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.hr import jobs
+from apps.hr.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = 'Build custom reports queued by the generate report page (runs until stopped unless --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--stale-minutes', type=int, default=30,
+                            help='Queue running jobs again after this long (their worker died)')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        while True:
+            requeued = jobs.requeue_stale(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale report jobs'))
+
+            job = jobs.claim_next()
+            if job is None:
+                if options['once']:
+                    return
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            jobs.run_job(job)
+            elapsed = time.perf_counter() - started
+            if job.status == ReportJob.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(f'{job} built in {elapsed:.1f}s'))
+            else:
+                self.stdout.write(self.style.ERROR(f'{job}: {job.error}'))
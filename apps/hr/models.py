@@ -1,3 +1,58 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ReportJob(models.Model):
+    """A custom report built in the background by the run_report_jobs command (see apps.hr.jobs)."""
+    
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+    
+    # Normalised report parameters (see apps.hr.reports.parse_params)
+    report_type = models.CharField(max_length=20)
+    department = models.ForeignKey(
+        'employees.Department',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='report_jobs'
+    )
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_jobs'
+    )
+    
+    # Result: the rendered report partial and its figures as CSV
+    html = models.TextField(blank=True)
+    csv_file = models.FileField(upload_to='reports/', blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='reportjob_status_created'),
+        ]
+    
+    def __str__(self):
+        return f"{self.report_type.title()} report #{self.pk} ({self.status})"
+    
+    @property
+    def is_pending(self):
+        return self.status in (self.Status.QUEUED, self.Status.RUNNING)
+    
+    @property
+    def csv_filename(self):
+        return f"{self.report_type}_report_{self.created_at:%Y%m%d_%H%M%S}.csv"
+
@@ -0,0 +1,204 @@
+"""
+Custom reports (the "Generate Custom Report" page).
+
+Each report is a function of normalised parameters returning its template
+context, cached by those parameters and by the data versions of the tables
+it reads (see apps.core.cache.table_namespace), so a repeated or shared
+report is served from cache until one of those tables is written to.
+Parameters a report ignores are dropped from its key.
+"""
+
+from datetime import datetime
+
+from django.db.models import Count, Q, Sum
+
+from apps.core.cache import cached, table_namespace
+from apps.employees.models import Attendance, Department, Employee, LeaveRequest
+
+# Models whose tables back a report; their data versions are kept by HrConfig.ready()
+REPORT_MODELS = [Attendance, Department, Employee, LeaveRequest]
+
+
+def _tables(*models):
+    return [table_namespace(model) for model in models]
+
+
+def parse_params(params):
+    """
+    Normalise report parameters from a query dict.
+
+    Returns (report_type, department_id, start_date, end_date); invalid
+    department ids and dates are treated as not given.
+    """
+    department = params.get('department') or ''
+    department_id = int(department) if department.isdigit() else None
+    dates = []
+    for name in ('start_date', 'end_date'):
+        try:
+            dates.append(datetime.strptime(params.get(name) or '', '%Y-%m-%d').date())
+        except ValueError:
+            dates.append(None)
+    return (params.get('report_type') or None, department_id, *dates)
+
+
+# The rows each report covers; apps.hr.exports streams the same querysets
+
+def employees_for(department_id):
+    employees = Employee.objects.all()
+    if department_id:
+        employees = employees.filter(department_id=department_id)
+    return employees
+
+
+def leave_requests_for(department_id, start_date, end_date):
+    leaves = LeaveRequest.objects.all()
+    if department_id:
+        leaves = leaves.filter(employee__department_id=department_id)
+    if start_date:
+        leaves = leaves.filter(start_date__gte=start_date)
+    if end_date:
+        leaves = leaves.filter(end_date__lte=end_date)
+    return leaves
+
+
+def attendance_for(department_id, start_date, end_date):
+    attendance = Attendance.objects.all()
+    if department_id:
+        attendance = attendance.filter(employee__department_id=department_id)
+    if start_date:
+        attendance = attendance.filter(date__gte=start_date)
+    if end_date:
+        attendance = attendance.filter(date__lte=end_date)
+    return attendance
+
+
+@cached(_tables(Employee, Department), timeout=3600, metric='hr-reports')
+def headcount_report(department_id):
+    employees = employees_for(department_id)
+
+    by_department = list(Department.objects.annotate(
+        active_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE)),
+        on_leave_count=Count('employees', filter=Q(employees__status=Employee.Status.ON_LEAVE)),
+        terminated_count=Count('employees', filter=Q(employees__status=Employee.Status.TERMINATED))
+    ).order_by('name'))
+    totals = Employee.objects.aggregate(
+        total_active=Count('id', filter=Q(status=Employee.Status.ACTIVE)),
+        total_on_leave=Count('id', filter=Q(status=Employee.Status.ON_LEAVE)),
+        total_terminated=Count('id', filter=Q(status=Employee.Status.TERMINATED)),
+    )
+    return {
+        'total_employees': employees.filter(status=Employee.Status.ACTIVE).count(),
+        **totals,
+        'by_department': by_department,
+        'dept_names': [d.name for d in by_department],
+        'dept_active': [d.active_count for d in by_department],
+    }
+
+
+@cached(_tables(LeaveRequest, Employee), timeout=3600, metric='hr-reports')
+def leave_report(department_id, start_date, end_date):
+    leaves = leave_requests_for(department_id, start_date, end_date)
+
+    by_type = list(leaves.values('leave_type').annotate(count=Count('id')).order_by('-count'))
+    by_status = list(leaves.values('status').annotate(count=Count('id')).order_by('-count'))
+    status_counts = {item['status']: item['count'] for item in by_status}
+    return {
+        'total_requests': sum(status_counts.values()),
+        'pending': status_counts.get(LeaveRequest.Status.PENDING.value, 0),
+        'approved': status_counts.get(LeaveRequest.Status.APPROVED.value, 0),
+        'rejected': status_counts.get(LeaveRequest.Status.REJECTED.value, 0),
+        'by_type': by_type,
+        'by_status': by_status,
+        'recent_requests': list(leaves.select_related('employee').order_by('-submitted_at')[:10]),
+        'type_labels': [item['leave_type'].title() for item in by_type],
+        'type_counts': [item['count'] for item in by_type],
+    }
+
+
+@cached(_tables(Attendance, Employee), timeout=3600, metric='hr-reports')
+def attendance_report(department_id, start_date, end_date):
+    attendance = attendance_for(department_id, start_date, end_date)
+
+    Status = Attendance.Status
+    stats = attendance.aggregate(
+        total_records=Count('id'),
+        total_hours=Sum('hours_worked'),
+        present=Count('id', filter=Q(status=Status.PRESENT)),
+        absent=Count('id', filter=Q(status=Status.ABSENT)),
+        late=Count('id', filter=Q(status=Status.LATE)),
+        on_leave=Count('id', filter=Q(status=Status.ON_LEAVE)),
+        half_day=Count('id', filter=Q(status=Status.HALF_DAY)),
+    )
+    total_hours = float(stats['total_hours'] or 0)
+    total_days = stats['total_records']
+    return {
+        **stats,
+        'total_hours': round(total_hours, 2),
+        'avg_hours_per_day': round(total_hours / total_days if total_days > 0 else 0, 2),
+    }
+
+
+# report_type -> (builder, template, whether it takes a date range)
+REPORTS = {
+    'headcount': (headcount_report, 'hr/reports/headcount_report.html', False),
+    'leave': (leave_report, 'hr/reports/leave_report.html', True),
+    'attendance': (attendance_report, 'hr/reports/attendance_report.html', True),
+}
+
+
+def is_dated(report_type):
+    return REPORTS[report_type][2]
+
+
+def build_report(report_type, department_id=None, start_date=None, end_date=None, cached_only=False):
+    """
+    Return (template_name, context) for a report, or None for an unknown
+    report type. With `cached_only`, also return None unless the report is
+    already cached.
+    """
+    if report_type not in REPORTS:
+        return None
+    builder, template_name, dated = REPORTS[report_type]
+    args = (department_id, start_date, end_date) if dated else (department_id,)
+    data = builder.peek(*args) if cached_only else builder(*args)
+    if data is None:
+        return None
+    return template_name, {'report_type': report_type, 'start_date': start_date, 'end_date': end_date, **data}
+
+
+def summary_rows(report_type, context):
+    """The figures shown on a report as CSV rows, header row first."""
+    if report_type == 'headcount':
+        rows = [['Department', 'Active', 'On Leave', 'Terminated']]
+        rows += [
+            [department.name, department.active_count, department.on_leave_count, department.terminated_count]
+            for department in context['by_department']
+        ]
+        # The on-screen totals are company-wide; an export's cover only the filtered rows
+        label = 'Total (selected department)' if context.get('totals_filtered') else 'Total'
+        rows.append([label, context['total_active'], context['total_on_leave'], context['total_terminated']])
+        return rows
+    
+    if report_type == 'leave':
+        rows = [
+            ['Metric', 'Value'],
+            ['Total requests', context['total_requests']],
+            ['Pending', context['pending']],
+            ['Approved', context['approved']],
+            ['Rejected', context['rejected']],
+        ]
+        rows += [[f"{item['leave_type'].title()} requests", item['count']] for item in context['by_type']]
+        return rows
+    
+    return [['Metric', 'Value']] + [
+        [label, context[key]] for label, key in [
+            ('Total records', 'total_records'),
+            ('Total hours', 'total_hours'),
+            ('Average hours per day', 'avg_hours_per_day'),
+            ('Present', 'present'),
+            ('Late', 'late'),
+            ('Absent', 'absent'),
+            ('On leave', 'on_leave'),
+            ('Half day', 'half_day'),
+        ]
+    ]
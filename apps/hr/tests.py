@@ -1,3 +1,508 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history
+
+from apps.accounts.models import User
+from apps.core.cache import invalidate_models, tiered
+from apps.employees.models import (
+    Attendance, AttendanceCorrection, Department, Employee, LeaveRequest, Notification, Payslip,
+)
+from apps.hr import reports
+from apps.hr.models import ReportJob
+
+
+# (role, url name, kwargs factory, query string) for every list and detail page
+PAGES = [
+    ('hr', 'hr:dashboard', None, ''),
+    ('hr', 'hr:employee_list', None, ''),
+    ('hr', 'hr:employee_detail', 'employee', ''),
+    ('hr', 'hr:leave_requests', None, ''),
+    ('hr', 'hr:leave_list', None, ''),
+    ('hr', 'hr:attendance_corrections', None, ''),
+    ('hr', 'hr:department_list', None, ''),
+    ('hr', 'hr:reports', None, ''),
+    ('hr', 'hr:generate_report', None, '?report_type=leave'),
+    ('hr', 'hr:audit_log', None, ''),
+    ('hr', 'hr:my_leave_history', None, ''),
+    ('employee', 'employees:dashboard', None, ''),
+    ('employee', 'employees:profile', None, ''),
+    ('employee', 'employees:attendance', None, ''),
+    ('employee', 'employees:payslips', None, ''),
+    ('employee', 'employees:leave_request', None, ''),
+    ('employee', 'employees:notifications', None, ''),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+# Build every report in the request so the report pages are measured too
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0, REPORT_JOB_SYNC_DAYS=0)
+class QueryCountRegressionTests(TestCase):
+    """
+    Render every list and detail page at two dataset sizes and require the
+    same number of queries, so a missing select_related/prefetch_related
+    (an N+1) fails here instead of in production.
+    """
+
+    SIZES = (10, 1000)
+
+    def seed(self, rows):
+        """Create `rows` employees, leave requests, corrections and per-employee records."""
+        today = date.today()
+        now = timezone.now()
+        departments = Department.objects.bulk_create(
+            [Department(name=f'Department {i}') for i in range(3)]
+        )
+        users = User.objects.bulk_create([
+            User(
+                email=f'user{i}@example.com', username=f'user{i}', password='!',
+                role='hr' if i == 0 else 'employee',
+            )
+            for i in range(rows)
+        ])
+        employees = bulk_create_with_history([
+            Employee(
+                user=user, employee_id=f'T{i:05d}', first_name=f'First{i}', last_name=f'Last{i}',
+                department=departments[i % len(departments)], job_title='Analyst',
+                start_date=today - timedelta(days=i), salary=50000,
+            )
+            for i, user in enumerate(users)
+        ], Employee, default_user=users[0])
+        employees = list(Employee.objects.order_by('employee_id'))
+        hr, focal = employees[0], employees[1]
+        for i, employee in enumerate(employees[2:]):
+            employee.manager = employees[i % 2]
+        Employee.objects.bulk_update(employees[2:], ['manager'])
+        Employee.history.bulk_history_create([focal] * rows, default_user=users[0])
+
+        statuses = [LeaveRequest.Status.PENDING, LeaveRequest.Status.APPROVED, LeaveRequest.Status.REJECTED]
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(
+                employee=focal if i % 2 else employees[i], leave_type=LeaveRequest.LeaveType.ANNUAL,
+                start_date=today + timedelta(days=i), end_date=today + timedelta(days=i + 1),
+                reason='Trip', status=statuses[i % 3],
+                reviewed_by=employees[i % 3] if i % 3 else None,
+                reviewed_at=now if i % 3 else None,
+            )
+            for i in range(rows)
+        ])
+        AttendanceCorrection.objects.bulk_create([
+            AttendanceCorrection(
+                employee=focal if i % 2 else employees[i], date=today - timedelta(days=i),
+                reason='Forgot to clock in', status=statuses[i % 3],
+                reviewed_by=employees[i % 3] if i % 3 else None,
+                reviewed_at=now if i % 3 else None,
+            )
+            for i in range(rows)
+        ])
+        Attendance.objects.bulk_create([
+            Attendance(employee=focal, date=today - timedelta(days=i), status=Attendance.Status.PRESENT)
+            for i in range(rows)
+        ])
+        Payslip.objects.bulk_create([
+            Payslip(
+                employee=focal, pay_period_start=today - timedelta(days=i + 30),
+                pay_period_end=today - timedelta(days=i), pay_date=today - timedelta(days=i),
+                gross_pay=5000, deductions=500, net_pay=4500,
+            )
+            for i in range(rows)
+        ])
+        Notification.objects.bulk_create([
+            Notification(recipient=focal, title=f'Notice {i}', message='Hello')
+            for i in range(rows)
+        ])
+        return {'hr': hr, 'employee': focal}
+
+    def count_queries(self, rows):
+        """Return {(role, url name): query count} for every page against `rows` rows."""
+        counts = {}
+        try:
+            with transaction.atomic():
+                people = self.seed(rows)
+                clients = {}
+                for role, employee in people.items():
+                    clients[role] = Client()
+                    clients[role].force_login(employee.user)
+
+                for role, url_name, kwargs_from, query in PAGES:
+                    kwargs = {'pk': people[kwargs_from].pk} if kwargs_from else None
+                    path = reverse(url_name, kwargs=kwargs) + query
+                    clients[role].get(path)
+                    # Measure the uncached path; cached pages would hide N+1s
+                    tiered.clear()
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = clients[role].get(path)
+                    self.assertEqual(response.status_code, 200, path)
+                    counts[role, url_name] = len(ctx.captured_queries)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return counts
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        small, large = (self.count_queries(rows) for rows in self.SIZES)
+        for page, count in small.items():
+            with self.subTest(page=page):
+                self.assertEqual(large[page], count)
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class AnnouncementViewTests(TestCase):
+    """Tests for the HR announcement page."""
+    
+    def setUp(self):
+        self.department = Department.objects.create(name='Sales')
+        for i, role in enumerate(['hr', 'employee']):
+            user = User.objects.create_user(email=f'{role}@example.com', password='x', role=role)
+            Employee.objects.create(
+                user=user, employee_id=f'T{i:05d}', first_name=role.title(), last_name='User',
+                department=self.department if role == 'employee' else None,
+                start_date=date(2024, 1, 1), salary=50000,
+            )
+        self.client.force_login(User.objects.get(role='hr'))
+    
+    def test_sends_to_selected_department(self):
+        response = self.client.post(reverse('hr:announcement'), {
+            'title': 'Quarterly targets', 'message': 'Details inside.', 'link': '',
+            'audience': 'departments', 'departments': [self.department.pk],
+        }, follow=True)
+        self.assertContains(response, 'Announcement sent to 1 employee.')
+        self.assertEqual(Notification.objects.get().recipient.department, self.department)
+    
+    def test_requires_a_department_when_targeting_departments(self):
+        response = self.client.post(reverse('hr:announcement'), {
+            'title': 'Quarterly targets', 'message': 'Details inside.', 'audience': 'departments',
+        })
+        self.assertContains(response, 'Select at least one department.')
+        self.assertFalse(Notification.objects.exists())
+    
+    def test_link_must_be_a_path_on_this_site(self):
+        for link in ['https://evil.example/', '//evil.example/', '/\\evil.example/', 'javascript:alert(1)', 'leave/']:
+            with self.subTest(link=link):
+                response = self.client.post(reverse('hr:announcement'), {
+                    'title': 'Quarterly targets', 'message': 'Details inside.', 'link': link, 'audience': 'all',
+                })
+                self.assertContains(response, 'Enter a path on this site')
+        self.assertFalse(Notification.objects.exists())
+        
+        self.client.post(reverse('hr:announcement'), {
+            'title': 'Quarterly targets', 'message': 'Details inside.', 'link': '/employee/leave/', 'audience': 'all',
+        })
+        notification = Notification.objects.get(recipient__user__role='employee')
+        self.assertEqual(notification.link, '/employee/leave/')
+        
+        Notification.objects.update(link='https://evil.example/')
+        self.client.force_login(User.objects.get(role='employee'))
+        response = self.client.get(reverse('employees:mark_notification_read', args=[notification.pk]))
+        self.assertRedirects(response, reverse('employees:notifications'), fetch_redirect_response=False)
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class NavbarFragmentCacheTests(TestCase):
+    """Tests for the cached navbar fragments and the counts they show."""
+    
+    BADGE = 'rounded-full">{}</span>'
+    
+    def setUp(self):
+        tiered.clear()
+        caches['template_fragments'].clear()
+        self.hr = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        user = User.objects.create_user(email='staff@example.com', password='x', role='employee')
+        self.employee = Employee.objects.create(
+            user=user, employee_id='T00001', first_name='Staff', last_name='User',
+            start_date=date(2024, 1, 1), salary=50000,
+        )
+        self.client.force_login(self.hr)
+    
+    def test_pending_counts_are_cached(self):
+        self.client.get(reverse('hr:settings'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('hr:settings'))
+        self.assertFalse([q for q in ctx.captured_queries if 'employees_leaverequest' in q['sql']])
+    
+    def test_badge_follows_pending_count(self):
+        response = self.client.get(reverse('hr:settings'))
+        self.assertNotContains(response, self.BADGE.format(1))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            LeaveRequest.objects.create(
+                employee=self.employee, leave_type='annual', reason='Trip',
+                start_date=date(2024, 6, 3), end_date=date(2024, 6, 4),
+            )
+        response = self.client.get(reverse('hr:settings'))
+        self.assertContains(response, self.BADGE.format(1))
+    
+    def test_fragments_are_per_user(self):
+        self.client.get(reverse('hr:settings'))
+        other = User.objects.create_user(email='hr2@example.com', password='x', role='admin')
+        self.client.force_login(other)
+        response = self.client.get(reverse('hr:settings'))
+        self.assertContains(response, 'hr2@example.com')
+        self.assertNotContains(response, 'hr@example.com')
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class ReportChartTests(TestCase):
+    """Tests for the lazily loaded reports page charts."""
+    
+    def setUp(self):
+        tiered.clear()
+        self.department = Department.objects.create(name='Sales')
+        for i, role in enumerate(['hr', 'employee']):
+            user = User.objects.create_user(email=f'{role}@example.com', password='x', role=role)
+            Employee.objects.create(
+                user=user, employee_id=f'T{i:05d}', first_name=role.title(), last_name='User',
+                department=self.department, start_date=date.today() - timedelta(days=400), salary=50000 + i * 10000,
+            )
+        self.client.force_login(User.objects.get(role='hr'))
+    
+    def test_page_links_every_chart(self):
+        response = self.client.get(reverse('hr:reports'))
+        for name in ['headcount', 'departments', 'leave-types', 'leave-status', 'tenure', 'salary']:
+            self.assertContains(response, f'data-url="{reverse("hr:report_chart", args=[name])}"')
+    
+    def test_chart_series(self):
+        data = self.client.get(reverse('hr:report_chart', args=['tenure'])).json()
+        self.assertEqual(data['labels'][:2], ['< 1 year', '1-2 years'])
+        self.assertEqual(data['data'], [0, 2, 0, 0, 0])
+        data = self.client.get(reverse('hr:report_chart', args=['salary'])).json()
+        self.assertEqual(data, {'labels': ['Sales'], 'data': [55000.0]})
+    
+    def test_etag_revalidation(self):
+        url = reverse('hr:report_chart', args=['departments'])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['data'], [2])
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if 'employees_department' in q['sql']])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"stale{response["ETag"]}"').status_code, 200)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name='Support')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['labels'], ['Sales', 'Support'])
+    
+    def test_unknown_chart_and_permissions(self):
+        self.assertEqual(self.client.get(reverse('hr:report_chart', args=['nope'])).status_code, 404)
+        self.client.force_login(User.objects.get(role='employee'))
+        self.assertEqual(self.client.get(reverse('hr:report_chart', args=['tenure'])).status_code, 403)
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class ReportCacheTests(TestCase):
+    """Tests for the parameter-keyed custom report cache."""
+    
+    def setUp(self):
+        tiered.clear()
+        self.department = Department.objects.create(name='Sales')
+        user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        self.employee = Employee.objects.create(
+            user=user, employee_id='T00000', first_name='Hr', last_name='User',
+            department=self.department, start_date=date.today() - timedelta(days=400), salary=50000,
+        )
+        self.client.force_login(user)
+    
+    def _leave(self):
+        return LeaveRequest.objects.create(
+            employee=self.employee, leave_type=LeaveRequest.LeaveType.ANNUAL, reason='Trip',
+            start_date=date(2026, 3, 2), end_date=date(2026, 3, 4),
+        )
+    
+    def test_parse_params(self):
+        self.assertEqual(
+            reports.parse_params({'report_type': 'leave', 'department': '7', 'start_date': '2026-03-01', 'end_date': 'x'}),
+            ('leave', 7, date(2026, 3, 1), None),
+        )
+        self.assertEqual(reports.parse_params({'department': 'abc'}), (None, None, None, None))
+    
+    def test_repeated_report_is_served_from_cache(self):
+        self._leave()
+        url = reverse('hr:generate_report')
+        params = {'report_type': 'leave', 'department': str(self.department.pk), 'start_date': '2026-03-01'}
+        self.assertEqual(self.client.get(url, params).context['total_requests'], 1)
+        
+        # Same normalised parameters (irrelevant junk dropped) hit the cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {**params, 'end_date': 'not-a-date'})
+        self.assertEqual(response.context['total_requests'], 1)
+        self.assertFalse([q for q in ctx.captured_queries if 'employees_leaverequest' in q['sql']])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._leave()
+        self.assertEqual(self.client.get(url, params).context['total_requests'], 2)
+    
+    def test_write_to_unrelated_table_keeps_report(self):
+        reports.headcount_report(None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._leave()
+        with CaptureQueriesContext(connection) as ctx:
+            reports.headcount_report(None)
+        self.assertEqual(ctx.captured_queries, [])
+    
+    def test_bulk_writes_invalidate_through_models(self):
+        self.assertEqual(reports.headcount_report(None)['total_active'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.update(status=Employee.Status.TERMINATED)
+            invalidate_models(Employee)
+        self.assertEqual(reports.headcount_report(None)['total_active'], 0)
+    
+    def test_unknown_report_type(self):
+        response = self.client.get(reverse('hr:generate_report'), {'report_type': 'payroll'})
+        self.assertTemplateUsed(response, 'hr/reports/no_reports.html')
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0, REPORT_JOB_SYNC_DAYS=366)
+class ReportJobTests(TestCase):
+    """Tests for custom reports built by the background worker."""
+    
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        tiered.clear()
+        self.department = Department.objects.create(name='Sales')
+        self.user = User.objects.create_user(email='hr@example.com', password='x', role='hr')
+        employee = Employee.objects.create(
+            user=self.user, employee_id='T00000', first_name='Hr', last_name='User',
+            department=self.department, start_date=date(2020, 1, 1), salary=50000,
+        )
+        Attendance.objects.create(employee=employee, date=date(2024, 5, 6), hours_worked=8)
+        self.client.force_login(self.user)
+        self.params = {'report_type': 'attendance', 'start_date': '2022-01-01', 'end_date': '2025-12-31'}
+    
+    def run_worker(self):
+        stdout = StringIO()
+        call_command('run_report_jobs', once=True, stdout=stdout)
+        return stdout.getvalue()
+    
+    def test_short_range_is_built_in_request(self):
+        response = self.client.get(reverse('hr:generate_report'), {**self.params, 'start_date': '2025-06-01'})
+        self.assertTemplateUsed(response, 'hr/reports/attendance_report.html')
+        self.assertFalse(ReportJob.objects.exists())
+    
+    def test_long_range_is_queued_and_polled(self):
+        response = self.client.get(reverse('hr:generate_report'), self.params)
+        job = ReportJob.objects.get()
+        self.assertEqual((job.status, job.start_date, job.requested_by), ('queued', date(2022, 1, 1), self.user))
+        self.assertContains(response, f'hx-get="{reverse("hr:report_job", args=[job.pk])}"')
+        
+        # Asking again while it is pending reuses the job
+        self.client.get(reverse('hr:generate_report'), self.params)
+        self.assertEqual(ReportJob.objects.count(), 1)
+        
+        self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        response = self.client.get(reverse('hr:report_job', args=[job.pk]))
+        self.assertContains(response, 'Attendance Report')
+        self.assertNotContains(response, 'hx-get')
+        
+        response = self.client.get(reverse('hr:report_job_csv', args=[job.pk]))
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[:3], ['Metric,Value', 'Total records,1', 'Total hours,8.0'])
+        
+        # The worker warmed the report cache, so the same request is now served inline
+        response = self.client.get(reverse('hr:generate_report'), self.params)
+        self.assertTemplateUsed(response, 'hr/reports/attendance_report.html')
+    
+    def test_failed_and_stale_jobs(self):
+        job = ReportJob.objects.create(requested_by=self.user, report_type='payroll')
+        with self.assertLogs('apps.hr.jobs', level='ERROR'):
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertContains(self.client.get(reverse('hr:report_job', args=[job.pk])), 'could not be generated')
+        
+        ReportJob.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now() - timedelta(hours=1))
+        with self.assertLogs('apps.hr.jobs', level='ERROR'):
+            output = self.run_worker()
+        self.assertIn('Requeued 1 stale report jobs', output)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+    
+    def test_jobs_are_private_to_their_requester(self):
+        job = ReportJob.objects.create(requested_by=self.user, report_type='attendance')
+        other = User.objects.create_user(email='hr2@example.com', password='x', role='hr')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('hr:report_job', args=[job.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('hr:report_job_csv', args=[job.pk])).status_code, 404)
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+class ReportExportTests(TestCase):
+    """Tests for streamed CSV exports of custom reports."""
+    
+    def setUp(self):
+        tiered.clear()
+        sales, support = Department.objects.bulk_create([Department(name='Sales'), Department(name='Support')])
+        self.sales = sales
+        users = [
+            User.objects.create_user(email=f'user{i}@example.com', password='x', role='hr' if i == 0 else 'employee')
+            for i in range(3)
+        ]
+        employees = [
+            Employee.objects.create(
+                user=users[i], employee_id=f'T{i:05d}', first_name=f'First{i}', last_name='User',
+                department=sales if i < 2 else support, start_date=date(2024, 1, 1), salary=50000,
+            )
+            for i in range(3)
+        ]
+        Attendance.objects.bulk_create([
+            Attendance(employee=employee, date=date(2025, 3, day), hours_worked=8, status=status)
+            for employee in employees
+            for day, status in [(3, Attendance.Status.PRESENT), (4, Attendance.Status.LATE)]
+        ])
+        self.client.force_login(users[0])
+    
+    def export(self, **params):
+        response = self.client.get(reverse('hr:generate_report'), {'export': 'csv', **params})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="', response['Content-Disposition'])
+        return [line.split(',') for line in b''.join(response.streaming_content).decode().splitlines()]
+    
+    def test_rows_are_filtered_like_the_report(self):
+        rows = self.export(report_type='attendance', department=str(self.sales.pk), start_date='2025-03-04')
+        self.assertEqual(rows[0][:5], ['Employee ID', 'First Name', 'Last Name', 'Department', 'Date'])
+        self.assertEqual([row[0] for row in rows[1:]], ['T00000', 'T00001'])
+        self.assertEqual(rows[1][4:6], ['2025-03-04', 'late'])
+    
+    def test_summary_is_tallied_in_the_same_pass(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self.export(report_type='attendance', summary='1')
+        self.assertEqual(len([q for q in ctx.captured_queries if 'employees_attendance' in q['sql']]), 1)
+        self.assertEqual(len(rows), 1 + 6 + 11)
+        summary = dict(row for row in rows[-8:])
+        self.assertEqual(summary['Total records'], '6')
+        self.assertEqual(summary['Total hours'], '48.0')
+        self.assertEqual((summary['Present'], summary['Late']), ('3', '3'))
+        
+        # The summary matches the on-screen report's figures
+        context = self.client.get(reverse('hr:generate_report'), {
+            'report_type': 'attendance', 'start_date': '2025-03-01', 'end_date': '2025-03-31',
+        }).context
+        self.assertEqual(summary['Average hours per day'], str(context['avg_hours_per_day']))
+    
+    def test_headcount_summary(self):
+        rows = self.export(report_type='headcount', summary='1')
+        self.assertEqual(len(rows), 1 + 3 + 2 + 4)
+        self.assertEqual(rows[-3:], [['Sales', '2', '0', '0'], ['Support', '1', '0', '0'], ['Total', '3', '0', '0']])
+        
+        rows = self.export(report_type='headcount', department=str(self.sales.pk), summary='1')
+        self.assertEqual(rows[-2:], [['Sales', '2', '0', '0'], ['Total (selected department)', '2', '0', '0']])
@@ -24,6 +24,9 @@ urlpatterns = [
     path('departments/<int:pk>/edit/', views.DepartmentUpdateView.as_view(), name='department_update'),
     path('departments/<int:pk>/delete/', views.DepartmentDeleteView.as_view(), name='department_delete'),
     
+    # Announcements
+    path('announcements/', views.AnnouncementView.as_view(), name='announcement'),
+    
     # Attendance corrections
     path('attendance-corrections/', views.AttendanceCorrectionListView.as_view(), name='attendance_corrections'),
     path('attendance-corrections/<int:pk>/approve/', views.approve_correction, name='approve_correction'),
@@ -36,7 +39,10 @@ urlpatterns = [
 
     # Reports
     path('reports/', views.ReportsView.as_view(), name='reports'),
+    path('reports/charts/<slug:chart>/', views.report_chart, name='report_chart'),
     path('api/reports/', views.generate_report, name='generate_report'),
+    path('reports/jobs/<int:pk>/', views.report_job, name='report_job'),
+    path('reports/jobs/<int:pk>/csv/', views.report_job_csv, name='report_job_csv'),
     path('reports/generate/', views.GenerateReportView.as_view(), name='generate_report_page'),
 
     # Audit
@@ -44,6 +50,10 @@ urlpatterns = [
     path('backup/', views.backup_database, name='backup_database'),
     path('export-csv/', views.export_employees_csv, name='export_csv'),
 
+    # Request profiling (admin only)
+    path('settings/profiles/', views.ProfileListView.as_view(), name='profiles'),
+    path('settings/profiles/<slug:profile_id>/', views.ProfileDetailView.as_view(), name='profile_detail'),
+
     path('settings/my-leave/', views.MyLeaveRequestView.as_view(), name='my_leave_request'),
     path('settings/my-leave/history/', views.MyLeaveHistoryView.as_view(), name='my_leave_history'),
 ]
@@ -2,23 +2,31 @@
 HR management views.
 """
 import csv
+import hashlib
 import json
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.http import parse_etags, url_has_allowed_host_and_scheme
 from django.http import JsonResponse
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, FormView
 from django.urls import reverse_lazy
 from django.core.exceptions import PermissionDenied
-from apps.core.mixins import HRRequiredMixin, ManagerRequiredMixin
+from apps.core import profiling
+from apps.core.cache import cached
+from apps.core.mixins import AdminRequiredMixin, HRRequiredMixin, ManagerRequiredMixin
 from apps.employees.models import Employee, Department, LeaveRequest, Attendance, AttendanceCorrection
-from .forms import EmployeeForm, EmployeeSearchForm
+from . import charts, exports, jobs, reports
+from .forms import AnnouncementForm, EmployeeForm, EmployeeSearchForm
+from .models import ReportJob
 from datetime import datetime, timedelta
-from django.db.models import Avg, Sum
 from django.contrib.auth.decorators import login_required
 from apps.employees.services import (
+    broadcast_notification,
     notify_leave_approved, 
     notify_leave_rejected,
     notify_correction_approved,
@@ -31,45 +39,53 @@ from apps.employees.services import (
 # MANAGER ACCESS (Manager, HR, Admin)
 # ============================================
 
+@cached('hr-metrics', timeout=300)
+def dashboard_stats():
+    """Counts and lists shown on the HR dashboard (invalidated by employee, leave and correction changes)."""
+    stats = {}
+    
+    # Employee statistics
+    stats['total_employees'] = Employee.objects.filter(
+        status=Employee.Status.ACTIVE
+    ).count()
+    stats['on_leave'] = Employee.objects.filter(
+        status=Employee.Status.ON_LEAVE
+    ).count()
+    
+    # Department breakdown
+    stats['departments'] = list(Department.objects.annotate(
+        employee_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE))
+    ))
+    
+    # Pending leave requests
+    pending_leaves = LeaveRequest.objects.filter(
+        status=LeaveRequest.Status.PENDING
+    ).select_related('employee', 'employee__department').order_by('-submitted_at')
+    stats['pending_leave_requests'] = list(pending_leaves[:5])
+    stats['pending_leave_count'] = pending_leaves.count()
+    
+    # Pending attendance corrections
+    pending_corrections = AttendanceCorrection.objects.filter(
+        status=AttendanceCorrection.Status.PENDING
+    ).select_related('employee', 'employee__department').order_by('-submitted_at')
+    stats['pending_corrections'] = list(pending_corrections[:5])
+    stats['pending_correction_count'] = pending_corrections.count()
+    
+    # Total pending items for badge
+    stats['total_pending'] = stats['pending_leave_count'] + stats['pending_correction_count']
+    
+    # Recent activity (from audit log)
+    stats['recent_changes'] = list(Employee.history.select_related('history_user')[:10])
+    return stats
+
+
 class HRDashboardView(ManagerRequiredMixin, TemplateView):
     """HR Dashboard with overview statistics."""
     template_name = 'hr/dashboard.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Employee statistics
-        context['total_employees'] = Employee.objects.filter(
-            status=Employee.Status.ACTIVE
-        ).count()
-        context['on_leave'] = Employee.objects.filter(
-            status=Employee.Status.ON_LEAVE
-        ).count()
-        
-        # Department breakdown
-        context['departments'] = Department.objects.annotate(
-            employee_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE))
-        )
-        
-        # Pending leave requests
-        pending_leaves = LeaveRequest.objects.filter(
-            status=LeaveRequest.Status.PENDING
-        ).select_related('employee', 'employee__department').order_by('-submitted_at')
-        context['pending_leave_requests'] = pending_leaves[:5]
-        context['pending_leave_count'] = pending_leaves.count()
-        
-        # Pending attendance corrections
-        pending_corrections = AttendanceCorrection.objects.filter(
-            status=AttendanceCorrection.Status.PENDING
-        ).select_related('employee', 'employee__department').order_by('-submitted_at')
-        context['pending_corrections'] = pending_corrections[:5]
-        context['pending_correction_count'] = pending_corrections.count()
-        
-        # Total pending items for badge
-        context['total_pending'] = context['pending_leave_count'] + context['pending_correction_count']
-        
-        # Recent activity (from audit log)
-        context['recent_changes'] = Employee.history.all()[:10]
+        context.update(dashboard_stats())
         
         # Check if user is full HR (not just manager)
         context['is_full_hr'] = self.request.user.role in ['hr', 'admin']
@@ -77,103 +93,65 @@ class HRDashboardView(ManagerRequiredMixin, TemplateView):
         return context
 
 
+@cached('hr-metrics', timeout=300)
+def report_summary(today):
+    """Summary cards, department table and recent hires for the reports page."""
+    statuses = Employee.objects.aggregate(
+        total_employees=Count('id', filter=Q(status=Employee.Status.ACTIVE)),
+        on_leave=Count('id', filter=Q(status=Employee.Status.ON_LEAVE)),
+    )
+    return {
+        **statuses,
+        'pending_leaves': LeaveRequest.objects.filter(status=LeaveRequest.Status.PENDING).count(),
+        'departments': list(Department.objects.annotate(
+            employee_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE))
+        )),
+        'recent_hires': list(Employee.objects.filter(
+            start_date__gte=today - timedelta(days=30)
+        ).select_related('department').order_by('-start_date')[:5]),
+    }
+
+
 class ReportsView(ManagerRequiredMixin, TemplateView):
-    """Generate and view reports with visualizations."""
+    """
+    Reports page shell with summary figures; each chart loads its series
+    from report_chart as it scrolls into view.
+    """
     template_name = 'hr/reports.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        today = timezone.localdate()
+        context.update(report_summary(today))
         
-        # Department breakdown
-        departments = Department.objects.annotate(
-            employee_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE))
-        )
-        context['departments'] = departments
-        context['department_names'] = [d.name for d in departments]
-        context['department_counts'] = [d.employee_count for d in departments]
-        
-        # Employee statistics
-        context['total_employees'] = Employee.objects.filter(status=Employee.Status.ACTIVE).count()
-        context['on_leave'] = Employee.objects.filter(status=Employee.Status.ON_LEAVE).count()
-        context['total_terminated'] = Employee.objects.filter(status=Employee.Status.TERMINATED).count()
-        
-        # Leave request statistics
-        context['pending_leaves'] = LeaveRequest.objects.filter(status=LeaveRequest.Status.PENDING).count()
-        context['approved_leaves'] = LeaveRequest.objects.filter(status=LeaveRequest.Status.APPROVED).count()
-        context['rejected_leaves'] = LeaveRequest.objects.filter(status=LeaveRequest.Status.REJECTED).count()
-        
-        # Leave by type
-        leave_by_type = LeaveRequest.objects.values('leave_type').annotate(count=Count('id'))
-        context['leave_types'] = [item['leave_type'].title() for item in leave_by_type]
-        context['leave_type_counts'] = [item['count'] for item in leave_by_type]
-        
-        # Headcount by month (last 6 months) - based on start_date
-        from datetime import date
-        from dateutil.relativedelta import relativedelta
-        
-        monthly_data = []
-        month_labels = []
-        
-        for i in range(5, -1, -1):
-            target_date = date.today() - relativedelta(months=i)
-            month_labels.append(target_date.strftime('%b %Y'))
-            count = Employee.objects.filter(
-                start_date__lte=target_date,
-                status__in=[Employee.Status.ACTIVE, Employee.Status.ON_LEAVE]
-            ).count()
-            monthly_data.append(count)
-        
-        context['month_labels'] = month_labels
-        context['monthly_headcount'] = monthly_data
-        
-        # Salary distribution by department
-        salary_by_dept = Department.objects.annotate(
-            avg_salary=Avg('employees__salary', filter=Q(employees__status=Employee.Status.ACTIVE)),
-            total_salary=Sum('employees__salary', filter=Q(employees__status=Employee.Status.ACTIVE))
-        )
-        context['salary_dept_names'] = [d.name for d in salary_by_dept if d.avg_salary]
-        context['salary_averages'] = [float(d.avg_salary or 0) for d in salary_by_dept if d.avg_salary]
-        
-        # Tenure distribution
-        from datetime import date
-        tenure_ranges = {
-            '< 1 year': 0,
-            '1-2 years': 0,
-            '2-3 years': 0,
-            '3-5 years': 0,
-            '5+ years': 0,
-        }
-        
-        for emp in Employee.objects.filter(status=Employee.Status.ACTIVE):
-            years = (date.today() - emp.start_date).days / 365
-            if years < 1:
-                tenure_ranges['< 1 year'] += 1
-            elif years < 2:
-                tenure_ranges['1-2 years'] += 1
-            elif years < 3:
-                tenure_ranges['2-3 years'] += 1
-            elif years < 5:
-                tenure_ranges['3-5 years'] += 1
-            else:
-                tenure_ranges['5+ years'] += 1
-        
-        context['tenure_labels'] = list(tenure_ranges.keys())
-        context['tenure_counts'] = list(tenure_ranges.values())
-        
-        # Recent hires (last 30 days)
-        thirty_days_ago = date.today() - timedelta(days=30)
-        context['recent_hires'] = Employee.objects.filter(
-            start_date__gte=thirty_days_ago
-        ).order_by('-start_date')[:5]
-        
-        # Attendance summary (last 7 days)
-        seven_days_ago = date.today() - timedelta(days=7)
-        attendance_stats = Attendance.objects.filter(date__gte=seven_days_ago).values('status').annotate(count=Count('id'))
+        # Attendance summary (last 7 days); not cached, attendance changes all day
+        attendance_stats = Attendance.objects.filter(
+            date__gte=today - timedelta(days=7)
+        ).order_by().values('status').annotate(count=Count('id'))
         context['attendance_stats'] = {item['status']: item['count'] for item in attendance_stats}
         
         return context
 
 
+@login_required
+def report_chart(request, chart):
+    """JSON series for one reports page chart; 304 when the client's copy is current."""
+    if request.user.role not in ['manager', 'hr', 'admin']:
+        raise PermissionDenied
+    if chart not in charts.CHARTS:
+        raise Http404
+    
+    body = json.dumps(charts.chart_data(chart, timezone.localdate()), cls=DjangoJSONEncoder).encode()
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 class GenerateReportView(ManagerRequiredMixin, TemplateView):
     """Page for generating filtered reports."""
     template_name = 'hr/generate_report.html'
@@ -186,21 +164,14 @@ class GenerateReportView(ManagerRequiredMixin, TemplateView):
 
 @login_required
 def generate_report(request):
-    """Generate report data based on parameters."""
+    """Generate report data based on parameters (results are cached, see apps.hr.reports), or export its rows as CSV."""
     # Allow managers, HR, and admins
     if request.user.role not in ['manager', 'hr', 'admin']:
         raise PermissionDenied
     
-    from datetime import datetime
-    from django.db.models import Avg, Sum
-    
     # Handle both GET and POST requests
     params = request.POST if request.method == 'POST' else request.GET
-    
-    report_type = params.get('report_type')
-    department_id = params.get('department')
-    start_date_str = params.get('start_date')
-    end_date_str = params.get('end_date')
+    report_type, department_id, start_date, end_date = reports.parse_params(params)
     
     # If no report type, show the form
     if not report_type:
@@ -208,117 +179,56 @@ def generate_report(request):
             'departments': Department.objects.all()
         })
     
-    # Parse dates safely
-    start_date = None
-    end_date = None
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-    if end_date_str:
-        try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
-    
-    context = {
-        'report_type': report_type,
-        'start_date': start_date,
-        'end_date': end_date,
-        'departments': Department.objects.all(),
-    }
-    
-    if report_type == 'headcount':
-        employees = Employee.objects.all()
-        if department_id:
-            employees = employees.filter(department_id=department_id)
-        
-        by_department = Department.objects.annotate(
-            active_count=Count('employees', filter=Q(employees__status=Employee.Status.ACTIVE)),
-            on_leave_count=Count('employees', filter=Q(employees__status=Employee.Status.ON_LEAVE)),
-            terminated_count=Count('employees', filter=Q(employees__status=Employee.Status.TERMINATED))
-        ).order_by('name')
-        
-        dept_names = [d.name for d in by_department]
-        dept_active = [d.active_count for d in by_department]
-        
-        context.update({
-            'total_employees': employees.filter(status=Employee.Status.ACTIVE).count(),
-            'total_active': Employee.objects.filter(status=Employee.Status.ACTIVE).count(),
-            'total_on_leave': Employee.objects.filter(status=Employee.Status.ON_LEAVE).count(),
-            'total_terminated': Employee.objects.filter(status=Employee.Status.TERMINATED).count(),
-            'by_department': by_department,
-            'dept_names': dept_names,
-            'dept_active': dept_active,
+    if report_type not in reports.REPORTS:
+        return render(request, 'hr/reports/no_reports.html', {
+            'report_type': report_type,
+            'start_date': start_date,
+            'end_date': end_date,
         })
-        return render(request, 'hr/reports/headcount_report.html', context)
     
-    elif report_type == 'leave':
-        leaves = LeaveRequest.objects.all()
-        if department_id:
-            leaves = leaves.filter(employee__department_id=department_id)
-        if start_date:
-            leaves = leaves.filter(start_date__gte=start_date)
-        if end_date:
-            leaves = leaves.filter(end_date__lte=end_date)
-        
-        by_type = leaves.values('leave_type').annotate(count=Count('id')).order_by('-count')
-        by_status = leaves.values('status').annotate(count=Count('id')).order_by('-count')
-        
-        type_labels = [item['leave_type'].title() for item in by_type]
-        type_counts = [item['count'] for item in by_type]
-        
-        pending = leaves.filter(status=LeaveRequest.Status.PENDING).count()
-        approved = leaves.filter(status=LeaveRequest.Status.APPROVED).count()
-        rejected = leaves.filter(status=LeaveRequest.Status.REJECTED).count()
-        
-        context.update({
-            'total_requests': leaves.count(),
-            'pending': pending,
-            'approved': approved,
-            'rejected': rejected,
-            'by_type': by_type,
-            'by_status': by_status,
-            'recent_requests': leaves.order_by('-submitted_at')[:10],
-            'type_labels': type_labels,
-            'type_counts': type_counts,
-        })
-        return render(request, 'hr/reports/leave_report.html', context)
+    if params.get('export') == 'csv':
+        return exports.csv_response(
+            report_type, department_id, start_date, end_date, summary=bool(params.get('summary')),
+        )
     
-    elif report_type == 'attendance':
-        attendance = Attendance.objects.all()
+    # Long date ranges are built by the run_report_jobs worker unless already cached
+    report = reports.build_report(report_type, department_id, start_date, end_date, cached_only=True)
+    if report is None and jobs.needs_job(report_type, start_date, end_date):
         if department_id:
-            attendance = attendance.filter(employee__department_id=department_id)
-        if start_date:
-            attendance = attendance.filter(date__gte=start_date)
-        if end_date:
-            attendance = attendance.filter(date__lte=end_date)
-        
-        present = attendance.filter(status=Attendance.Status.PRESENT).count()
-        absent = attendance.filter(status=Attendance.Status.ABSENT).count()
-        late = attendance.filter(status=Attendance.Status.LATE).count()
-        on_leave = attendance.filter(status=Attendance.Status.ON_LEAVE).count()
-        half_day = attendance.filter(status=Attendance.Status.HALF_DAY).count()
-        
-        total_hours = attendance.aggregate(Sum('hours_worked'))['hours_worked__sum'] or 0
-        total_days = attendance.count()
-        avg_hours = float(total_hours) / total_days if total_days > 0 else 0
-        
-        context.update({
-            'total_records': total_days,
-            'present': present,
-            'absent': absent,
-            'late': late,
-            'on_leave': on_leave,
-            'half_day': half_day,
-            'total_hours': round(float(total_hours), 2),
-            'avg_hours_per_day': round(avg_hours, 2),
+            get_object_or_404(Department, pk=department_id)
+        job = jobs.enqueue(request.user, report_type, department_id, start_date, end_date)
+        return render(request, 'hr/reports/report_job.html', {
+            'job': job,
+            'poll_seconds': settings.REPORT_JOB_POLL_SECONDS,
         })
-        return render(request, 'hr/reports/attendance_report.html', context)
     
-    else:
-        return render(request, 'hr/reports/no_report.html', context)
+    template_name, context = report or reports.build_report(report_type, department_id, start_date, end_date)
+    return render(request, template_name, context)
+
+
+@login_required
+def report_job(request, pk):
+    """A queued report: polled by the generate report page until the worker has stored the result."""
+    if request.user.role not in ['manager', 'hr', 'admin']:
+        raise PermissionDenied
+    
+    job = get_object_or_404(ReportJob, pk=pk, requested_by=request.user)
+    return render(request, 'hr/reports/report_job.html', {
+        'job': job,
+        'poll_seconds': settings.REPORT_JOB_POLL_SECONDS,
+    })
+
+
+@login_required
+def report_job_csv(request, pk):
+    """Download the CSV stored with a finished report job."""
+    if request.user.role not in ['manager', 'hr', 'admin']:
+        raise PermissionDenied
+    
+    job = get_object_or_404(ReportJob, pk=pk, requested_by=request.user, status=ReportJob.Status.DONE)
+    if not job.csv_file:
+        raise Http404
+    return FileResponse(job.csv_file.open('rb'), as_attachment=True, filename=job.csv_filename)
 
 
 class AttendanceCorrectionListView(HRRequiredMixin, ListView):
@@ -330,7 +240,7 @@ class AttendanceCorrectionListView(HRRequiredMixin, ListView):
     
     def get_queryset(self):
         queryset = AttendanceCorrection.objects.select_related(
-            'employee', 'employee__department'
+            'employee', 'employee__department', 'reviewed_by'
         ).order_by('-submitted_at')
     
     # Search by employee name
@@ -352,13 +262,13 @@ class AttendanceCorrectionListView(HRRequiredMixin, ListView):
             queryset = queryset.filter(employee__department_id=department)
     
         return queryset
-
-def get_context_data(self, **kwargs):
-    context = super().get_context_data(**kwargs)
-    context['pending_count'] = AttendanceCorrection.objects.filter(status='pending').count()
-    context['current_status'] = self.request.GET.get('status', '')
-    context['departments'] = Department.objects.all()  # Add this line
-    return context
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['pending_count'] = AttendanceCorrection.objects.filter(status='pending').count()
+        context['current_status'] = self.request.GET.get('status', '')
+        context['departments'] = Department.objects.all()
+        return context
 
 
 @login_required
@@ -574,10 +484,12 @@ class EmployeeDetailView(HRRequiredMixin, TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        employee = get_object_or_404(Employee, pk=self.kwargs['pk'])
+        employee = get_object_or_404(
+            Employee.objects.select_related('user', 'department', 'manager'), pk=self.kwargs['pk']
+        )
         
         # Get leave requests
-        leave_requests = employee.leave_requests.all().order_by('-submitted_at')
+        leave_requests = employee.leave_requests.select_related('reviewed_by').order_by('-submitted_at')
         pending_leaves = leave_requests.filter(status=LeaveRequest.Status.PENDING)
         
         # Get attendance records (last 30 days)
@@ -600,7 +512,7 @@ class EmployeeDetailView(HRRequiredMixin, TemplateView):
         payslips = employee.payslips.all().order_by('-pay_date')[:6]
         
         # Get employment history from audit log
-        history = employee.history.all()[:10]
+        history = employee.history.select_related('history_user')[:10]
         
         context.update({
             'employee': employee,
@@ -699,6 +611,25 @@ class DepartmentDeleteView(HRRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
+class AnnouncementView(HRRequiredMixin, FormView):
+    """Send an announcement notification to all employees, departments or roles."""
+    form_class = AnnouncementForm
+    template_name = 'hr/announcement.html'
+    success_url = reverse_lazy('hr:announcement')
+    
+    def form_valid(self, form):
+        data = form.cleaned_data
+        count = broadcast_notification(
+            title=data['title'],
+            message=data['message'],
+            link=data['link'],
+            departments=data['departments'] if data['audience'] == 'departments' else None,
+            roles=data['roles'] if data['audience'] == 'roles' else None,
+        )
+        messages.success(self.request, f'Announcement sent to {count} employee{"s" if count != 1 else ""}.')
+        return super().form_valid(form)
+
+
 class LeaveRequestListView(ManagerRequiredMixin, ListView):
     """List all leave requests for HR to manage."""
     model = LeaveRequest
@@ -707,7 +638,9 @@ class LeaveRequestListView(ManagerRequiredMixin, ListView):
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = LeaveRequest.objects.select_related('employee', 'employee__department').order_by('-submitted_at')
+        queryset = LeaveRequest.objects.select_related(
+            'employee', 'employee__department', 'reviewed_by'
+        ).order_by('-submitted_at')
     
     # Search by employee name
         search = self.request.GET.get('search')
@@ -871,6 +804,40 @@ class AuditLogView(HRRequiredMixin, TemplateView):
         return context
 
 
+class ProfileListView(AdminRequiredMixin, TemplateView):
+    """Recent on-demand request profiles, plus the admin's profiling link."""
+    template_name = 'hr/profiles.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        token = profiling.make_token(self.request.user)
+        target = self.request.GET.get('target', '').strip()
+        # The link carries the admin's token, so it must stay on this site
+        if target.startswith('/') and not target.startswith('//') and url_has_allowed_host_and_scheme(
+            target, allowed_hosts={self.request.get_host()}, require_https=self.request.is_secure()
+        ):
+            separator = '&' if '?' in target else '?'
+            context['profile_url'] = f'{target}{separator}{profiling.PROFILE_PARAM}={token}'
+        context['target'] = target
+        context['token'] = token
+        context['profile_header'] = profiling.PROFILE_HEADER
+        context['profiles'] = profiling.list_profiles()
+        return context
+
+
+class ProfileDetailView(AdminRequiredMixin, TemplateView):
+    """Top functions and SQL timeline of one stored profile."""
+    template_name = 'hr/profile_detail.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        profile = profiling.load_profile(self.kwargs['profile_id'])
+        if profile is None:
+            raise Http404('Profile not found')
+        context['profile'] = profile
+        return context
+
+
 @login_required
 def backup_database(request):
     """Create a JSON backup of all data."""
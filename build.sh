@@ -2,5 +2,7 @@
 set -o errexit
 
 pip install -r requirements.txt
+python manage.py fetch_assets
+python manage.py build_css
 python manage.py collectstatic --noinput
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
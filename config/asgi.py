@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through ASGI (e.g. ``gunicorn config.asgi:application -k
+uvicorn.workers.UvicornWorker``) enables the live notification stream at
+employees:notifications_stream; under WSGI the navbar polls instead.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
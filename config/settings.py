@@ -62,6 +62,9 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django_otp.middleware.OTPMiddleware',  # 2FA middleware
+    'apps.core.middleware.MetricsMiddleware',  # Latency histograms for /metrics/
+    'apps.core.middleware.QueryInstrumentationMiddleware',  # SQL counts + Server-Timing
+    'apps.core.middleware.ProfilingMiddleware',  # ?_profile=<token> for admins
     'apps.accounts.middleware.TwoFactorMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -83,6 +86,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'apps.hr.context_processors.pending_counts',  # HR counts
+                'apps.core.context_processors.fragment_cache',
                 'apps.employees.context_processors.notification_count',
             ],
         },
@@ -108,6 +112,96 @@ if DATABASE_URL:
         conn_health_checks=True,
     )
 
+# Query instrumentation (apps.core.middleware.QueryInstrumentationMiddleware)
+# Fraction of requests that get SQL counts, Server-Timing headers and a log line
+QUERY_INSTRUMENTATION_SAMPLE_RATE = config(
+    'QUERY_INSTRUMENTATION_SAMPLE_RATE', default=1.0 if DEBUG else 0.05, cast=float
+)
+# Same statement fingerprint run this many times in one request is logged as a likely N+1
+QUERY_N_PLUS_ONE_THRESHOLD = config('QUERY_N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+
+# On-demand profiling (apps.core.middleware.ProfilingMiddleware)
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILE_KEEP = config('PROFILE_KEEP', default=50, cast=int)
+PROFILE_TOKEN_MAX_AGE = config('PROFILE_TOKEN_MAX_AGE', default=60 * 60 * 24, cast=int)
+
+# Payroll (apps.employees.payroll): deductions applied to gross pay in order.
+# Each rule has a name and either a rate (fraction of gross) or a flat amount per period.
+PAYROLL_DEDUCTION_RULES = [
+    {'name': 'Federal income tax', 'rate': '0.12'},
+    {'name': 'State income tax', 'rate': '0.05'},
+    {'name': 'Social Security', 'rate': '0.062'},
+    {'name': 'Medicare', 'rate': '0.0145'},
+    {'name': 'Health insurance', 'amount': '150.00'},
+]
+
+# Metrics (apps.core.metrics, served at /metrics/)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Set to a shared directory when running several worker processes (e.g. gunicorn)
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+# Bearer token for Prometheus scrapers; admins can always view /metrics/ when logged in
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Live notifications (apps.employees.notifications)
+NOTIFICATION_STATE_CACHE_SECONDS = config('NOTIFICATION_STATE_CACHE_SECONDS', default=300, cast=int)
+NOTIFICATION_POLL_SECONDS = config('NOTIFICATION_POLL_SECONDS', default=30, cast=int)
+NOTIFICATION_STREAM_HEARTBEAT = config('NOTIFICATION_STREAM_HEARTBEAT', default=15, cast=float)
+NOTIFICATION_STREAM_MAX_SECONDS = config('NOTIFICATION_STREAM_MAX_SECONDS', default=300, cast=float)
+NOTIFICATION_STREAM_RETRY_MS = 2000
+# Read notifications older than this are deleted by purge_notifications
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+
+# Custom reports (apps.hr.jobs): reports spanning more days than this, or with
+# no start date, are built by the run_report_jobs worker and the generate report
+# page polls for the result. 0 (the default) builds them all in the request; only
+# set it where a run_report_jobs worker is running, e.g. 366
+REPORT_JOB_SYNC_DAYS = config('REPORT_JOB_SYNC_DAYS', default=0, cast=int)
+REPORT_JOB_POLL_SECONDS = 2
+
+# Logging
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps': {
+            'handlers': ['console'],
+            'level': config('APP_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
+# Caching (apps.core.cache): 'default' is the shared L2 tier, stored in the
+# database so every worker and instance sees the same entries without an
+# external service (its table is created by migration core.0002);
+# 'local' is each process's in-memory L1 tier.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'hrms_cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hrms-l1',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # {% cache %} fragments (navbars); per process, like L1
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hrms-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+# Longest time a worker may serve an L1 entry after another worker changed it
+CACHE_L1_SECONDS = config('CACHE_L1_SECONDS', default=5, cast=int)
+# Navbar fragments are keyed by user, page and the badge counts they show, so they
+# change with the counts; 0 renders them on every request
+FRAGMENT_CACHE_SECONDS = config('FRAGMENT_CACHE_SECONDS', default=600, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -127,9 +221,17 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# Whitenoise for serving static files in production
-if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# In production WhiteNoise serves content-hashed, pre-compressed files with far-future
+# cache headers; run fetch_assets and build_css before collectstatic (see build.sh)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
 
 # Media files (user uploads)
 MEDIA_URL = 'media/'
@@ -195,4 +297,10 @@ if USE_SENDGRID:
 else:
     # Development Settings (prints emails to console)
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-    DEFAULT_FROM_EMAIL = 'noreply@ethos.com'
\ No newline at end of file
+    DEFAULT_FROM_EMAIL = 'noreply@ethos.com'
+
+# Transport for app emails (apps.core.mail): 'sendgrid' (HTTP API, needs
+# SENDGRID_API_KEY), 'file' (JSON payloads written to EMAIL_FILE_PATH) or
+# 'locmem' (kept in memory, for tests)
+EMAIL_TRANSPORT = config('EMAIL_TRANSPORT', default='sendgrid')
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=str(BASE_DIR / 'sent_emails'))
@@ -7,6 +7,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from apps.accounts.views import dashboard_redirect
+from apps.core.views import metrics_view
 
 urlpatterns = [
     # Admin
@@ -26,6 +27,9 @@ urlpatterns = [
     
     # HR portal
     path('hr/', include('apps.hr.urls')),
+    
+    # Prometheus metrics (admins, or scrapers with METRICS_TOKEN)
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
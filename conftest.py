@@ -0,0 +1,12 @@
+"""
+pytest configuration: set up Django so benchmark entry points can run under pytest.
+
+The regular test suite runs with `python manage.py test`.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()